@@ -0,0 +1,130 @@
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+from ansatz import build_hardware_efficient_ansatz
+from cost_function import compute_exact_energy, compute_fused_energy
+from model_params import NLAYERS, NSHOTS, TOLERANCE, K
+from portfolio_model import PortfolioModel, index_bits
+from qibo.optimizers import optimize
+
+
+class RollingStatistics:
+    """Mean and covariance of a sliding window of daily log returns, updated with Welford's algorithm in
+    O(num_assets^2) per day instead of being recomputed over the whole window.
+
+    Args:
+        returns (np.ndarray): (num_days, num_assets) log returns of the first window
+    """
+
+    def __init__(self, returns: np.ndarray):
+        self.num_days = 0
+        self.mean = np.zeros(returns.shape[1])
+        self._m2 = np.zeros((returns.shape[1], returns.shape[1])) # sum of the outer products of the deviations
+        for row in returns:
+            self.add(row)
+
+    @property
+    def cov(self) -> np.ndarray:
+        """Sample covariance matrix, as DataFrame.cov()."""
+        return self._m2 / (self.num_days - 1)
+
+    def add(self, row: np.ndarray) -> None:
+        self.num_days += 1
+        delta = row - self.mean
+        self.mean = self.mean + delta / self.num_days
+        self._m2 += np.outer(delta, row - self.mean)
+
+    def remove(self, row: np.ndarray) -> None:
+        old_mean = self.mean
+        self.num_days -= 1
+        self.mean = old_mean - (row - old_mean) / self.num_days
+        self._m2 -= np.outer(row - self.mean, row - old_mean)
+
+    def slide(self, new_row: np.ndarray, old_row: np.ndarray) -> None:
+        """Moves the window one day: adds the new day and removes the oldest one."""
+        self.add(new_row)
+        self.remove(old_row)
+
+
+def backtest(dataset: pd.DataFrame, window: int, step: int = 1, exact: bool = False, nshots: int = NSHOTS, k: int = K, num_layers: int = NLAYERS, tolerance: float = TOLERANCE, method: str = 'Powell', options: dict = None, seed: int = None, **model_params) -> Iterator[dict]:
+    """Runs the VQE over a window sliding through the log returns and yields the metrics of every window as soon as it
+    is optimized, e.g. pd.DataFrame(backtest(dataset, 250, 20)). The statistics of the window are updated day by day
+    with RollingStatistics, and the optimization of every window starts from the optimal parameters of the previous
+    one, which are usually close.
+
+    Args:
+        dataset (pd.DataFrame): daily log returns, one column per asset
+        window (int): days of a window
+        step (int, optional): days between two windows. Defaults to 1.
+        exact (bool, optional): optimize the exact energy (compute_exact_energy) instead of the measured one
+            (compute_fused_energy). Defaults to False.
+        nshots (int, optional): number of measurement of the ansatz. Defaults to NSHOTS.
+        k (int, optional): qubits per asset. Defaults to K.
+        num_layers (int, optional): layers of the ansatz. Defaults to NLAYERS.
+        tolerance (float, optional): probability threshold of the portfolios considered, as in
+            get_optimal_binary_portfolios_prob_and_energy. Defaults to TOLERANCE.
+        method (str, optional): optimizer of qibo.optimizers.optimize. Defaults to 'Powell'.
+        options (dict, optional): options of the optimizer. Defaults to None.
+        seed (int, optional): seed of the initial parameters. Defaults to None.
+        **model_params: lambda_1, lambda_2, lambda_3, sigma_target or risk_free_rate of the PortfolioModel
+
+    Returns:
+        Iterator[dict]: 'Start' and 'End' dates of the window, 'Energy' and 'Evaluations' of the optimization, the
+        selected 'Portfolio' bit string with its 'Returns', 'Volatility' and 'Sharpe Ratio' on the window, and
+        'Next Return', the log return of the portfolio over the following step days (NaN after the last window)
+    """
+    returns = np.ascontiguousarray(dataset.values, dtype=float)
+    model = PortfolioModel(dataset.iloc[:window], k=k, **model_params)
+    statistics = RollingStatistics(returns[:window])
+    circuit = build_hardware_efficient_ansatz(model.num_qubits, num_layers)
+    parameters = np.random.default_rng(seed).uniform(0, 2 * np.pi, circuit.trainable_gates.nparams)
+
+    evaluations = 0
+    def loss(parameters, circuit, model):
+        nonlocal evaluations
+        evaluations += 1
+        if exact:
+            return compute_exact_energy(parameters, circuit, model)
+        return compute_fused_energy(parameters, circuit, model, nshots)
+
+    for end in range(window, len(returns) + 1, step):
+        if end > window:
+            for day in range(end - step, end):
+                statistics.slide(returns[day], returns[day - window])
+        model.set_statistics(statistics.mean, statistics.cov, window)
+
+        evaluations = 0
+        energy, parameters, _ = optimize(loss, parameters, args=(circuit, model), method=method, options=options)
+
+        # as in the notebook: the portfolio of lowest energy among the most probable ones
+        circuit.set_parameters(parameters)
+        if exact:
+            probabilities = np.abs(np.asarray(circuit().state())) ** 2
+            indices = np.flatnonzero(probabilities.max() - probabilities < tolerance)
+        else:
+            frequencies = circuit(nshots=nshots).frequencies()
+            max_frequency = max(frequencies.values())
+            indices = np.array([int(bit_string, 2) for bit_string, frequency in frequencies.items() if (max_frequency - frequency) / nshots < tolerance])
+        bit_strings = index_bits(indices, model.num_qubits)
+        bit_string = bit_strings[np.argmin(model.energy(bit_strings))]
+
+        weights = model.decimal_weights(bit_string)
+        metrics = {'Returns': np.nan, 'Volatility': np.nan, 'Sharpe Ratio': np.nan}
+        next_return = np.nan
+        if weights.sum() > 0:
+            metrics = model.portfolio_metrics(weights)
+            if end + step <= len(returns):
+                next_return = float(returns[end:end + step].sum(axis=0) @ metrics['Normalized Weights'])
+
+        yield {
+            'Start': dataset.index[end - window],
+            'End': dataset.index[end - 1],
+            'Energy': float(energy),
+            'Evaluations': evaluations,
+            'Portfolio': ''.join(map(str, bit_string)),
+            'Returns': metrics['Returns'],
+            'Volatility': metrics['Volatility'],
+            'Sharpe Ratio': metrics['Sharpe Ratio'],
+            'Next Return': next_return,
+        }
@@ -0,0 +1,136 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from portfolio_model import PortfolioModel, index_bits
+
+MAX_BRUTE_FORCE_QUBITS = 32 # 2^32 bit strings take a few minutes on a handful of cores
+BLOCK_QUBITS = 16 # last qubits enumerated at once, the tables of a block take 2^16 rows
+PREFIXES_PER_BLOCK = 16 # values of the first qubits evaluated together with a single matmul
+PREFIXES_PER_TASK = 256 # values of the first qubits of a task of the process pool
+
+# Tables of the worker processes, set once by _init_worker
+_tables = None
+
+
+def split_tables(model: PortfolioModel, block_qubits: int = BLOCK_QUBITS) -> dict:
+    """Splits A(i, bit_string) into a part of the first qubits (the prefix) and a part of the last block_qubits ones,
+    A = a_high[prefix] + a_low[block], and precomputes the terms of the Hamiltonian of each part. The energy of a
+    prefix and a block only needs their cross term in the risk, a matmul over the assets with bits in the block.
+
+    Args:
+        model (PortfolioModel): the model whose Hamiltonian is minimized
+        block_qubits (int, optional): qubits of the block. Defaults to BLOCK_QUBITS.
+
+    Returns:
+        dict: the tables, all the arrays are small enough to be sent to the worker processes
+    """
+    num_qubits = model.num_qubits
+    low_qubits = min(block_qubits, num_qubits)
+    high_qubits = num_qubits - low_qubits
+    encoding = model.encoding
+    low_assets = np.flatnonzero(np.any(encoding[high_qubits:] != 0, axis=0))
+
+    a_low = -(index_bits(np.arange(2 ** low_qubits), low_qubits) @ encoding[high_qubits:, low_assets])
+    risk_weights = model.risk_weights[low_assets]
+    return {
+        'num_qubits': num_qubits,
+        'low_qubits': low_qubits,
+        'offsets': model.offsets,
+        'high_encoding': encoding[:high_qubits],
+        'low_assets': low_assets,
+        'return_sums': model.return_sums,
+        'risk_weights': model.risk_weights,
+        'risk_target': model.num_assets ** 2 * model.sigma_target ** 2,
+        'lambdas': (model.lambda_1, model.lambda_2, model.lambda_3),
+        # the cross term of the risk is (2 * a_high * risk_weights) @ a_low.T
+        'a_low_t': np.ascontiguousarray(a_low.T),
+        'low_return': a_low @ model.return_sums[low_assets],
+        'low_risk': (a_low * a_low) @ risk_weights,
+        'low_sum': a_low.sum(axis=1),
+    }
+
+
+def block_top_k(tables: dict, start: int, stop: int, top_k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Lowest energies of the bit strings whose prefix is in [start, stop).
+
+    Args:
+        tables (dict): output of split_tables
+        start (int): first prefix
+        stop (int): end of the prefixes
+        top_k (int): number of bit strings kept
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: indices of the bit strings, in the order of the statevector, and their energies
+    """
+    lambda_1, lambda_2, lambda_3 = tables['lambdas']
+    low_qubits = tables['low_qubits']
+    high_qubits = tables['num_qubits'] - low_qubits
+    low_assets = tables['low_assets']
+    best_indices = np.empty(0, dtype=np.int64)
+    best_energies = np.empty(0)
+    for block_start in range(start, stop, PREFIXES_PER_BLOCK):
+        prefixes = np.arange(block_start, min(block_start + PREFIXES_PER_BLOCK, stop))
+        a_high = tables['offsets'] - index_bits(prefixes, high_qubits) @ tables['high_encoding']
+        high_return = a_high @ tables['return_sums']
+        high_risk = (a_high * a_high) @ tables['risk_weights'] - tables['risk_target']
+        high_sum = a_high.sum(axis=1) + 1
+
+        cross = (2 * a_high[:, low_assets] * tables['risk_weights'][low_assets]) @ tables['a_low_t']
+        h2 = cross + high_risk[:, None] + tables['low_risk']
+        h3 = high_sum[:, None] + tables['low_sum']
+        energies = lambda_1 * -(high_return[:, None] + tables['low_return']) + lambda_2 * h2 * h2 + lambda_3 * h3 * h3
+
+        energies = energies.ravel()
+        candidates = np.argpartition(energies, top_k - 1)[:top_k] if len(energies) > top_k else np.arange(len(energies))
+        indices = (prefixes[candidates // 2 ** low_qubits] << low_qubits) | (candidates % 2 ** low_qubits)
+        best_indices = np.concatenate([best_indices, indices])
+        best_energies = np.concatenate([best_energies, energies[candidates]])
+        if len(best_energies) > top_k:
+            keep = np.argpartition(best_energies, top_k - 1)[:top_k]
+            best_indices, best_energies = best_indices[keep], best_energies[keep]
+    return best_indices, best_energies
+
+
+def brute_force(model: PortfolioModel, top_k: int = 10, workers: int = None, block_qubits: int = BLOCK_QUBITS) -> list[tuple[str, float]]:
+    """Solves the Hamiltonian in (7) by enumerating all the 2^N bit strings, to score the VQE against the exact
+    optimum. The bit strings are evaluated in blocks of a few MiB, in parallel across a process pool, and every task
+    only returns its top_k, so the memory stays bounded for N up to MAX_BRUTE_FORCE_QUBITS.
+
+    Args:
+        model (PortfolioModel): the model whose Hamiltonian is minimized
+        top_k (int, optional): number of portfolios returned. Defaults to 10.
+        workers (int, optional): number of processes, 1 runs in this process. Defaults to the number of CPUs.
+        block_qubits (int, optional): qubits enumerated by every block. Defaults to BLOCK_QUBITS.
+
+    Raises:
+        ValueError: if the model has more than MAX_BRUTE_FORCE_QUBITS qubits
+
+    Returns:
+        list[tuple[str, float]]: the top_k (bit_string, energy) with the lowest energies, sorted, with the bit strings
+        of CircuitResult.frequencies()
+    """
+    if model.num_qubits > MAX_BRUTE_FORCE_QUBITS:
+        raise ValueError(f'{model.num_qubits} qubits are too many to enumerate, the limit is {MAX_BRUTE_FORCE_QUBITS}')
+    tables = split_tables(model, block_qubits)
+    num_prefixes = 2 ** (tables['num_qubits'] - tables['low_qubits'])
+    ranges = [(start, min(start + PREFIXES_PER_TASK, num_prefixes)) for start in range(0, num_prefixes, PREFIXES_PER_TASK)]
+
+    if workers == 1 or len(ranges) == 1:
+        results = [block_top_k(tables, start, stop, top_k) for start, stop in ranges]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(tables,)) as executor:
+            results = list(executor.map(_solve_range, ranges, [top_k] * len(ranges)))
+
+    indices = np.concatenate([result[0] for result in results])
+    energies = np.concatenate([result[1] for result in results])
+    order = np.argsort(energies, kind='stable')[:top_k]
+    return [(format(int(indices[i]), f'0{model.num_qubits}b'), float(energies[i])) for i in order]
+
+
+def _init_worker(tables: dict) -> None:
+    global _tables
+    _tables = tables
+
+
+def _solve_range(prefixes: tuple[int, int], top_k: int) -> tuple[np.ndarray, np.ndarray]:
+    return block_top_k(_tables, prefixes[0], prefixes[1], top_k)
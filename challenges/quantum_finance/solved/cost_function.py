@@ -1,8 +1,10 @@
 # Define the vector that contains the pauli opeations
+import numpy as np
 import pandas as pd
 import qibo
 from ansatz import build_hardware_efficient_ansatz
 from model_params import LAMBDA_1, LAMBDA_2, LAMBDA_3, NLAYERS, NSHOTS, NUM_ASSETS, SIGMA_TARGET, TWO_QUBIT_GATES, K, N
+from portfolio_model import PortfolioModel, encoding_matrix, tilde_sigma_matrix
 from utils import string_to_int_list
 
 # All this functions should help you build the cost function of the problem, which is the expected value of the Hamiltonian defined in (7).
@@ -106,6 +108,48 @@ def compute_cost_function(dataset: pd.DataFrame, bit_string: list[int]) -> float
     return cost_function
 
 
+### batched evaluation
+
+
+def batch_cost_function(bit_strings: np.ndarray, encoding: np.ndarray, return_sums: np.ndarray, risk_weights: np.ndarray) -> np.ndarray:
+    """compute_cost_function of every row of a batch of bit strings, with the dataset statistics precomputed.
+
+    Args:
+        bit_strings (np.ndarray): (M, N) array of 0/1 (e.g. uint8), one bit string per row
+        encoding (np.ndarray): matrix of encoding_matrix(NUM_ASSETS)
+        return_sums (np.ndarray): sum over the days of the log returns of every asset, dataset.values.sum(axis=0)
+        risk_weights (np.ndarray): row sums of the tilde_sigma matrix, tilde_sigma_matrix(dataset.cov().values).sum(axis=1)
+
+    Returns:
+        np.ndarray: (M,) energies
+    """
+    # A(i, bit_string) for every bit string and asset
+    a = encoding.sum(axis=0) - np.asarray(bit_strings, dtype=float) @ encoding
+    h1 = -(a @ return_sums)
+    h2 = (a * a) @ risk_weights - len(risk_weights) ** 2 * SIGMA_TARGET ** 2
+    h3 = a.sum(axis=1) + 1
+    return LAMBDA_1 * h1 + LAMBDA_2 * h2 ** 2 + LAMBDA_3 * h3 ** 2
+
+
+def compute_cost_function_batch(dataset: pd.DataFrame, bit_strings: np.ndarray) -> np.ndarray:
+    """Same as compute_cost_function for an (M, N) array of bit strings: the covariance and the return sums are computed
+    once and all the energies come from a few matmuls. portfolio_model.PortfolioModel keeps these statistics between calls.
+
+    Args:
+        dataset (pd.DataFrame): daily log returns
+        bit_strings (np.ndarray): (M, N) array of 0/1 (e.g. uint8), one bit string per row
+
+    Returns:
+        np.ndarray: (M,) energies
+    """
+    return batch_cost_function(
+        bit_strings,
+        encoding_matrix(NUM_ASSETS),
+        dataset.values.sum(axis=0),
+        tilde_sigma_matrix(dataset.cov().values).sum(axis=1),
+    )
+
+
 ### energy
 
 
@@ -175,4 +219,38 @@ def compute_total_energy(parameters: list[float], circuit, dataset: pd.DataFrame
     result = circuit(nshots=nshots) 
     total_energy = LAMBDA_1 * compute_return_energy(result,dataset) + LAMBDA_2 * compute_risk_energy(result,dataset) + LAMBDA_3 * compute_normalization_energy(result)
     print('Energy:', total_energy)
-    return total_energy
\ No newline at end of file
+    return total_energy
+
+
+def compute_fused_energy(parameters: list[float], circuit, model: PortfolioModel, nshots: int = NSHOTS) -> float:
+    """Same energy as compute_total_energy from a single pass over the frequencies, see PortfolioModel.shot_energy. The term energies of the measured bit strings are cached by the model between the calls of the optimizer.
+
+    Args:
+        parameters (list[float]): parameters of the ansatz
+        circuit (_type_): ansatz
+        model (PortfolioModel): the model whose Hamiltonian is evaluated
+        nshots (int, optional): number of measurement of the ansatz. Defaults to NSHOTS.
+
+    Returns:
+        float: energy
+    """
+    circuit.set_parameters(parameters)
+    result = circuit(nshots=nshots)
+    total_energy, _ = model.shot_energy(result.frequencies(), nshots)
+    return total_energy
+
+
+def compute_exact_energy(parameters: list[float], circuit, model: PortfolioModel) -> float:
+    """Exact version of compute_total_energy: instead of sampling the circuit, the energy is the expectation of the diagonal Hamiltonian over the probabilities of the statevector. The 2^N energies are precomputed once by the model, so every call is one simulation and one dot product, for N up to MAX_EXACT_QUBITS.
+
+    Args:
+        parameters (list[float]): parameters of the ansatz
+        circuit (_type_): ansatz, its measurements are ignored
+        model (PortfolioModel): the model whose Hamiltonian is evaluated
+
+    Returns:
+        float: energy
+    """
+    circuit.set_parameters(parameters)
+    state = np.asarray(circuit().state())
+    return model.expected_energy(np.abs(state) ** 2)
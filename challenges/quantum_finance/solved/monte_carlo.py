@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+from portfolio_model import TRADING_DAYS, PortfolioModel
+
+MC_CHUNK = 2 ** 16 # random portfolios drawn and evaluated at once
+
+
+def batch_portfolio_metrics(model: PortfolioModel, weights: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Annualized return, volatility and Sharpe Ratio of many portfolios, as get_portfolio_metrics on every row.
+
+    Args:
+        model (PortfolioModel): the statistics of the dataset
+        weights (np.ndarray): (M, num_assets) weights, normalized by the sum of every row
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: (M,) returns, volatilities and Sharpe Ratios
+    """
+    weights = np.asarray(weights, dtype=float)
+    weights = weights / weights.sum(axis=1, keepdims=True)
+    returns = np.einsum('ij,j->i', weights, model.mean) * TRADING_DAYS
+    volatilities = np.sqrt(np.einsum('ij,jk,ik->i', weights, model.cov * TRADING_DAYS, weights, optimize=True))
+    return returns, volatilities, (returns - model.risk_free_rate) / volatilities
+
+
+def pareto_front(returns: np.ndarray, volatilities: np.ndarray) -> np.ndarray:
+    """Rows no other row beats with a lower volatility and a higher return.
+
+    Returns:
+        np.ndarray: indices of the rows, by increasing volatility
+    """
+    order = np.lexsort((-returns, volatilities))
+    best_before = np.maximum.accumulate(returns[order])
+    keep = np.ones(len(order), dtype=bool)
+    keep[1:] = returns[order][1:] > best_before[:-1]
+    return order[keep]
+
+
+def monte_carlo(model: PortfolioModel, num_portfolios: int, chunk_size: int = MC_CHUNK, seed: int = None) -> dict:
+    """Classical baseline of the README: random portfolios assessed on the historical data. The portfolios are drawn
+    and evaluated in chunks, and only the efficient frontier and the best Sharpe Ratio are kept from one chunk to the
+    next, so millions of portfolios take the memory of a single chunk.
+
+    Args:
+        model (PortfolioModel): the statistics of the dataset
+        num_portfolios (int): number of random portfolios
+        chunk_size (int, optional): portfolios of a chunk. Defaults to MC_CHUNK.
+        seed (int, optional): seed of the weights. Defaults to None.
+
+    Raises:
+        ValueError: if num_portfolios is not positive
+
+    Returns:
+        dict: 'Frontier', a pd.DataFrame with the 'Returns', 'Volatility', 'Sharpe Ratio' and the weights of every
+        asset of the efficient portfolios by increasing volatility, and 'Max Sharpe Ratio', the pd.Series of the best one
+    """
+    if num_portfolios < 1:
+        raise ValueError(f'At least one portfolio is needed, got {num_portfolios}')
+    rng = np.random.default_rng(seed)
+    frontier = np.empty((0, model.num_assets))
+    frontier_returns = np.empty(0)
+    frontier_volatilities = np.empty(0)
+    best_weights, best_sharpe = None, -np.inf
+    for start in range(0, num_portfolios, chunk_size):
+        weights = rng.random((min(chunk_size, num_portfolios - start), model.num_assets))
+        weights /= weights.sum(axis=1, keepdims=True)
+        returns, volatilities, sharpe = batch_portfolio_metrics(model, weights)
+
+        best = np.argmax(sharpe)
+        if sharpe[best] > best_sharpe:
+            best_weights, best_sharpe = weights[best], sharpe[best]
+
+        frontier = np.concatenate([frontier, weights])
+        frontier_returns = np.concatenate([frontier_returns, returns])
+        frontier_volatilities = np.concatenate([frontier_volatilities, volatilities])
+        keep = pareto_front(frontier_returns, frontier_volatilities)
+        frontier, frontier_returns, frontier_volatilities = frontier[keep], frontier_returns[keep], frontier_volatilities[keep]
+
+    columns = ['Returns', 'Volatility', 'Sharpe Ratio'] + model.assets
+    frontier_sharpe = (frontier_returns - model.risk_free_rate) / frontier_volatilities
+    table = np.column_stack([frontier_returns, frontier_volatilities, frontier_sharpe, frontier])
+    returns, volatilities, sharpe = batch_portfolio_metrics(model, best_weights[None, :])
+    max_sharpe = pd.Series(np.concatenate([returns, volatilities, sharpe, best_weights]), index=columns)
+    return {'Frontier': pd.DataFrame(table, columns=columns), 'Max Sharpe Ratio': max_sharpe}
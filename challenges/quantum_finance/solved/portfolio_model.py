@@ -0,0 +1,300 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from model_params import LAMBDA_1, LAMBDA_2, LAMBDA_3, RISK_FREE_RATE, SIGMA_TARGET, K
+
+TRADING_DAYS = 252 # used to annualize the daily statistics
+MAX_EXACT_QUBITS = 26 # 2^26 energies of the diagonal Hamiltonian take 512 MiB
+DIAGONAL_CHUNK = 2 ** 18 # bit strings expanded at once when building the diagonal
+TERM_CACHE_SIZE = 2 ** 16 # bit strings whose term energies are kept between shot energies
+
+
+def index_bits(indices: np.ndarray, num_qubits: int) -> np.ndarray:
+    """Bit strings of basis state indices, in the order of the statevector: qubit 0 is the most significant bit, as in
+    the strings of CircuitResult.frequencies().
+
+    Args:
+        indices (np.ndarray): (M,) indices in [0, 2^num_qubits)
+        num_qubits (int): number of qubits
+
+    Returns:
+        np.ndarray: (M, num_qubits) uint8 bit strings
+    """
+    shifts = np.arange(num_qubits - 1, -1, -1, dtype=np.int64)
+    return ((np.asarray(indices, dtype=np.int64)[:, None] >> shifts) & 1).astype(np.uint8)
+
+
+def encoding_matrix(num_assets: int, k: int = K) -> np.ndarray:
+    """Matrix E of the linear part of A: A(i, bit_string) = sum_q (1 - bit_string[q]) * E[q, i], so that the A values
+    of a batch of bit strings are a single matmul.
+
+    Args:
+        num_assets (int): number of assets
+        k (int, optional): qubits per asset. Defaults to K.
+
+    Returns:
+        np.ndarray: (num_assets * k, num_assets) matrix, E[k' + i*k, i] = 2 ** (k' - 2) / 2.
+    """
+    encoding = np.zeros((num_assets * k, num_assets))
+    for i in range(num_assets):
+        encoding[i * k:(i + 1) * k, i] = 2.0 ** (np.arange(k) - 2) / 2
+    return encoding
+
+
+def tilde_sigma_matrix(covariance: np.ndarray) -> np.ndarray:
+    """All the tilde_sigma(i, j) at once: the diagonal of the covariance matrix and twice its upper triangle.
+
+    Args:
+        covariance (np.ndarray): covariance matrix of the daily log returns
+
+    Returns:
+        np.ndarray: upper triangular matrix
+    """
+    return np.triu(2 * covariance, 1) + np.diag(np.diag(covariance))
+
+
+class TermCache:
+    """Bounded LRU cache of the three term energies of bit strings, keyed by the integer of the bit string. The same few
+    hundred bit strings are measured over and over along an optimization, so most of them are computed only once.
+
+    Args:
+        maxsize (int, optional): number of bit strings kept. Defaults to TERM_CACHE_SIZE.
+    """
+
+    def __init__(self, maxsize: int = TERM_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._terms = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def lookup(self, indices: list[int], compute) -> np.ndarray:
+        """Term energies of the bit strings, the missing ones computed in a single batch.
+
+        Args:
+            indices (list[int]): integers of the bit strings, without repetitions
+            compute: function from an (M,) array of missing indices to their (M, 3) term energies
+
+        Returns:
+            np.ndarray: (len(indices), 3) term energies
+        """
+        terms = np.empty((len(indices), 3))
+        missing = []
+        for row, index in enumerate(indices):
+            cached = self._terms.get(index)
+            if cached is None:
+                missing.append(row)
+            else:
+                self._terms.move_to_end(index)
+                terms[row] = cached
+        self.hits += len(indices) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            terms[missing] = compute(np.array([indices[row] for row in missing], dtype=np.int64))
+            for row in missing:
+                self._terms[indices[row]] = terms[row]
+            while len(self._terms) > self.maxsize:
+                self._terms.popitem(last=False)
+        return terms
+
+
+class PortfolioModel:
+    """Hamiltonian (7) of a portfolio problem with its dataset statistics computed once, so that many models with
+    different data or parameters can live in the same process. The statistics are contiguous float64 arrays, and every
+    energy method takes either one bit string or an (M, N) array of bit strings (e.g. uint8), one per row.
+
+    Args:
+        dataset (pd.DataFrame): daily log returns, one column per asset
+        k (int, optional): qubits per asset. Defaults to K.
+        lambda_1 (float, optional): return penalty coefficient. Defaults to LAMBDA_1.
+        lambda_2 (float, optional): risk penalty coefficient. Defaults to LAMBDA_2.
+        lambda_3 (float, optional): normalization penalty coefficient. Defaults to LAMBDA_3.
+        sigma_target (float, optional): target volatility. Defaults to SIGMA_TARGET.
+        risk_free_rate (float, optional): return without risk, for the Sharpe ratio. Defaults to RISK_FREE_RATE.
+    """
+
+    def __init__(self, dataset: pd.DataFrame, k: int = K, lambda_1: float = LAMBDA_1, lambda_2: float = LAMBDA_2, lambda_3: float = LAMBDA_3, sigma_target: float = SIGMA_TARGET, risk_free_rate: float = RISK_FREE_RATE):
+        returns = np.ascontiguousarray(dataset.values, dtype=float)
+        self.assets = list(dataset.columns)
+        self.num_days = len(returns)
+        self.mean = np.ascontiguousarray(returns.mean(axis=0))
+        self.cov = np.ascontiguousarray(np.cov(returns, rowvar=False).reshape(len(self.assets), len(self.assets)))
+        self.return_sums = np.ascontiguousarray(returns.sum(axis=0))
+        self.k = k
+        self.lambda_1 = lambda_1
+        self.lambda_2 = lambda_2
+        self.lambda_3 = lambda_3
+        self.sigma_target = sigma_target
+        self.risk_free_rate = risk_free_rate
+        self._set_statistics()
+
+    def set_statistics(self, mean: np.ndarray, cov: np.ndarray, num_days: int) -> None:
+        """Replaces the statistics of the dataset, e.g. with the ones of a rolling window, and resets the caches.
+
+        Args:
+            mean (np.ndarray): mean of the daily log returns of every asset
+            cov (np.ndarray): covariance matrix of the daily log returns
+            num_days (int): number of days of the statistics
+        """
+        self.num_days = num_days
+        self.mean = np.ascontiguousarray(mean, dtype=float)
+        self.cov = np.ascontiguousarray(cov, dtype=float)
+        self.return_sums = self.mean * num_days
+        self._set_statistics()
+
+    def _set_statistics(self) -> None:
+        """Derives the arrays of the energies from mean, cov and return_sums."""
+        self.tilde_sigma = np.ascontiguousarray(tilde_sigma_matrix(self.cov))
+        self.risk_weights = self.tilde_sigma.sum(axis=1)
+        self.encoding = encoding_matrix(self.num_assets, self.k)
+        # A(i, bit_string) = offsets[i] - bit_string @ encoding[:, i], and bit_weights[q] is the weight of bit q
+        self.offsets = self.encoding.sum(axis=0)
+        self.bit_weights = np.ascontiguousarray(self.encoding.sum(axis=1))
+        decimal = np.zeros_like(self.encoding)
+        for i in range(self.num_assets):
+            decimal[i * self.k:(i + 1) * self.k, i] = 2.0 ** (np.arange(self.k) - 1) / 2 ** self.k
+        self.decimal_encoding = decimal
+        self._diagonal = None
+        self._term_cache = TermCache()
+
+    @property
+    def num_assets(self) -> int:
+        return len(self.assets)
+
+    @property
+    def num_qubits(self) -> int:
+        return self.num_assets * self.k
+
+    def asset_values(self, bit_strings) -> np.ndarray:
+        """A(i, bit_string) of every asset.
+
+        Args:
+            bit_strings: one bit string or an (M, N) array of them
+
+        Returns:
+            np.ndarray: (num_assets,) or (M, num_assets) values
+        """
+        return self.offsets - np.asarray(bit_strings, dtype=float) @ self.encoding
+
+    def _terms(self, a: np.ndarray) -> np.ndarray:
+        """The three unweighted terms of the Hamiltonian in (7) from the A values of (asset_values).
+
+        Args:
+            a (np.ndarray): (num_assets,) or (M, num_assets) values
+
+        Returns:
+            np.ndarray: (3,) or (M, 3) return, risk and normalization energies
+        """
+        h1 = -(a @ self.return_sums)
+        h2 = (a * a) @ self.risk_weights - self.num_assets ** 2 * self.sigma_target ** 2
+        h3 = a.sum(axis=-1) + 1
+        return np.stack([h1, h2 ** 2, h3 ** 2], axis=-1)
+
+    def return_energy(self, bit_strings) -> np.ndarray:
+        """First term of the Hamiltonian in (7), as return_cost_function."""
+        return self.term_energies(bit_strings)[..., 0]
+
+    def risk_energy(self, bit_strings) -> np.ndarray:
+        """Second term of the Hamiltonian in (7), as risk_cost_function."""
+        return self.term_energies(bit_strings)[..., 1]
+
+    def normalization_energy(self, bit_strings) -> np.ndarray:
+        """Third term of the Hamiltonian in (7), as normalization_cost_function."""
+        return self.term_energies(bit_strings)[..., 2]
+
+    def energy(self, bit_strings) -> np.ndarray:
+        """Weighted sum of the three terms, as compute_cost_function.
+
+        Args:
+            bit_strings: one bit string or an (M, N) array of them
+
+        Returns:
+            np.ndarray: energy of every bit string, a scalar for a single one
+        """
+        return self.term_energies(bit_strings) @ np.array([self.lambda_1, self.lambda_2, self.lambda_3])
+
+    def term_energies(self, bit_strings) -> np.ndarray:
+        """The three terms of the Hamiltonian in (7), unweighted, from a single evaluation of A.
+
+        Args:
+            bit_strings: one bit string or an (M, N) array of them
+
+        Returns:
+            np.ndarray: (3,) or (M, 3) return, risk and normalization energies
+        """
+        return self._terms(self.asset_values(bit_strings))
+
+    def shot_energy(self, frequencies: dict, nshots: int = None) -> tuple[float, dict]:
+        """Energy of a measurement in a single pass over its frequencies, as compute_total_energy. The bit strings are
+        decoded once into integers and their term energies are looked up in the cache of the model, so only the bit
+        strings never measured before are evaluated, in one batch.
+
+        Args:
+            frequencies (dict): {bit_string: count}, as CircuitResult.frequencies()
+            nshots (int, optional): number of measurements. Defaults to the sum of the counts.
+
+        Returns:
+            tuple[float, dict]: total energy and its unweighted 'Return', 'Risk' and 'Normalization' terms
+        """
+        indices = [int(bit_string, 2) for bit_string in frequencies]
+        counts = np.fromiter(frequencies.values(), dtype=float, count=len(indices))
+        terms = self._term_cache.lookup(indices, lambda missing: self.term_energies(index_bits(missing, self.num_qubits)))
+        h1, h2, h3 = counts @ terms / (counts.sum() if nshots is None else nshots)
+        total = self.lambda_1 * h1 + self.lambda_2 * h2 + self.lambda_3 * h3
+        return float(total), {'Return': float(h1), 'Risk': float(h2), 'Normalization': float(h3)}
+
+    def energy_diagonal(self) -> np.ndarray:
+        """Energy of every basis state, the diagonal of the Hamiltonian in the order of the statevector. It is computed
+        once, in chunks of DIAGONAL_CHUNK bit strings, and kept until the statistics change.
+
+        Raises:
+            ValueError: if the model has more than MAX_EXACT_QUBITS qubits
+
+        Returns:
+            np.ndarray: (2^N,) energies
+        """
+        if self._diagonal is None:
+            if self.num_qubits > MAX_EXACT_QUBITS:
+                raise ValueError(f'The diagonal of {self.num_qubits} qubits does not fit in memory, the limit is {MAX_EXACT_QUBITS}')
+            size = 2 ** self.num_qubits
+            diagonal = np.empty(size)
+            for start in range(0, size, DIAGONAL_CHUNK):
+                indices = np.arange(start, min(start + DIAGONAL_CHUNK, size))
+                diagonal[start:start + len(indices)] = self.energy(index_bits(indices, self.num_qubits))
+            self._diagonal = diagonal
+        return self._diagonal
+
+    def expected_energy(self, probabilities: np.ndarray) -> float:
+        """Exact expectation of the Hamiltonian, without shot noise.
+
+        Args:
+            probabilities (np.ndarray): (2^N,) probabilities of the basis states, e.g. |statevector|^2
+
+        Returns:
+            float: energy
+        """
+        return float(np.asarray(probabilities, dtype=float) @ self.energy_diagonal())
+
+    def decimal_weights(self, bit_strings) -> np.ndarray:
+        """Weights of the assets in the decimal base, as get_asset_weight_decimal on the bits of every asset."""
+        return np.asarray(bit_strings, dtype=float) @ self.decimal_encoding
+
+    def portfolio_metrics(self, weights) -> dict:
+        """Annualized return, volatility and Sharpe Ratio of a portfolio, as get_portfolio_metrics.
+
+        Args:
+            weights: decimal portfolio, as a dict {asset: weight} or an array in the order of the assets
+
+        Returns:
+            dict: 'Returns', 'Volatility', 'Sharpe Ratio' and 'Normalized Weights'
+        """
+        if isinstance(weights, dict):
+            weights = list(weights.values())
+        normalized_weights = np.asarray(weights, dtype=float) / np.sum(weights)
+        annualized_ret_portfolio = float(self.mean @ normalized_weights * TRADING_DAYS)
+        annualized_vol_portfolio = float(np.sqrt(normalized_weights @ (self.cov * TRADING_DAYS) @ normalized_weights))
+        sharpe_ratio = (annualized_ret_portfolio - self.risk_free_rate) / annualized_vol_portfolio
+        return {'Returns': annualized_ret_portfolio, 'Volatility': annualized_vol_portfolio, 'Sharpe Ratio': sharpe_ratio, 'Normalized Weights': normalized_weights}
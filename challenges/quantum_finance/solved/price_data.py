@@ -0,0 +1,145 @@
+import os
+from typing import Protocol
+
+import numpy as np
+import pandas as pd
+
+PRICE_CACHE_DIR = os.environ.get('PRICE_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'quantum_finance', 'prices')) # directory of the cached prices
+
+
+class PriceSource(Protocol):
+    def fetch(self, ticker: str, start: str, end: str) -> pd.Series:
+        """Daily closing prices of the ticker from start (included) to end (excluded), indexed by date."""
+
+
+class YahooSource:
+    """Daily closing prices from Yahoo finance, adjusted for splits and dividends. yfinance is only imported when
+    prices are downloaded, so offline environments do not need it."""
+
+    def fetch(self, ticker: str, start: str, end: str) -> pd.Series:
+        import yfinance
+        raw_data = yfinance.download(tickers=ticker, start=start, end=end, interval='1d', auto_adjust=True, progress=False)
+        close = raw_data['Close']
+        if isinstance(close, pd.DataFrame): # some versions keep a level of tickers
+            close = close.iloc[:, 0]
+        return close
+
+
+class FileSource:
+    """Daily closing prices from CSV files, one per ticker named <ticker>.csv with the 'Date' and 'Close' columns of the
+    exports of Yahoo finance. A drop-in for YahooSource in offline environments and tests.
+
+    Args:
+        directory (str): directory of the files
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def fetch(self, ticker: str, start: str, end: str) -> pd.Series:
+        data = pd.read_csv(os.path.join(self.directory, f'{ticker}.csv'), index_col='Date', parse_dates=True)
+        close = data['Close'].sort_index()
+        return close[(close.index >= pd.Timestamp(start)) & (close.index < pd.Timestamp(end))]
+
+
+class PriceCache:
+    """Local columnar cache of daily closing prices in front of a source. Every ticker is stored as .npy columns, the
+    dates and the closes, read memory-mapped, with the date ranges already fetched, so that a rerun is served from
+    disk and only the missing ranges are asked to the source. The days from today on are only marked as fetched once
+    the source returned prices for them: until then, a range ending in the future asks the source again for them.
+
+    Args:
+        directory (str, optional): directory of the cache. Defaults to PRICE_CACHE_DIR.
+        source (PriceSource, optional): where the missing prices come from. Defaults to YahooSource().
+    """
+
+    def __init__(self, directory: str = PRICE_CACHE_DIR, source: PriceSource = None):
+        self.directory = directory
+        self.source = YahooSource() if source is None else source
+
+    def _path(self, ticker: str, column: str) -> str:
+        return os.path.join(self.directory, ticker.replace(os.sep, '_'), f'{column}.npy')
+
+    def _load(self, ticker: str, mmap_mode: str = 'r') -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Dates, closes and (R, 2) fetched ranges of the ticker, empty if it is not cached. The columns are memory-mapped
+        unless mmap_mode is None, which the write path needs: a mapped file cannot be replaced on Windows."""
+        try:
+            dates = np.load(self._path(ticker, 'dates'), mmap_mode=mmap_mode)
+            closes = np.load(self._path(ticker, 'close'), mmap_mode=mmap_mode)
+            ranges = np.load(self._path(ticker, 'ranges'))
+        except FileNotFoundError:
+            dates, closes, ranges = None, None, None
+        if dates is None or len(dates) != len(closes): # missing, or interrupted while it was written
+            return np.empty(0, dtype='datetime64[D]'), np.empty(0), np.empty((0, 2), dtype='datetime64[D]')
+        return dates, closes, ranges
+
+    def _store(self, ticker: str, dates: np.ndarray, closes: np.ndarray, ranges: np.ndarray) -> None:
+        """Writes the columns of the ticker, every file is replaced at once and the ranges are written last."""
+        os.makedirs(os.path.dirname(self._path(ticker, 'dates')), exist_ok=True)
+        for column, values in [('dates', dates), ('close', closes), ('ranges', ranges)]:
+            path = self._path(ticker, column)
+            with open(path + '.tmp', 'wb') as file:
+                np.save(file, values)
+            os.replace(path + '.tmp', path)
+
+    def missing_ranges(self, ticker: str, start: str, end: str) -> list[tuple[np.datetime64, np.datetime64]]:
+        """Parts of [start, end) that were never fetched for the ticker."""
+        start, end = np.datetime64(start, 'D'), np.datetime64(end, 'D')
+        missing = []
+        for fetched_start, fetched_end in self._load(ticker)[2]:
+            if fetched_end <= start or fetched_start >= end:
+                continue
+            if fetched_start > start:
+                missing.append((start, fetched_start))
+            start = max(start, fetched_end)
+        if start < end:
+            missing.append((start, end))
+        return missing
+
+    def closes(self, ticker: str, start: str, end: str) -> pd.Series:
+        """Daily closing prices of the ticker on [start, end), fetching the missing ranges from the source first.
+
+        Args:
+            ticker (str): ticker of the asset
+            start (str): starting date in format YYYY-MM-DD
+            end (str): ending date in format YYYY-MM-DD, excluded
+
+        Returns:
+            pd.Series: closing prices indexed by date
+        """
+        missing = self.missing_ranges(ticker, start, end)
+        if missing:
+            dates, closes, ranges = self._load(ticker, mmap_mode=None)
+            new_dates, new_closes = [dates], [closes]
+            today = np.datetime64('today', 'D')
+            for missing_start, missing_end in missing:
+                close = self.source.fetch(ticker, str(missing_start), str(missing_end)).dropna()
+                index = pd.DatetimeIndex(close.index)
+                if index.tz is not None:
+                    index = index.tz_localize(None)
+                fetched_dates = index.values.astype('datetime64[D]')
+                new_dates.append(fetched_dates)
+                new_closes.append(close.to_numpy(dtype=float))
+                # prices of today and later may still come, so those days count once the source returned some of them
+                fetched_end = missing_end if len(fetched_dates) and fetched_dates.max() >= today else min(missing_end, today)
+                if missing_start < fetched_end:
+                    ranges = np.concatenate([ranges, [[missing_start, fetched_end]]])
+            # the last value of a date wins, so refetched days are updated
+            all_dates = np.concatenate(new_dates)
+            unique_dates, last = np.unique(all_dates[::-1], return_index=True)
+            self._store(ticker, unique_dates, np.concatenate(new_closes)[::-1][last], _merge_ranges(ranges))
+
+        dates, closes, _ = self._load(ticker)
+        low, high = np.searchsorted(dates, [np.datetime64(start, 'D'), np.datetime64(end, 'D')])
+        return pd.Series(np.array(closes[low:high]), index=pd.DatetimeIndex(dates[low:high]), name=ticker)
+
+
+def _merge_ranges(ranges: np.ndarray) -> np.ndarray:
+    """Sorted, disjoint union of [start, end) ranges."""
+    merged = []
+    for start, end in sorted(map(tuple, ranges)):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return np.array(merged, dtype='datetime64[D]').reshape(-1, 2)
@@ -1,3 +1,6 @@
+from typing import Union
+
+import numpy as np
 import pandas as pd
 from cost_function import compute_cost_function
 from model_params import (
@@ -14,6 +17,7 @@ from model_params import (
     K,
     N,
 )
+from portfolio_model import PortfolioModel
 from qibo.models import Circuit
 from qibo.result import CircuitResult
 from utils import string_to_int_list
@@ -30,12 +34,12 @@ def get_max_prob(result: CircuitResult, nshots: int = NSHOTS) -> float:
     probs = [freq/nshots for freq in number_of_times]
     return max(probs)
 
-def get_optimal_binary_portfolios_prob_and_energy(ansatz: Circuit, dataset: pd.DataFrame, nshots: int = NSHOTS, tolerance: int = TOLERANCE) -> dict:
+def get_optimal_binary_portfolios_prob_and_energy(ansatz: Circuit, dataset: Union[pd.DataFrame, PortfolioModel], nshots: int = NSHOTS, tolerance: int = TOLERANCE) -> dict:
     """Returns the portfolios that turned out to have a certain probability. The threshold is defined as `1-docstring_probability < TOLERANCE`. It is suggested to call get_max_prob() and compute_cost_function().
 
     Args:
         ansatz (Circuit): _description_
-        dataset (pd.DataFrame): _description_
+        dataset (pd.DataFrame | PortfolioModel): daily log returns, or a model whose energies are computed in one batch
         nshots (int, optional): _description_. Defaults to NSHOTS.
         tolerance (int, optional): _description_. Defaults to TOLERANCE.
 
@@ -43,10 +47,15 @@ def get_optimal_binary_portfolios_prob_and_energy(ansatz: Circuit, dataset: pd.D
         dict: _description_
     """
     result = ansatz(nshots=nshots)
+    max_prob = get_max_prob(result, nshots)
+    frequencies = {bit_string: stat_freq for bit_string, stat_freq in result.frequencies().items() if (max_prob - stat_freq/nshots) < tolerance}
+    if isinstance(dataset, PortfolioModel):
+        energies = dataset.energy(np.array([string_to_int_list(bit_string) for bit_string in frequencies], dtype=np.uint8).reshape(len(frequencies), dataset.num_qubits))
+    else:
+        energies = [compute_cost_function(dataset, string_to_int_list(bit_string)) for bit_string in frequencies]
     optimal_portfolios = {}
-    for bit_string, stat_freq in result.frequencies().items():
-        if (get_max_prob(result) - stat_freq/nshots) < tolerance:
-            optimal_portfolios[bit_string] = {'stat_freq': stat_freq/nshots, 'energy': compute_cost_function(dataset, string_to_int_list(bit_string))}
+    for (bit_string, stat_freq), energy in zip(frequencies.items(), energies):
+        optimal_portfolios[bit_string] = {'stat_freq': stat_freq/nshots, 'energy': float(energy)}
     return optimal_portfolios
 
 def get_binary_portfolio(assets: list, ordered_bitstring, num_qubit_per_asset = K) -> dict:
@@ -92,18 +101,21 @@ def get_decimal_portfolio(binary_portfolio: dict) -> dict:
         portfolio[asset] = get_asset_weight_decimal(w)
     return portfolio
         
-def get_portfolio_metrics(portfolio: dict, dataset: pd.DataFrame, r: float = RISK_FREE_RATE) -> dict:
+def get_portfolio_metrics(portfolio: dict, dataset: Union[pd.DataFrame, PortfolioModel], r: float = RISK_FREE_RATE) -> dict:
     """Calculates the anualized return, volatilty and Sharp Ratio. Assume log returns are normally distributed.
 
     Args:
         portfolio (dict): decimal portfolio
-        dataset (pd.DataFrame): _description_
+        dataset (pd.DataFrame | PortfolioModel): daily log returns, or a model with their statistics
         r (float, optional): _description_. Defaults to RISK_FREE_RATE.
 
     Returns:
         _type_: _description_
     """
-    import numpy as np
+    if isinstance(dataset, PortfolioModel):
+        metrics = dataset.portfolio_metrics(portfolio)
+        metrics['Sharpe Ratio'] = (metrics['Returns'] - r) / metrics['Volatility']
+        return metrics
     normalized_weights = list(portfolio.values()) / np.sum(list(portfolio.values()))
 
 
@@ -0,0 +1,57 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from qibo.optimizers import optimize
+
+from backtest import RollingStatistics, backtest
+from model_params import NUM_ASSETS
+
+
+def synthetic_returns(num_days: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.normal(0.0005, 0.01, (num_days, NUM_ASSETS)), index=pd.bdate_range('2020-01-01', periods=num_days))
+
+
+class TestBacktest(unittest.TestCase):
+    def test_rolling_statistics(self):
+        dataset = synthetic_returns(2000)
+        returns = dataset.values
+        window = 60
+        statistics = RollingStatistics(returns[:window])
+        for day in range(window, len(returns)):
+            statistics.slide(returns[day], returns[day - window])
+            if day % 500 == 0 or day == len(returns) - 1:
+                expected = dataset.iloc[day + 1 - window:day + 1]
+                self.assertEqual(window, statistics.num_days)
+                np.testing.assert_allclose(expected.mean().values, statistics.mean, rtol=1e-9, atol=1e-15)
+                np.testing.assert_allclose(expected.cov().values, statistics.cov, rtol=1e-9, atol=1e-15)
+
+    def test_backtest(self):
+        dataset = synthetic_returns(70)
+        parameters = [] # initial and optimal parameters of every optimization
+        def recording_optimize(loss, initial_parameters, *args, **kwargs):
+            result = optimize(loss, initial_parameters, *args, **kwargs)
+            parameters.append((np.copy(initial_parameters), np.copy(result[1])))
+            return result
+
+        with mock.patch('backtest.optimize', side_effect=recording_optimize):
+            windows = list(backtest(dataset, 40, 10, exact=True, seed=0, options={'maxiter': 1}))
+
+        self.assertEqual(4, len(windows))
+        keys = ['Start', 'End', 'Energy', 'Evaluations', 'Portfolio', 'Returns', 'Volatility', 'Sharpe Ratio', 'Next Return']
+        for index, window in enumerate(windows):
+            self.assertEqual(keys, list(window))
+            self.assertEqual(dataset.index[10 * index], window['Start'])
+            self.assertEqual(dataset.index[10 * index + 39], window['End'])
+            self.assertGreater(window['Evaluations'], 0)
+            self.assertEqual(NUM_ASSETS, len(window['Portfolio']))
+            if index < len(windows) - 1 and np.isfinite(window['Returns']):
+                self.assertTrue(np.isfinite(window['Next Return']))
+        self.assertTrue(np.isnan(windows[-1]['Next Return']))
+
+        # every window starts from the optimal parameters of the previous one
+        self.assertEqual(len(windows), len(parameters))
+        for (_, optimal), (initial, _) in zip(parameters, parameters[1:]):
+            np.testing.assert_allclose(optimal, initial)
@@ -0,0 +1,33 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from brute_force import PREFIXES_PER_BLOCK, brute_force
+from portfolio_model import PortfolioModel, index_bits
+
+
+class TestBruteForce(unittest.TestCase):
+    def assert_top_k(self, model: PortfolioModel, top_k: int, **kwargs):
+        energies = model.energy(index_bits(np.arange(2 ** model.num_qubits), model.num_qubits))
+        portfolios = brute_force(model, top_k, **kwargs)
+        self.assertEqual(min(top_k, len(energies)), len(portfolios))
+        np.testing.assert_allclose(np.sort(energies)[:top_k], [energy for _, energy in portfolios])
+        for bit_string, energy in portfolios:
+            self.assertEqual(model.num_qubits, len(bit_string))
+            self.assertAlmostEqual(energies[int(bit_string, 2)], energy)
+
+    def test_single_block(self):
+        rng = np.random.default_rng(0)
+        model = PortfolioModel(pd.DataFrame(rng.normal(0.001, 0.02, (80, 5))))
+        self.assert_top_k(model, 5, workers=1)
+        self.assert_top_k(model, 40, workers=1)
+
+    def test_prefixes_and_blocks(self):
+        rng = np.random.default_rng(1)
+        # 12 qubits with 3 in a block: 512 prefixes, two tasks of the process pool
+        model = PortfolioModel(pd.DataFrame(rng.normal(0.001, 0.02, (80, 6))), k=2)
+        for workers in [1, 2]:
+            self.assert_top_k(model, 10, workers=workers, block_qubits=3)
+            # more portfolios than the bit strings evaluated together by block_top_k
+            self.assert_top_k(model, PREFIXES_PER_BLOCK * 2 ** 3 + 50, workers=workers, block_qubits=3)
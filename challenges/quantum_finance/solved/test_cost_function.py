@@ -0,0 +1,78 @@
+import itertools
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from ansatz import build_hardware_efficient_ansatz
+from cost_function import A, compute_cost_function, compute_cost_function_batch, compute_exact_energy, compute_fused_energy, compute_total_energy, tilde_sigma
+from model_params import NSHOTS, NUM_ASSETS, N
+from portfolio_model import PortfolioModel, encoding_matrix, tilde_sigma_matrix
+
+
+def synthetic_dataset(num_days: int = 60, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.normal(0.0005, 0.01, (num_days, NUM_ASSETS)), columns=[f'asset{i}' for i in range(NUM_ASSETS)])
+
+
+class MeasuredCircuit:
+    """Ansatz whose measurements always give the same frequencies."""
+
+    def __init__(self, frequencies: dict):
+        self._frequencies = frequencies
+
+    def set_parameters(self, parameters):
+        pass
+
+    def __call__(self, nshots):
+        return self
+
+    def frequencies(self):
+        return self._frequencies
+
+
+class TestCostFunction(unittest.TestCase):
+    def setUp(self):
+        self.dataset = synthetic_dataset()
+        self.bit_strings = np.array(list(itertools.product([0, 1], repeat=N)), dtype=np.uint8)
+
+    def test_statistics_matrices(self):
+        covariance = self.dataset.cov().values
+        expected = [[tilde_sigma(i, j, self.dataset) for j in range(NUM_ASSETS)] for i in range(NUM_ASSETS)]
+        np.testing.assert_allclose(expected, tilde_sigma_matrix(covariance))
+
+        encoding = encoding_matrix(NUM_ASSETS)
+        for bit_string in self.bit_strings:
+            values = encoding.sum(axis=0) - bit_string @ encoding
+            np.testing.assert_allclose([A(i, bit_string.tolist()) for i in range(NUM_ASSETS)], values)
+
+    def test_batch_matches_scalar(self):
+        expected = [compute_cost_function(self.dataset, bit_string.tolist()) for bit_string in self.bit_strings]
+        np.testing.assert_allclose(expected, compute_cost_function_batch(self.dataset, self.bit_strings))
+        np.testing.assert_allclose(expected, PortfolioModel(self.dataset).energy(self.bit_strings))
+        self.assertAlmostEqual(expected[3], PortfolioModel(self.dataset).energy(self.bit_strings[3]))
+
+    def test_exact_energy(self):
+        model = PortfolioModel(self.dataset)
+        circuit = build_hardware_efficient_ansatz(N, 1)
+        parameters = np.random.default_rng(1).uniform(0, 2 * np.pi, circuit.trainable_gates.nparams)
+        energy = compute_exact_energy(parameters, circuit, model)
+
+        circuit.set_parameters(parameters)
+        state = np.asarray(circuit().state())
+        expected = sum(abs(amplitude) ** 2 * compute_cost_function(self.dataset, [int(bit) for bit in format(index, f'0{N}b')]) for index, amplitude in enumerate(state))
+        self.assertAlmostEqual(expected, energy)
+
+    def test_fused_energy(self):
+        frequencies = {'00000': 40, '10110': 25, '01101': 20, '11111': 15}
+        model = PortfolioModel(self.dataset)
+        expected = compute_total_energy([], MeasuredCircuit(frequencies), self.dataset, NSHOTS)
+        self.assertAlmostEqual(expected, compute_fused_energy([], MeasuredCircuit(frequencies), model, NSHOTS))
+
+        total, terms = model.shot_energy(frequencies, NSHOTS)
+        self.assertAlmostEqual(expected, total)
+        bit_strings = np.array([[int(bit) for bit in bit_string] for bit_string in frequencies], dtype=np.uint8)
+        weights = np.array(list(frequencies.values())) / NSHOTS
+        self.assertAlmostEqual(weights @ model.return_energy(bit_strings), terms['Return'])
+        self.assertAlmostEqual(weights @ model.risk_energy(bit_strings), terms['Risk'])
+        self.assertAlmostEqual(weights @ model.normalization_energy(bit_strings), terms['Normalization'])
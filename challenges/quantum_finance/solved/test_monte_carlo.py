@@ -0,0 +1,51 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from monte_carlo import batch_portfolio_metrics, monte_carlo, pareto_front
+from portfolio_model import PortfolioModel
+from results_parsing import get_portfolio_metrics
+
+
+class TestMonteCarlo(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.dataset = pd.DataFrame(rng.normal(0.0005, 0.01, (120, 4)), columns=['a', 'b', 'c', 'd'])
+        self.model = PortfolioModel(self.dataset)
+
+    def test_batch_portfolio_metrics(self):
+        weights = np.random.default_rng(1).random((6, 4))
+        returns, volatilities, sharpe = batch_portfolio_metrics(self.model, weights)
+        for row in range(len(weights)):
+            metrics = get_portfolio_metrics(dict(zip(self.dataset.columns, weights[row])), self.dataset)
+            self.assertAlmostEqual(metrics['Returns'], returns[row])
+            self.assertAlmostEqual(metrics['Volatility'], volatilities[row])
+            self.assertAlmostEqual(metrics['Sharpe Ratio'], sharpe[row])
+
+    def test_frontier_over_chunks(self):
+        result = monte_carlo(self.model, 5000, chunk_size=700, seed=2)
+
+        # the chunks draw the same weights as a single draw of all the portfolios
+        weights = np.random.default_rng(2).random((5000, 4))
+        weights /= weights.sum(axis=1, keepdims=True)
+        returns, volatilities, sharpe = batch_portfolio_metrics(self.model, weights)
+        front = pareto_front(returns, volatilities)
+
+        frontier = result['Frontier']
+        np.testing.assert_allclose(returns[front], frontier['Returns'])
+        np.testing.assert_allclose(volatilities[front], frontier['Volatility'])
+        np.testing.assert_allclose(weights[front], frontier[self.model.assets])
+        self.assertTrue(np.all(np.diff(frontier['Returns']) > 0))
+        self.assertAlmostEqual(sharpe.max(), result['Max Sharpe Ratio']['Sharpe Ratio'])
+        np.testing.assert_allclose(weights[np.argmax(sharpe)], result['Max Sharpe Ratio'][self.model.assets])
+
+    def test_no_portfolios(self):
+        for num_portfolios in [0, -1]:
+            with self.assertRaises(ValueError):
+                monte_carlo(self.model, num_portfolios)
+
+    def test_pareto_front(self):
+        returns = np.array([0.1, 0.3, 0.2, 0.3, 0.05])
+        volatilities = np.array([0.1, 0.2, 0.3, 0.25, 0.05])
+        self.assertEqual([4, 0, 1], pareto_front(returns, volatilities).tolist())
@@ -0,0 +1,102 @@
+import itertools
+import unittest
+
+import numpy as np
+
+from cost_function import normalization_cost_function, return_cost_function, risk_cost_function
+from model_params import N
+from portfolio_model import PortfolioModel, TermCache, index_bits
+from results_parsing import get_binary_portfolio, get_decimal_portfolio, get_optimal_binary_portfolios_prob_and_energy, get_portfolio_metrics
+from test_cost_function import MeasuredCircuit, synthetic_dataset
+
+
+class TestPortfolioModel(unittest.TestCase):
+    def setUp(self):
+        self.dataset = synthetic_dataset()
+        self.model = PortfolioModel(self.dataset)
+        self.bit_strings = np.array(list(itertools.product([0, 1], repeat=N)), dtype=np.uint8)
+
+    def test_term_energies(self):
+        bit_strings = [bit_string.tolist() for bit_string in self.bit_strings]
+        np.testing.assert_allclose([return_cost_function(self.dataset, bit_string) for bit_string in bit_strings], self.model.return_energy(self.bit_strings))
+        np.testing.assert_allclose([risk_cost_function(self.dataset, bit_string) for bit_string in bit_strings], self.model.risk_energy(self.bit_strings))
+        np.testing.assert_allclose([normalization_cost_function(bit_string) for bit_string in bit_strings], self.model.normalization_energy(self.bit_strings))
+        self.assertAlmostEqual(risk_cost_function(self.dataset, bit_strings[5]), self.model.risk_energy(self.bit_strings[5]))
+
+    def test_decimal_weights(self):
+        for k in [1, 2]:
+            model = PortfolioModel(self.dataset, k=k)
+            for bit_string in itertools.product([0, 1], repeat=model.num_qubits):
+                portfolio = get_decimal_portfolio(get_binary_portfolio(model.assets, ''.join(map(str, bit_string)), k))
+                np.testing.assert_allclose(list(portfolio.values()), model.decimal_weights(bit_string))
+
+    def test_portfolio_metrics(self):
+        portfolio = dict(zip(self.dataset.columns, [0.25, 0.5, 0.0, 0.25, 0.75]))
+        expected = get_portfolio_metrics(portfolio, self.dataset)
+        for weights in [portfolio, list(portfolio.values())]:
+            metrics = self.model.portfolio_metrics(weights)
+            for name in ['Returns', 'Volatility', 'Sharpe Ratio']:
+                self.assertAlmostEqual(expected[name], metrics[name])
+            np.testing.assert_allclose(expected['Normalized Weights'], metrics['Normalized Weights'])
+
+    def test_results_parsing_with_model(self):
+        portfolio = dict(zip(self.dataset.columns, [0.25, 0.5, 0.0, 0.25, 0.75]))
+        expected = get_portfolio_metrics(portfolio, self.dataset, 0.01)
+        metrics = get_portfolio_metrics(portfolio, self.model, 0.01)
+        for name in ['Returns', 'Volatility', 'Sharpe Ratio']:
+            self.assertAlmostEqual(expected[name], metrics[name])
+
+        circuit = MeasuredCircuit({'00000': 400, '10110': 399, '01101': 100, '11111': 101})
+        expected = get_optimal_binary_portfolios_prob_and_energy(circuit, self.dataset, nshots=1000, tolerance=0.01)
+        optimal = get_optimal_binary_portfolios_prob_and_energy(circuit, self.model, nshots=1000, tolerance=0.01)
+        self.assertEqual(['00000', '10110'], list(optimal))
+        self.assertEqual(list(expected), list(optimal))
+        for bit_string, data in expected.items():
+            self.assertAlmostEqual(data['stat_freq'], optimal[bit_string]['stat_freq'])
+            self.assertAlmostEqual(data['energy'], optimal[bit_string]['energy'])
+
+    def test_energy_diagonal_is_cached(self):
+        diagonal = self.model.energy_diagonal()
+        self.assertIs(diagonal, self.model.energy_diagonal())
+        np.testing.assert_allclose(self.model.energy(index_bits(np.arange(2 ** N), N)), diagonal)
+
+        other = synthetic_dataset(seed=1)
+        self.model.set_statistics(other.values.mean(axis=0), other.cov().values, len(other))
+        rebuilt = self.model.energy_diagonal()
+        self.assertIsNot(diagonal, rebuilt)
+        np.testing.assert_allclose(PortfolioModel(other).energy_diagonal(), rebuilt)
+
+    def test_term_cache(self):
+        batches = []
+        def compute(indices):
+            batches.append(indices.tolist())
+            return np.repeat(indices[:, None], 3, axis=1).astype(float)
+
+        cache = TermCache(maxsize=3)
+        np.testing.assert_allclose([4, 2], cache.lookup([4, 2], compute)[:, 0])
+        self.assertEqual([[4, 2]], batches)
+        cache.lookup([2, 7], compute)
+        self.assertEqual([7], batches[-1])
+        self.assertEqual(3, len(cache))
+
+        # 4 is the least recently used, so it is evicted first
+        cache.lookup([9], compute)
+        self.assertEqual(3, len(cache))
+        cache.lookup([2, 7, 9], compute)
+        self.assertEqual([9], batches[-1])
+        cache.lookup([4], compute)
+        self.assertEqual([4], batches[-1])
+        self.assertEqual((4, 5), (cache.hits, cache.misses))
+
+    def test_shot_energy_after_new_statistics(self):
+        frequencies = {'00000': 40, '10110': 25, '01101': 20, '11111': 15}
+        model = PortfolioModel(synthetic_dataset())
+        model.shot_energy(frequencies)
+
+        other = synthetic_dataset(seed=1)
+        model.set_statistics(other.values.mean(axis=0), other.cov().values, len(other))
+        total, terms = model.shot_energy(frequencies)
+        expected_total, expected_terms = PortfolioModel(other).shot_energy(frequencies)
+        self.assertAlmostEqual(expected_total, total)
+        for name, value in expected_terms.items():
+            self.assertAlmostEqual(value, terms[name])
@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from price_data import FileSource, PriceCache, _merge_ranges
+from utils import fetch_log_returns
+
+TICKERS = ['^GSPC', '^FTSE', '^N225', '^GDAXI', '^IBEX']
+
+
+class CountingSource(FileSource):
+    """FileSource recording the ranges it is asked for."""
+
+    def __init__(self, directory: str):
+        super().__init__(directory)
+        self.calls = []
+
+    def fetch(self, ticker: str, start: str, end: str) -> pd.Series:
+        self.calls.append((ticker, start, end))
+        return super().fetch(ticker, start, end)
+
+
+def write_prices(directory: str, ticker: str, start: str, end: str, seed: int = 0) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start, end)
+    dates = dates[rng.random(len(dates)) > 0.05] # holidays
+    close = pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates)))), index=dates)
+    pd.DataFrame({'Date': dates.strftime('%Y-%m-%d'), 'Close': close.values}).to_csv(os.path.join(directory, f'{ticker}.csv'), index=False)
+    return close
+
+
+class TestPriceData(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.files = os.path.join(self.directory.name, 'files')
+        os.makedirs(self.files)
+        self.prices = {ticker: write_prices(self.files, ticker, '1995-01-01', '1996-12-31', seed) for seed, ticker in enumerate(TICKERS)}
+        self.source = CountingSource(self.files)
+        self.cache = PriceCache(os.path.join(self.directory.name, 'cache'), self.source)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_rerun_served_from_disk(self):
+        first = self.cache.closes('^GSPC', '1995-01-01', '1995-07-01')
+        second = PriceCache(self.cache.directory, self.source).closes('^GSPC', '1995-01-01', '1995-07-01')
+        self.assertEqual([('^GSPC', '1995-01-01', '1995-07-01')], self.source.calls)
+        expected = self.prices['^GSPC']
+        expected = expected[(expected.index >= '1995-01-01') & (expected.index < '1995-07-01')]
+        np.testing.assert_allclose(expected.values, first.values)
+        self.assertTrue(expected.index.equals(second.index))
+        np.testing.assert_allclose(first.values, second.values)
+
+    def test_only_missing_ranges_are_fetched(self):
+        self.cache.closes('^GSPC', '1995-03-01', '1995-06-01')
+        missing = self.cache.missing_ranges('^GSPC', '1995-01-01', '1995-09-01')
+        self.assertEqual([('1995-01-01', '1995-03-01'), ('1995-06-01', '1995-09-01')], [(str(start), str(end)) for start, end in missing])
+
+        closes = self.cache.closes('^GSPC', '1995-01-01', '1995-09-01')
+        self.assertEqual([('^GSPC', '1995-01-01', '1995-03-01'), ('^GSPC', '1995-06-01', '1995-09-01')], self.source.calls[1:])
+        self.assertEqual([], self.cache.missing_ranges('^GSPC', '1995-01-01', '1995-09-01'))
+        expected = self.prices['^GSPC']
+        expected = expected[(expected.index >= '1995-01-01') & (expected.index < '1995-09-01')]
+        self.assertTrue(expected.index.equals(closes.index))
+        np.testing.assert_allclose(expected.values, closes.values)
+
+    def test_ranges_ending_in_the_future(self):
+        today = pd.Timestamp(np.datetime64('today', 'D'))
+        start = str((today - pd.Timedelta(days=60)).date())
+        end = str((today + pd.Timedelta(days=30)).date())
+        write_prices(self.files, 'PUBLISHED', start, str((today + pd.Timedelta(days=10)).date()))
+        write_prices(self.files, 'PENDING', start, str((today - pd.Timedelta(days=5)).date()))
+
+        # prices after today were returned, so the whole range counts as fetched
+        self.cache.closes('PUBLISHED', start, end)
+        self.cache.closes('PUBLISHED', start, end)
+        self.assertEqual(1, len(self.source.calls))
+
+        # no price of today or later yet: only those days are asked again
+        self.cache.closes('PENDING', start, end)
+        self.cache.closes('PENDING', start, end)
+        self.assertEqual(('PENDING', str(today.date()), end), self.source.calls[-1])
+
+    def test_merge_ranges(self):
+        ranges = np.array([['1995-05-01', '1995-06-01'], ['1995-01-01', '1995-02-01'], ['1995-02-01', '1995-03-01'], ['1995-05-15', '1995-07-01']], dtype='datetime64[D]')
+        merged = _merge_ranges(ranges)
+        self.assertEqual([['1995-01-01', '1995-03-01'], ['1995-05-01', '1995-07-01']], merged.astype(str).tolist())
+        self.assertEqual((0, 2), _merge_ranges(np.empty((0, 2), dtype='datetime64[D]')).shape)
+
+    def test_fetch_log_returns(self):
+        write_prices(self.files, 'OTHER', '1995-01-01', '1996-12-31', seed=9)
+        cache_dir = os.path.join(self.directory.name, 'cache')
+        log_returns = fetch_log_returns('1995-01-01', '1995-12-31', source=self.source, cache_dir=cache_dir)
+        self.assertEqual(['sp500', 'dax', 'ftse', 'nikkei', 'ibex'], list(log_returns.columns))
+        self.assertFalse(log_returns.isna().any().any())
+
+        calls = len(self.source.calls)
+        rerun = fetch_log_returns('1995-01-01', '1995-12-31', source=self.source, cache_dir=cache_dir)
+        self.assertEqual(calls, len(self.source.calls))
+        self.assertTrue(log_returns.equals(rerun))
+
+        other = fetch_log_returns('1995-01-01', '1995-12-31', tickers='OTHER ^IBEX ^GSPC', source=self.source, cache_dir=cache_dir)
+        self.assertEqual(['sp500', 'ibex', 'OTHER'], list(other.columns))
@@ -1,6 +1,5 @@
 import numpy as np
 import pandas as pd
-import yfinance
 from model_params import (
     LAMBDA_1,
     LAMBDA_2,
@@ -15,41 +14,38 @@ from model_params import (
     K,
     N,
 )
+from price_data import PRICE_CACHE_DIR, PriceCache, PriceSource
 
+TICKER_NAMES = {'^GSPC': 'sp500', '^GDAXI': 'dax', '^FTSE': 'ftse', '^N225': 'nikkei', '^IBEX': 'ibex'} # column of every stock index, in this order
 
-def fetch_log_returns(start: str,end: str, tickers: str = '^GSPC ^FTSE ^N225 ^GDAXI ^IBEX') -> pd.DataFrame:
+
+def fetch_log_returns(start: str,end: str, tickers: str = '^GSPC ^FTSE ^N225 ^GDAXI ^IBEX', source: PriceSource = None, cache_dir: str = PRICE_CACHE_DIR) -> pd.DataFrame:
     """Downloads daily price data from Yahoo finance for five different stock indeces. Picks the closing daily price, keeps only bussiness days, fills the blank days with the previous value, computes the log returns and drops NaNs, if any. 
+    The prices go through a local cache (see price_data.PriceCache), so a rerun is served from disk and only the dates never fetched are downloaded. Pass a price_data.FileSource to work offline.
 
     Args:
         start (str): starting data in format YYYY-MM-DD
         end (str): ending data in format YYYY-MM-DD
+        tickers (str, optional): tickers separated by spaces. Defaults to the five stock indeces.
+        source (PriceSource, optional): where the prices missing from the cache come from. Defaults to Yahoo finance.
+        cache_dir (str, optional): directory of the cache. Defaults to PRICE_CACHE_DIR.
 
     Returns:
         pd.DataFrame: each column must correspond to the log daily returns of each asset. 
     """
-    raw_data = yfinance.download(tickers = tickers, 
-                                start=start, end=end, interval = '1d', group_by = 'ticker',
-                                auto_adjust = True)
-    df_comp = pd.DataFrame(raw_data.copy())
+    cache = PriceCache(cache_dir, source)
+    closes = {TICKER_NAMES.get(ticker, ticker): cache.closes(ticker, start, end) for ticker in tickers.split()}
+    # the stock indeces first, in the order of TICKER_NAMES, then the other tickers
+    columns = [name for name in TICKER_NAMES.values() if name in closes] + [name for name in closes if name not in TICKER_NAMES.values()]
+    df_comp = pd.DataFrame(closes)[columns]
     # pick data from the first day to the last one 
     df_comp = df_comp.iloc[1:]
 
-    #add columns
-    df_comp['sp500'] = df_comp['^GSPC'].Close[:]
-    df_comp['dax'] = df_comp['^GDAXI'].Close[:]
-    df_comp['ftse'] = df_comp['^FTSE'].Close[:]
-    df_comp['nikkei'] = df_comp['^N225'].Close[:]
-    df_comp['ibex'] = df_comp['^IBEX'].Close[:]
-
-    #remove columns
-    del df_comp['^GSPC'], df_comp['^GDAXI'], df_comp['^FTSE'], df_comp['^N225'], df_comp['^IBEX']
-
     price_data_frame = df_comp.asfreq('b') # only keeping bussiness days as the stock market is closed on weekends
     price_data_frame = df_comp.ffill() #forward fill
     price_data_frame = price_data_frame[1:]
     
     log_return = np.log(price_data_frame/price_data_frame.shift(1))
-    log_return.columns = [c[0] for c in log_return.columns]
     return log_return.dropna()
 
 def string_to_int_list(s: str) -> list[int]:
@@ -0,0 +1,315 @@
+"""Benchmark suite of the transpiler passes.
+
+Runs seeded random and structured circuits of growing size on several coupling maps, records the wall time of every
+pass, the SWAPs inserted and the depth of the result, and compares them with a JSON baseline:
+
+    python Benchmark.py --baseline baseline.json --update   # record the baseline
+    python Benchmark.py --baseline baseline.json            # compare with it, exit code 1 on regressions
+"""
+import argparse
+import json
+import math
+import random
+import sys
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from qibo import gates, models
+
+from CircuitTranspiler import CircuitTranspiler
+from Topology import grid_architecture, heavy_hex_architecture, line_architecture, star_architecture
+
+# Passes recorded by CircuitTranspiler.transpile, in the order they run
+PASSES = ["dag", "generate_timesteps", "initial_mapping", "refine_mapping", "routing", "optimize_circuit"]
+
+# (qubits, gates) of the default suite and of the quick one
+SIZES = [(5, 100), (16, 500), (36, 2000)]
+QUICK_SIZES = [(5, 50), (9, 200)]
+
+# A pass time is a regression when it is this fraction slower than the baseline, and slower by at least MIN_TIME_DELTA
+TIME_TOLERANCE = 0.25
+MIN_TIME_DELTA = 0.005
+
+
+def random_circuit(nqubits: int, ngates: int, seed: int) -> models.Circuit:
+    """Random mix of H, X, RZ, CNOT and CZ gates."""
+    rng = random.Random(seed)
+    circuit = models.Circuit(nqubits)
+    for _ in range(ngates):
+        kind = rng.random()
+        if kind < 0.4 or nqubits < 2:
+            circuit.add(rng.choice([gates.H, gates.X])(rng.randrange(nqubits)))
+        elif kind < 0.5:
+            circuit.add(gates.RZ(rng.randrange(nqubits), rng.uniform(0, 2 * math.pi)))
+        else:
+            control, target = rng.sample(range(nqubits), 2)
+            circuit.add(rng.choice([gates.CNOT, gates.CZ])(control, target))
+    return circuit
+
+
+def random_cnot_circuit(nqubits: int, ngates: int, seed: int) -> models.Circuit:
+    """CNOTs between random pairs of qubits."""
+    rng = random.Random(seed)
+    circuit = models.Circuit(nqubits)
+    for _ in range(ngates):
+        control, target = rng.sample(range(nqubits), 2)
+        circuit.add(gates.CNOT(control, target))
+    return circuit
+
+
+def qft_circuit(nqubits: int, ngates: int, seed: int) -> models.Circuit:
+    """Repeated QFT blocks (H and controlled phases between every pair of qubits), cut at ngates gates. The seed
+    rotates the qubit on which every block starts."""
+    rng = random.Random(seed)
+    circuit = models.Circuit(nqubits)
+    added = 0
+    while added < ngates:
+        offset = rng.randrange(nqubits)
+        for step in range(nqubits):
+            qubit = (offset + step) % nqubits
+            block = [gates.H(qubit)]
+            for distance in range(1, nqubits - step):
+                block.append(gates.CU1((qubit + distance) % nqubits, qubit, math.pi / 2**distance))
+            for gate in block[: ngates - added]:
+                circuit.add(gate)
+            added += min(len(block), ngates - added)
+            if added >= ngates:
+                break
+    return circuit
+
+
+def hea_circuit(nqubits: int, ngates: int, seed: int) -> models.Circuit:
+    """Hardware-efficient ansatz: layers of RY and RZ rotations with random angles on every qubit followed by a CNOT
+    ladder, cut at ngates gates."""
+    rng = random.Random(seed)
+    circuit = models.Circuit(nqubits)
+    added = 0
+    while added < ngates:
+        layer = [gate(qubit, rng.uniform(0, 2 * math.pi)) for qubit in range(nqubits) for gate in (gates.RY, gates.RZ)]
+        layer.extend(gates.CNOT(qubit, qubit + 1) for qubit in range(nqubits - 1))
+        for gate in layer[: ngates - added]:
+            circuit.add(gate)
+        added += min(len(layer), ngates - added)
+    return circuit
+
+
+CIRCUITS: Dict[str, Callable[[int, int, int], models.Circuit]] = {
+    "random": random_circuit,
+    "qft": qft_circuit,
+    "hea": hea_circuit,
+    "cnot": random_cnot_circuit,
+}
+
+
+def _grid_for(nqubits: int) -> Dict[int, List[int]]:
+    rows = max(int(math.isqrt(nqubits)), 1)
+    return grid_architecture(rows, math.ceil(nqubits / rows))
+
+
+def _heavy_hex_for(nqubits: int) -> Dict[int, List[int]]:
+    size = 1
+    while True:
+        for rows, columns in ((size, size), (size, size + 1)):
+            architecture = heavy_hex_architecture(rows, columns)
+            if len(architecture) >= nqubits:
+                return architecture
+        size += 1
+
+
+# Smallest coupling map of each family with at least the given number of qubits
+ARCHITECTURES: Dict[str, Callable[[int], Dict[int, List[int]]]] = {
+    "star": star_architecture,
+    "line": line_architecture,
+    "grid": _grid_for,
+    "heavy_hex": _heavy_hex_for,
+}
+
+
+@dataclass
+class BenchmarkCase:
+    """One circuit on one coupling map.
+
+    Attributes:
+        circuit (str): circuit family, a key of CIRCUITS.
+        architecture (str): coupling map family, a key of ARCHITECTURES.
+        nqubits (int): number of qubits of the circuit.
+        ngates (int): number of gates of the circuit.
+        seed (int): seed of the circuit generator.
+    """
+
+    circuit: str
+    architecture: str
+    nqubits: int
+    ngates: int
+    seed: int = 0
+
+    @property
+    def key(self) -> str:
+        return f"{self.circuit}/{self.architecture}/q{self.nqubits}/g{self.ngates}/s{self.seed}"
+
+
+@dataclass
+class BenchmarkResult:
+    """Measurements of a case.
+
+    Attributes:
+        case (BenchmarkCase): the case.
+        times (Dict[str, float]): best wall time in seconds of each pass of PASSES over the repeats.
+        swaps (int): number of SWAP gates inserted by the routing.
+        depth (int): depth of the optimized circuit.
+        gates (int): number of gates of the optimized circuit.
+    """
+
+    case: BenchmarkCase
+    times: Dict[str, float] = field(default_factory=dict)
+    swaps: int = 0
+    depth: int = 0
+    gates: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "case": asdict(self.case),
+            "times": self.times,
+            "swaps": self.swaps,
+            "depth": self.depth,
+            "gates": self.gates,
+        }
+
+
+@dataclass
+class Regression:
+    """A metric of a case that got worse than in the baseline."""
+
+    case: str
+    metric: str
+    baseline: float
+    current: float
+
+    def __str__(self) -> str:
+        return f"{self.case}: {self.metric} {self.baseline:.4g} -> {self.current:.4g}"
+
+
+def default_cases(sizes: Sequence[Tuple[int, int]] = SIZES, seed: int = 0) -> List[BenchmarkCase]:
+    return [
+        BenchmarkCase(circuit, architecture, nqubits, ngates, seed)
+        for nqubits, ngates in sizes
+        for circuit in CIRCUITS
+        for architecture in ARCHITECTURES
+    ]
+
+
+def run_case(case: BenchmarkCase, repeats: int = 1, router: str = "sabre") -> BenchmarkResult:
+    """Transpiles the circuit of the case with CircuitTranspiler.transpile, timing each of its passes with a profiler.
+
+    Args:
+        case (BenchmarkCase): the case to run.
+        repeats (int, optional): number of runs, the best time of each pass is kept. Defaults to 1.
+        router (str, optional): routing engine of the transpiler. Defaults to "sabre".
+
+    Returns:
+        BenchmarkResult: times, SWAPs and depth of the case.
+    """
+    circuit = CIRCUITS[case.circuit](case.nqubits, case.ngates, case.seed)
+    transpiler = CircuitTranspiler(ARCHITECTURES[case.architecture](case.nqubits), router=router)
+    result = BenchmarkResult(case, {name: math.inf for name in PASSES})
+
+    for _ in range(max(repeats, 1)):
+        with transpiler.profile() as profiler:
+            transpiled = transpiler.transpile(circuit)
+        for name in PASSES:
+            record = profiler.passes.get(name)
+            result.times[name] = min(result.times[name], record.time if record is not None else 0.0)
+
+    result.swaps = transpiler.best_trial.swaps
+    result.depth = transpiler.best_trial.depth
+    result.gates = len(transpiled.queue)
+    return result
+
+
+def run_suite(
+    cases: Sequence[BenchmarkCase], repeats: int = 1, router: str = "sabre", verbose: bool = False
+) -> List[BenchmarkResult]:
+    results = []
+    for case in cases:
+        result = run_case(case, repeats, router)
+        if verbose:
+            total = sum(result.times.values())
+            print(f"{case.key:<40} {total:8.4f}s  swaps={result.swaps:<6} depth={result.depth}")
+        results.append(result)
+    return results
+
+
+def save_baseline(results: Sequence[BenchmarkResult], path: str) -> None:
+    with open(path, "w") as file:
+        json.dump({"cases": {result.case.key: result.to_dict() for result in results}}, file, indent=2)
+
+
+def load_baseline(path: str) -> Dict[str, dict]:
+    with open(path) as file:
+        return json.load(file)["cases"]
+
+
+def compare(
+    results: Sequence[BenchmarkResult],
+    baseline: Dict[str, dict],
+    time_tolerance: float = TIME_TOLERANCE,
+    min_time_delta: float = MIN_TIME_DELTA,
+) -> List[Regression]:
+    """Flags the metrics that got worse than in the baseline. SWAPs and depth are deterministic, so any increase is a
+    regression, while pass times are only flagged beyond the tolerance. Cases missing from the baseline are skipped.
+
+    Args:
+        results (Sequence[BenchmarkResult]): current measurements.
+        baseline (Dict[str, dict]): baseline measurements by case key, as loaded by load_baseline.
+        time_tolerance (float, optional): allowed relative slowdown of a pass. Defaults to TIME_TOLERANCE.
+        min_time_delta (float, optional): slowdowns below this many seconds are ignored. Defaults to MIN_TIME_DELTA.
+
+    Returns:
+        List[Regression]: the regressions found.
+    """
+    regressions = []
+    for result in results:
+        reference = baseline.get(result.case.key)
+        if reference is None:
+            continue
+        for metric in ("swaps", "depth"):
+            if getattr(result, metric) > reference[metric]:
+                regressions.append(Regression(result.case.key, metric, reference[metric], getattr(result, metric)))
+        for name, current in result.times.items():
+            previous = reference["times"].get(name)
+            if previous is None:
+                continue
+            if current > previous * (1 + time_tolerance) and current - previous > min_time_delta:
+                regressions.append(Regression(result.case.key, f"time.{name}", previous, current))
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark of the transpiler passes")
+    parser.add_argument("--baseline", help="JSON baseline to compare with, or to write with --update")
+    parser.add_argument("--update", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--quick", action="store_true", help="run the small sizes only")
+    parser.add_argument("--repeats", type=int, default=3, help="runs of every case, the best time is kept")
+    parser.add_argument("--router", default="sabre", help="routing engine, sabre or greedy")
+    parser.add_argument("--tolerance", type=float, default=TIME_TOLERANCE, help="allowed relative slowdown")
+    args = parser.parse_args(argv)
+
+    cases = default_cases(QUICK_SIZES if args.quick else SIZES)
+    results = run_suite(cases, args.repeats, args.router, verbose=True)
+
+    if args.baseline is None:
+        return 0
+    if args.update:
+        save_baseline(results, args.baseline)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    regressions = compare(results, load_baseline(args.baseline), args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    print(f"{len(regressions)} regressions in {len(results)} cases")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
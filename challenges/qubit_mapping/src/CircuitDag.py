@@ -0,0 +1,211 @@
+from typing import List, Optional
+
+import numpy as np
+from qibo import models
+
+from GateIR import CircuitIR, IRGate, NO_QUBIT
+from Optimization import gate_axis
+
+NO_GATE = -1
+
+# Largest group of commuting gates left unordered on a qubit by CommutationDag
+DEFAULT_MAX_GROUP = 4
+
+
+class CircuitDag:
+    """Dependency DAG of a gate sequence. Every gate depends on the previous gate acting on each of its qubits, so each
+    node has at most two predecessors and two successors, stored as (num_gates, 2) integer arrays.
+
+    The DAG is built in a single pass over the qubit columns of the IR, keeping the index of the last gate seen on
+    every qubit (the frontier), and both ASAP and ALAP layers are computed in O(gates).
+
+    Attributes:
+        ir (CircuitIR): the gates, in circuit order.
+        nqubits (int): number of qubits of the circuit.
+        qubit0 (np.ndarray): first qubit of each gate.
+        qubit1 (np.ndarray): second qubit of each gate, NO_QUBIT for single qubit gates.
+        predecessors (np.ndarray): (num_gates, 2) indices of the previous gate on qubit0 and qubit1, or NO_GATE.
+        successors (np.ndarray): (num_gates, 2) indices of the next gate on qubit0 and qubit1, or NO_GATE.
+    """
+
+    def __init__(self, ir: CircuitIR):
+        self.ir = ir
+        self.nqubits = ir.nqubits
+        self.qubit0 = ir.qubit0
+        self.qubit1 = ir.qubit1
+
+        num_gates = len(ir)
+        predecessors = [[NO_GATE, NO_GATE] for _ in range(num_gates)]
+        successors = [[NO_GATE, NO_GATE] for _ in range(num_gates)]
+        # Index of the last gate acting on each qubit, and the slot (0 or 1) that qubit takes in that gate
+        frontier = [NO_GATE] * self.nqubits
+        frontier_slot = [0] * self.nqubits
+
+        for index, qubits in enumerate(zip(self.qubit0.tolist(), self.qubit1.tolist())):
+            for slot, qubit in enumerate(qubits):
+                if qubit == NO_QUBIT:
+                    continue
+                previous = frontier[qubit]
+                if previous != NO_GATE:
+                    predecessors[index][slot] = previous
+                    successors[previous][frontier_slot[qubit]] = index
+                frontier[qubit] = index
+                frontier_slot[qubit] = slot
+
+        self.predecessors = np.array(predecessors, dtype=np.int32).reshape(num_gates, 2)
+        self.successors = np.array(successors, dtype=np.int32).reshape(num_gates, 2)
+
+    @classmethod
+    def from_circuit(cls, circuit: models.Circuit) -> "CircuitDag":
+        return cls(CircuitIR.from_circuit(circuit))
+
+    def __len__(self) -> int:
+        return len(self.ir)
+
+    def asap_layers(self) -> np.ndarray:
+        """Layer of every gate when each gate is scheduled as soon as all its predecessors have been executed.
+
+        Returns:
+            np.ndarray: layer index of each gate.
+        """
+        layer = [0] * len(self)
+        for index, previous in enumerate(self.predecessors.tolist()):
+            start = 0
+            for predecessor in previous:
+                if predecessor != NO_GATE and layer[predecessor] >= start:
+                    start = layer[predecessor] + 1
+            layer[index] = start
+        return np.array(layer, dtype=np.int32)
+
+    def alap_layers(self) -> np.ndarray:
+        """Layer of every gate when each gate is scheduled as late as possible without increasing the depth.
+
+        Returns:
+            np.ndarray: layer index of each gate.
+        """
+        last_layer = self.depth() - 1
+        layer = [last_layer] * len(self)
+        successors = self.successors.tolist()
+        for index in range(len(self) - 1, -1, -1):
+            end = last_layer
+            for successor in successors[index]:
+                if successor != NO_GATE and layer[successor] <= end:
+                    end = layer[successor] - 1
+            layer[index] = end
+        return np.array(layer, dtype=np.int32)
+
+    def depth(self) -> int:
+        if not len(self):
+            return 0
+        return int(self.asap_layers().max()) + 1
+
+    def layers(self, schedule: str = "asap") -> List[List[int]]:
+        """Groups the gate indices by layer, keeping the circuit order inside each layer.
+
+        Args:
+            schedule (str, optional): "asap" or "alap". Defaults to "asap".
+
+        Raises:
+            ValueError: If the schedule is not supported.
+
+        Returns:
+            List[List[int]]: gate indices of each layer.
+        """
+        if schedule == "asap":
+            layer = self.asap_layers()
+        elif schedule == "alap":
+            layer = self.alap_layers()
+        else:
+            raise ValueError(f"Schedule {schedule} not supported")
+
+        if len(layer) == 0:
+            return []
+        order = np.argsort(layer, kind="stable")
+        boundaries = np.flatnonzero(np.diff(layer[order])) + 1
+        return [chunk.tolist() for chunk in np.split(order, boundaries)]
+
+    def timesteps(self, schedule: str = "asap") -> List[List[IRGate]]:
+        """Same as layers, but returning a view of the gates with their name and qubits.
+
+        Args:
+            schedule (str, optional): "asap" or "alap". Defaults to "asap".
+
+        Returns:
+            List[List[IRGate]]: gates of each layer.
+        """
+        return [[self.ir.gate(index) for index in layer] for layer in self.layers(schedule)]
+
+    def reversed(self) -> "CircuitDag":
+        """DAG of the gates in reverse order, of the same kind."""
+        return CircuitDag(self.ir.take(np.arange(len(self) - 1, -1, -1)))
+
+    def topological_order(self) -> List[int]:
+        """Gate indices layer by layer, which is the order in which the router consumes the circuit."""
+        return [index for layer in self.layers() for index in layer]
+
+
+class CommutationDag(CircuitDag):
+    """Dependency DAG that leaves commuting gates unordered. On every qubit the gates are split into consecutive groups
+    acting on it along the same axis (diagonal, e.g. CNOT controls and Z rotations, or a function of X, e.g. CNOT
+    targets), which commute with each other, and a gate only depends on the gates of the previous group of each of its
+    qubits. CNOTs sharing a control or a target, or a Z rotation and the CNOTs it controls, can then be routed in any
+    order, so the front layer of the router holds every gate that could run now.
+
+    Gates have any number of predecessors and successors: the arrays are padded with NO_GATE to the largest count.
+    The layers of this DAG are the commutation-aware layers of the circuit.
+
+    Args:
+        ir (CircuitIR): the gates, in circuit order.
+        max_group (int, optional): largest number of gates of a group, the next gate on the qubit starts a new group.
+            Very large front layers, like the blocks of controlled phases of a QFT, dilute the SWAP scores of the
+            router. None leaves the groups unbounded. Defaults to DEFAULT_MAX_GROUP.
+    """
+
+    def __init__(self, ir: CircuitIR, max_group: Optional[int] = DEFAULT_MAX_GROUP):
+        self.ir = ir
+        self.nqubits = ir.nqubits
+        self.qubit0 = ir.qubit0
+        self.qubit1 = ir.qubit1
+        self.max_group = max_group
+
+        num_gates = len(ir)
+        predecessors: List[List[int]] = []
+        successors: List[List[int]] = [[] for _ in range(num_gates)]
+        # Axis of the last group of every qubit, its gates and the gates of the group before it
+        group_axis = [None] * self.nqubits
+        group: List[List[int]] = [[] for _ in range(self.nqubits)]
+        previous_group: List[List[int]] = [[] for _ in range(self.nqubits)]
+
+        rows = zip(ir.opcode.tolist(), self.qubit0.tolist(), self.qubit1.tolist())
+        for index, (opcode, qubit0, qubit1) in enumerate(rows):
+            qubits = (qubit0,) if qubit1 == NO_QUBIT else (qubit0, qubit1)
+            dependencies = set()
+            for qubit in qubits:
+                axis = gate_axis((opcode, qubits), qubit)
+                joins = axis is not None and axis == group_axis[qubit]
+                if joins and (max_group is None or len(group[qubit]) < max_group):
+                    dependencies.update(previous_group[qubit])
+                    group[qubit].append(index)
+                else:
+                    dependencies.update(group[qubit])
+                    previous_group[qubit] = group[qubit]
+                    group[qubit] = [index]
+                    group_axis[qubit] = axis
+            predecessors.append(sorted(dependencies))
+            for dependency in predecessors[-1]:
+                successors[dependency].append(index)
+
+        self.predecessors = _padded(predecessors)
+        self.successors = _padded(successors)
+
+    def reversed(self) -> "CommutationDag":
+        return CommutationDag(self.ir.take(np.arange(len(self) - 1, -1, -1)), self.max_group)
+
+
+def _padded(rows: List[List[int]]) -> np.ndarray:
+    """(len(rows), width) array of the rows padded with NO_GATE, at least two columns wide like CircuitDag."""
+    width = max([2] + [len(row) for row in rows])
+    array = np.full((len(rows), width), NO_GATE, dtype=np.int32)
+    for index, row in enumerate(rows):
+        array[index, : len(row)] = row
+    return array
@@ -1,68 +1,340 @@
-# We assume non-directed star topology and that the qubit 2 is the center of the star
-from typing import List, Mapping, Tuple, Dict
+import random
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import ContextManager, Iterable, Iterator, List, Optional, Tuple, Dict, Union
 
-import networkx as nx
-from networkx import astar_path
-from numpy import sort
 from qibo import Circuit, models, gates
 
-from GraphUtils import add_to_graph
-
-# from challenges.qubit_mapping.src.GraphUtils import add_to_graph
+from CircuitDag import CircuitDag, CommutationDag
+from GateIR import CircuitIR, IRGate, string_gate
+from Instrumentation import ProfileCallback, Profiler
+from Optimization import PeepholeOptimizer
+from Placement import interaction_matrix, weighted_placement
+from Routing import DEFAULT_STREAM_WINDOW, GateStream, Router, RoutingResult, get_router
+from SwapTables import MAX_TABLE_NODES, SWAP_TABLE_DIR, SwapTable, SwapTableCache, TableRouter, table_initial_mapping
+from Topology import Topology, get_topology
+from Verification import verify
 
 STAR_ARCHITECTURE: Dict[int, List[int]] = {0: [1, 2, 3, 4], 1: [0], 2: [0], 3: [0], 4: [0]}
 
+# Context of the passes when no profiler is attached
+_NOT_PROFILED = nullcontext()
+
+TRIAL_CRITERIA = {
+    "swaps": lambda result: (result.swaps, result.depth),
+    "depth": lambda result: (result.depth, result.swaps),
+}
+
+
+@dataclass
+class TrialResult:
+    """Statistics of one transpilation attempt.
+
+    Attributes:
+        trial (int): index of the trial. Trial 0 starts from the heuristic initial mapping with the transpiler router, the
+            others from a random initial mapping with a seeded router.
+        seed (int): seed of the random initial mapping and of the router, unused by trial 0.
+        swaps (int): number of SWAP gates inserted by the router.
+        depth (int): depth of the transpiled circuit.
+        time (float): wall time of the trial in seconds.
+        initial_mapping (Dict[int, int]): virtual qubit -> physical qubit at the beginning of the transpiled circuit.
+        final_mapping (Dict[int, int]): virtual qubit -> physical qubit at the end of the transpiled circuit.
+    """
+
+    trial: int
+    seed: int
+    swaps: int
+    depth: int
+    time: float
+    initial_mapping: Dict[int, int] = field(default_factory=dict)
+    final_mapping: Dict[int, int] = field(default_factory=dict)
+
+
+class TranspileCache:
+    """Least recently used cache of transpiled IRs, keyed by the structure hash of the input circuit and the transpile
+    settings.
+
+    Args:
+        maxsize (int): maximum number of entries, the least recently used one is dropped beyond it.
+
+    Attributes:
+        hits (int): number of lookups that found an entry.
+        misses (int): number of lookups that did not.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key: tuple) -> Optional[Tuple[CircuitIR, TrialResult, List[TrialResult]]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: tuple, entry: Tuple[CircuitIR, TrialResult, List[TrialResult]]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __reduce__(self):
+        # The entries are not sent to the worker processes of the trials, which start from an empty cache
+        return TranspileCache, (self.maxsize,)
+
 
 class CircuitTranspiler:
+    """Maps a circuit to the coupling map of a device.
 
-    def transpile(self, circuit: models.Circuit) -> Circuit:
-        timesteps = self.generate_timesteps(circuit)
-        mapping = self.initial_mapping(timesteps)
-        non_optimized_circuit = self.routing(timesteps, mapping)
-        optimized_circuit = self.optimize_circuit(non_optimized_circuit)
+    Args:
+        architecture (Dict[int, List[int]]): The topology of the quantum device represented as {node: [neighbors]}, e.g.
+                                             STAR_ARCHITECTURE or the maps built in Topology (line, ring, grid,
+                                             heavy-hex).
+        router (str | Router): The routing engine, "sabre" (lookahead) or "greedy" (one gate at a time), or a Router
+                               instance.
+        decompose_swaps (bool): Whether optimize_circuit decomposes the SWAPs into CNOTs, so that they can cancel with
+                                the surrounding CNOTs.
+        cache_size (int): The number of circuit structures whose transpiled form is kept by transpile_many.
+        swap_tables (SwapTableCache | bool): Optimal SWAP tables of small devices. When the device has a table, routing
+                                             inserts minimal SWAP sequences from it and initial_mapping places the
+                                             qubits exactly. By default the tables of devices with up to
+                                             MAX_TABLE_NODES nodes are loaded from, or built into, SWAP_TABLE_DIR.
+                                             False routes every device with the router.
+        commutation (bool): Whether the router may reorder commuting gates (see CircuitDag.CommutationDag), so that
+                            every gate that can run is executed before a SWAP is inserted.
+    """
+
+    def __init__(
+        self,
+        architecture: Dict[int, List[int]] = STAR_ARCHITECTURE,
+        router: Union[str, Router] = "sabre",
+        decompose_swaps: bool = False,
+        cache_size: int = 128,
+        swap_tables: Union[SwapTableCache, bool, None] = None,
+        commutation: bool = True,
+    ):
+        self.architecture = architecture
+        self.topology = get_topology(architecture)
+        self.router = get_router(router)
+        self.decompose_swaps = decompose_swaps
+        self.cache = TranspileCache(cache_size)
+        if swap_tables is None and len(self.topology.nodes) <= MAX_TABLE_NODES:
+            swap_tables = SwapTableCache(SWAP_TABLE_DIR)
+        self.swap_tables = swap_tables or None
+        self.commutation = commutation
+        self.last_routing: Optional[RoutingResult] = None
+        self.best_trial: Optional[TrialResult] = None
+        self.trial_results: List[TrialResult] = []
+        self.profiler: Optional[Profiler] = None
+
+    def __getstate__(self):
+        # The profiler, and its callback, stay in the calling process: trials run by workers are not recorded
+        state = dict(self.__dict__)
+        state["profiler"] = None
+        return state
+
+    @contextmanager
+    def profile(self, trace_memory: bool = False, callback: Optional[ProfileCallback] = None) -> Iterator[Profiler]:
+        """
+        Context manager that attaches a Profiler to the transpiler: every pass run inside the context records its wall
+        time and allocations, and every routing its SWAPs per timestep and path lengths. Without it no measurement is
+        taken. Trials run in worker processes are not recorded.
+
+        Args:
+        trace_memory (bool): Whether the peak memory of every pass is measured with tracemalloc, which is slower.
+        callback (ProfileCallback): Called with every record as soon as it is taken.
 
-        return optimized_circuit
+        Returns:
+        Iterator[Profiler]: The profiler, whose to_dict and to_json export the records.
+        """
 
-    def generate_timesteps(self, circuit: models.Circuit) -> List[List[gates.Gate]]:
+        previous = self.profiler
+        self.profiler = Profiler(trace_memory, callback)
+        try:
+            yield self.profiler
+        finally:
+            self.profiler = previous
+
+    def _record(self, name: str) -> ContextManager[None]:
+        return _NOT_PROFILED if self.profiler is None else self.profiler.record(name)
+
+    def transpile(
+        self,
+        circuit: models.Circuit,
+        trials: int = 1,
+        workers: Optional[int] = None,
+        criterion: str = "swaps",
+        seed: Optional[int] = None,
+    ) -> Circuit:
         """
-        Function to determine the timesteps of a given circuit
+        Function to map a circuit to the architecture. With several trials, every trial after the first one starts from
+        a seeded random initial mapping and uses a seeded router, and the best transpiled circuit is kept. The statistics
+        of every trial are stored in `trial_results`, and the ones of the kept circuit, with its initial and final
+        mappings, in `best_trial`.
 
         Args:
-        circuit (Qibo circuit): qibo circuit to determine the timesteps
+        circuit (models.Circuit): circuit to transpile
+        trials (int): number of transpilation attempts
+        workers (int): number of processes running the trials, all the cores if None. With 1 the trials run in this
+                       process.
+        criterion (str): "swaps" keeps the result with the fewest SWAPs (ties broken by depth), "depth" the one with
+                         the lowest depth (ties broken by SWAPs)
+        seed (int): seed from which the seeds of the trials are drawn
 
         Returns:
-        timesteps (list): list of timesteps with the qubits involved in each timestep
+        models.Circuit: the transpiled circuit
         """
 
-        circuit_gates: List[gates.Gate] = circuit.queue
+        # All the passes run on the array IR, and qibo gates are only built for the selected result
+        ir = CircuitIR.from_circuit(circuit)
+        best_ir, self.best_trial, self.trial_results = self._transpile_ir(ir, trials, workers, criterion, seed)
+        return best_ir.to_circuit()
+
+    def transpile_many(
+        self,
+        circuits: Iterable[models.Circuit],
+        trials: int = 1,
+        workers: Optional[int] = None,
+        criterion: str = "swaps",
+        seed: Optional[int] = None,
+    ) -> List[Circuit]:
+        """
+        Function to map a batch of circuits to the architecture, e.g. the same ansatz with different angles. The
+        layering, initial mapping, SWAP schedule and optimization only depend on the gate sequence, so the transpiled IR
+        is cached by the structure hash of the circuit (its gates and qubits, parameters ignored) and, when a circuit
+        with the same structure comes again, its parameters are bound to the cached IR instead of transpiling it again.
+
+        Args:
+        circuits (Iterable[models.Circuit]): circuits to transpile
+        trials (int): number of transpilation attempts of every circuit whose structure is not cached
+        workers (int): number of processes running the trials, as in transpile
+        criterion (str): "swaps" or "depth", as in transpile
+        seed (int): seed from which the seeds of the trials are drawn
 
-        timesteps: List[List[gates.Gate]] = []
-        current_timestep: List[gates.Gate] = []
+        Returns:
+        List[models.Circuit]: the transpiled circuits, in the same order
+        """
 
-        qubits_used_in_current_timestep = []
+        transpiled = []
+        for circuit in circuits:
+            ir = CircuitIR.from_circuit(circuit)
+            key = (ir.structure_hash(), trials, criterion, seed)
+            cached = self.cache.get(key)
+            if cached is None:
+                cached = self._transpile_ir(ir, trials, workers, criterion, seed)
+                self.cache.put(key, cached)
+            best_ir, self.best_trial, self.trial_results = cached
+            transpiled.append(best_ir.bind_parameters(ir).to_circuit())
+        return transpiled
+
+    def _transpile_ir(
+        self, ir: CircuitIR, trials: int, workers: Optional[int], criterion: str, seed: Optional[int]
+    ) -> Tuple[CircuitIR, TrialResult, List[TrialResult]]:
+        """Runs the trials of transpile on the IR. Returns the best transpiled IR, its statistics and the statistics of
+        every trial."""
+        if criterion not in TRIAL_CRITERIA:
+            raise ValueError(f"Criterion {criterion} not supported")
+
+        rng = random.Random(seed)
+        seeds = [rng.randrange(2**32) for _ in range(max(trials, 1))]
+
+        if len(seeds) == 1 or workers == 1:
+            outcomes = [self._transpile_trial(ir, trial, trial_seed) for trial, trial_seed in enumerate(seeds)]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                outcomes = list(
+                    executor.map(_run_trial, [(self, ir, trial, trial_seed) for trial, trial_seed in enumerate(seeds)])
+                )
+
+        best_ir, best_trial = min(outcomes, key=lambda outcome: TRIAL_CRITERIA[criterion](outcome[1]))
+        return best_ir, best_trial, [result for _, result in outcomes]
+
+    def _transpile_trial(self, ir: CircuitIR, trial: int, seed: int) -> Tuple[CircuitIR, TrialResult]:
+        start = time.perf_counter()
+
+        with self._record("dag"):
+            dag = self._routing_dag(ir)
+        router = self._router_for(self.topology)
+        if trial == 0:
+            with self._record("generate_timesteps"):
+                timesteps = dag.timesteps()
+            mapping = self.initial_mapping(timesteps)
+        else:
+            router = router.seeded(seed)
+            mapping = self.random_mapping(ir.nqubits, seed)
+        with self._record("refine_mapping"):
+            mapping = router.refine_mapping(dag, mapping, self.topology)
+        routed = self._route(router, dag, mapping, self.topology)
+        optimized_ir = self.optimize_ir(routed.ir)
+
+        result = TrialResult(
+            trial=trial,
+            seed=seed,
+            swaps=routed.swaps,
+            depth=CircuitDag(optimized_ir).depth(),
+            time=time.perf_counter() - start,
+            initial_mapping=mapping,
+            final_mapping=routed.final_mapping,
+        )
+        return optimized_ir, result
+
+    def random_mapping(self, nqubits: int, seed: Optional[int] = None) -> Dict[int, int]:
+        """
+        Function to place the virtual qubits on randomly chosen physical qubits.
 
-        for gate in circuit_gates:
-            if gate.qubits[0] in qubits_used_in_current_timestep or (
-                len(gate.qubits) > 1 and gate.qubits[1] in qubits_used_in_current_timestep
-            ):
-                timesteps.append(current_timestep.copy())
-                current_timestep = [gate]
-                qubits_used_in_current_timestep = [gate.qubits[0]]
-                if len(gate.qubits) > 1:
-                    qubits_used_in_current_timestep.append(gate.qubits[1])
-            else:
-                current_timestep.append(gate)
-                qubits_used_in_current_timestep.append(gate.qubits[0])
-                if len(gate.qubits) > 1:
-                    qubits_used_in_current_timestep.append(gate.qubits[1])
+        Args:
+        nqubits (int): number of virtual qubits
+        seed (int): seed of the random placement
 
-        timesteps.append(current_timestep.copy())
+        Returns:
+        dict: dictionary with the mapping of virtual qubits to physical qubits
+        """
 
-        return timesteps
+        nodes = random.Random(seed).sample(self.topology.nodes, nqubits)
+        return dict(zip(range(nqubits), nodes))
+
+    def generate_timesteps(
+        self, circuit: models.Circuit, schedule: str = "asap", dag: CircuitDag = None
+    ) -> List[List[IRGate]]:
+        """
+        Function to determine the timesteps of a given circuit. Every gate is placed in the earliest (ASAP) or latest
+        (ALAP) timestep allowed by the gates acting before it on the same qubits.
+
+        Args:
+        circuit (Qibo circuit): qibo circuit to determine the timesteps
+        schedule (str): "asap" or "alap"
+        dag (CircuitDag): dependency DAG of the circuit, built from the circuit if not given
+
+        Returns:
+        timesteps (list): list of timesteps with the qubits involved in each timestep
+        """
+
+        with self._record("generate_timesteps"):
+            if dag is None:
+                dag = CircuitDag.from_circuit(circuit)
+            return dag.timesteps(schedule)
 
     def initial_mapping(self, timesteps: List[List[gates.Gate]]) -> Dict[int, int]:
         """
-        Function to determine the initial mapping of the qubits to the architecture.
+        Function to determine the initial mapping of the qubits to the architecture. The qubits are placed to minimise
+        the distance between the nodes of the pairs that interact the most, early interactions weighing more (see
+        Placement). Devices with a swap table get the exact optimum.
 
         Args:
         timesteps (list): list of timesteps with the qubits involved in each timestep
@@ -71,159 +343,165 @@ class CircuitTranspiler:
         dict: dictionary with the initial mapping of virtual qubits (referred to as qubits) to physical qubits (referred to as nodes)
         """
 
-        architecture = STAR_ARCHITECTURE
-        graph: Dict[int, List[int]] = {}
-
-        # Generate the graph containing connections from each qubit.
-        for step in timesteps:
-            for gate in step:
-                if len(gate.qubits) < 2:
-                    continue
-                if GraphUtils.is_pair_present(graph, gate.qubits[0], gate.qubits[1]):
-                    continue
-                if (
-                    GraphUtils.get_node_edges(graph, gate.qubits[0]) >= 2
-                    or GraphUtils.get_node_edges(graph, gate.qubits[1]) >= 2
-                ):
-                    continue
-                graph = GraphUtils.add_to_graph(graph, gate.qubits[0], gate.qubits[1])
-
-        # Generate the list of qubits
-        list_of_qubits = []
-        first_qubit = list(graph.keys())[0]
-
-        list_of_qubits.append(first_qubit)
-        next_qubit = graph[first_qubit][0]
-        while next_qubit is not None and next_qubit is not first_qubit:
-            list_of_qubits.append(next_qubit)
-            found = False
-            for qubit in graph[next_qubit]:
-                if qubit not in list_of_qubits:
-                    next_qubit = qubit
-                    found = True
-                    break
-
-            if not found:
-                next_qubit = None
-
-        # Create subgraphs from highest degree node
-        subgraphs: List[int] = GraphUtils.get_subgraphs(architecture)
-
-        # Map the list of qubits to the architecture nodes
-        mapping = {}
-        for qubit in list_of_qubits:
-            mapping[qubit] = subgraphs.pop(0)
-
-        return mapping
+        with self._record("initial_mapping"):
+            table = self._swap_table(self.topology)
+            if table is not None:
+                return self._table_initial_mapping(timesteps, table)
+
+            return weighted_placement(interaction_matrix(timesteps), self.topology)
+
+    def _table_initial_mapping(self, timesteps: List[List[gates.Gate]], table: SwapTable) -> Dict[int, int]:
+        """Exact initial mapping of a device with a swap table, with the interaction weights of interaction_matrix."""
+        weights = interaction_matrix(timesteps)
+        if not weights.any() or len(weights) > len(table.topology.nodes):
+            return {}
+        return table_initial_mapping(table, weights)
+
+    def _swap_table(self, topology: Topology) -> Optional[SwapTable]:
+        return self.swap_tables.get(topology) if self.swap_tables is not None else None
+
+    def _router_for(self, topology: Topology) -> Router:
+        """The table router on devices with a swap table, the router of the transpiler otherwise."""
+        table = self._swap_table(topology)
+        return TableRouter(table) if table is not None else self.router
 
     def routing(
-        self, circuit: models.Circuit, initial_mapping: Dict[int, int], architecture=dict[int, list[int]]
-    ) -> models.Circuit:
+        self,
+        circuit: models.Circuit,
+        initial_mapping: Dict[int, int],
+        architecture: Dict[int, List[int]] = None,
+        dag: CircuitDag = None,
+    ) -> Tuple[models.Circuit, Dict[int, int], Topology]:
         """
-        Function that takes as input the timesteps and the initial mapping and outputs the final circuit.
+        Function that takes as input the circuit and the initial mapping and outputs the final circuit.
 
         Args:
-        timesteps (List[List[Tuple[int, int]]]): A list of timesteps, where each timestep is a list of tuples representing
-                                                 the qubits involved in two-qubit gates at that timestep.
+        circuit (models.Circuit): The circuit to route.
 
         initial_mapping (Dict[int, int]): A dictionary representing the initial mapping of virtual qubits (keys) to
-                                          physical qubits (values).
+                                          physical qubits (values). Virtual qubits missing from it are placed on the
+                                          free physical qubits.
+
+        architecture (Dict[int, List[int]] | Topology): The coupling map of the device, the one of the transpiler if
+                                                         not given. The distance and next hop tables are built once
+                                                         per coupling map and reused.
+
+        dag (CircuitDag): dependency DAG of the circuit, built from the circuit if not given, commutation-aware if the
+                          transpiler was built with commutation.
 
         Returns:
         models.Circuit: A Qibo circuit object representing the final quantum circuit after applying the routing algorithm.
+        Dict[int, int]: The mapping of virtual qubits to physical qubits at the end of the circuit.
+        Topology: The precomputed topology used for routing.
+
+        The full RoutingResult, with the SWAP count and the depth of the routed circuit, is kept in last_routing.
         """
 
-        mapping = initial_mapping.copy()
-        output_circuit = Circuit(len(initial_mapping.keys()))
-        topology_graph = nx.Graph(dict_topology_tolist(architecture))
-        # print(list(topology_graph.edges))
+        topology = self.topology if architecture is None else get_topology(architecture)
+        if dag is None:
+            dag = self._routing_dag(CircuitIR.from_circuit(circuit))
 
-        for gate in circuit.queue:
+        result = self._route(self._router_for(topology), dag, initial_mapping, topology)
+        self.last_routing = result
 
-            # If the gate is a single qubit gate, add it to the output circuit following the mapping
-            if len(gate.qubits) == 1:
-                output_circuit.add(string_gate(gate.name, (mapping[gate.qubits[0]],)))
+        return result.ir.to_circuit(), result.final_mapping, topology
 
-            # If the gate is a two qubit gate, check if the qubits are connected in the topology
-            elif len(gate.qubits) == 2:
+    def _routing_dag(self, ir: CircuitIR) -> CircuitDag:
+        return CommutationDag(ir) if self.commutation else CircuitDag(ir)
 
-                # If the qubits are connected, add the gate to the output circuit following the mapping
-                mapped_qubit_pair = tuple((mapping[gate.qubits[0]], mapping[gate.qubits[1]]))
+    def _route(self, router: Router, dag: CircuitDag, mapping: Dict[int, int], topology: Topology) -> RoutingResult:
+        with self._record("routing"):
+            result = router.route(dag, mapping, topology)
+        if self.profiler is not None:
+            self.profiler.record_routing(result, topology)
+        return result
 
-                if (mapped_qubit_pair in list(topology_graph.edges)) or (
-                    mapped_qubit_pair[::-1] in list(topology_graph.edges)
-                ):
-                    output_circuit.add(string_gate(gate.name, (mapping[gate.qubits[0]], mapping[gate.qubits[1]])))
-                else:
-                    # If the qubits are not connected, find the shortest path between them and add SWAP gates
-                    # up the second to last qubit in the path. At each swap, update the mapping.
-                    path = astar_path(topology_graph, mapping[gate.qubits[0]], mapping[gate.qubits[1]])
+    def routing_stream(
+        self,
+        circuit_gates: Iterable[gates.Gate],
+        initial_mapping: Dict[int, int],
+        architecture: Dict[int, List[int]] = None,
+        window: int = DEFAULT_STREAM_WINDOW,
+    ) -> GateStream:
+        """
+        Generator version of routing for circuits too large to be held in memory. The gates are read lazily from the
+        iterable and the routed gates are yielded as soon as they are decided, keeping only the current mapping and a
+        bounded window of pending gates, so the memory stays flat whatever the length of the circuit.
 
-                    for i in range(len(path) - 2):
+        Args:
+        circuit_gates (Iterable[gates.Gate]): The gates to route, in circuit order, e.g. a generator of qibo gates.
 
-                        #     output_circuit.add(gates.CNOT(path[i], path[i + 1]))
-                        #     output_circuit.add(gates.CNOT(path[i + 1], path[i]))
-                        #     output_circuit.add(gates.CNOT(path[i], path[i + 1]))
+        initial_mapping (Dict[int, int]): A dictionary representing the initial mapping of virtual qubits (keys) to
+                                          physical qubits (values). Virtual qubits missing from it are placed on the
+                                          free physical qubits when they first appear.
 
-                        output_circuit.add(gates.SWAP(path[i], path[i + 1]))
+        architecture (Dict[int, List[int]] | Topology): The coupling map of the device, the one of the transpiler if
+                                                         not given.
 
-                        swap_cache = mapping[mapping[path[i]]]
-                        mapping[mapping[path[i]]] = mapping[mapping[path[i + 1]]]
-                        mapping[mapping[path[i + 1]]] = swap_cache
+        window (int): The maximum number of input gates held at once, which is the lookahead of the router.
 
-                    # Add the original gate to the output circuit with the updated mapping
-                    output_circuit.add(string_gate(gate.name, (path[-2], mapping[gate.qubits[1]])))
+        Returns:
+        Generator[gates.Gate, None, Dict[int, int]]: The routed gates, acting on physical qubits. The final mapping is
+                                                     the return value of the generator (`yield from` result).
+        """
 
-        return output_circuit, mapping, topology_graph
+        topology = self.topology if architecture is None else get_topology(architecture)
+        return self.router.route_stream(circuit_gates, initial_mapping, topology, window)
 
-    def optimize_circuit(self, circuit: models.Circuit) -> models.Circuit:
+    def verify(
+        self,
+        original: models.Circuit,
+        transpiled: models.Circuit,
+        final_mapping: Optional[Dict[int, int]] = None,
+        initial_mapping: Optional[Dict[int, int]] = None,
+    ) -> bool:
         """
-        Function that takes as input the circuit and outputs the optimized circuit
+        Function that checks that a transpiled circuit implements the original one, taking into account where the
+        virtual qubits start and end. Clifford circuits are checked in polynomial time with stabilizer tableaux, others
+        with a dense simulation (see Verification.verify).
 
         Args:
-        circuit (models.Circuit): The circuit to be optimized.
+        original (models.Circuit): The circuit before transpilation.
+        transpiled (models.Circuit): The transpiled or routed circuit.
+        final_mapping (Dict[int, int]): The mapping at the end of the transpiled circuit, the one of the last transpile
+                                        if not given.
+        initial_mapping (Dict[int, int]): The mapping at the beginning of the transpiled circuit, the one of the last
+                                          transpile if not given.
 
         Returns:
-        models.Circuit: The optimized circuit.
-        """
+        bool: Whether the circuits are equivalent.
 
-        output_circuit = models.Circuit(circuit.nqubits)
-        circ = circuit.copy()
-
-        for i, gate in enumerate(circ.queue):
-            for j in range(i + 1, len(circ.queue)):
-                comp = circ.queue[j]
-                if gate.name == comp.name and gate.qubits == comp.qubits:
-                    break
-                else:
-                    output_circuit.add(gate)
-                    break
+        Raises:
+        ValueError: If a mapping is not given and transpile was never called.
+        """
 
-        return circuit
+        if (final_mapping is None or initial_mapping is None) and self.best_trial is None:
+            raise ValueError("pass final_mapping/initial_mapping or call transpile first")
+        if final_mapping is None:
+            final_mapping = self.best_trial.final_mapping
+        if initial_mapping is None:
+            initial_mapping = self.best_trial.initial_mapping
+        return verify(original, transpiled, final_mapping, initial_mapping)
 
+    def optimize_circuit(self, circuit: models.Circuit) -> models.Circuit:
+        """
+        Function that takes as input the circuit and outputs the optimized circuit. Pairs of inverse gates are removed,
+        also across gates they commute with, and SWAPs next to a CNOT on the same qubits are merged into two CNOTs. If
+        the transpiler was built with decompose_swaps, every SWAP is replaced by three CNOTs first.
 
-def string_gate(name: str, qubits: tuple[int]) -> gates.Gate:
-    """Converts a tuple representation of a get as (name, qubits) into a Gate object.
+        Args:
+        circuit (models.Circuit): The circuit to be optimized.
 
-    Args:
-        name (str): The name of the gate. Can be "cnot", "x" or "h".
-        qubits (int | tuple[int, int]): The qubits the gate acts on. If the gate is a single qubit gate, it is an int.
-        If it is a two qubit gate, it is a tuple of two ints.
+        Returns:
+        models.Circuit: The optimized circuit.
+        """
 
-    Raises:
-        ValueError: If the gate name is not supported.
+        return self.optimize_ir(CircuitIR.from_circuit(circuit)).to_circuit()
 
-    Returns:
-        gates.Gate: The qibo Gate object.
-    """
-    if name == "cx":
-        return gates.CNOT(qubits[0], qubits[1])
-    elif name == "x":
-        return gates.X(qubits[0])
-    elif name == "h":
-        return gates.H(qubits[0])
-    else:
-        raise ValueError(f"Gate {name} not supported")
+    def optimize_ir(self, ir: CircuitIR) -> CircuitIR:
+        """Same as optimize_circuit, on the IR used between the transpiler passes."""
+        with self._record("optimize_circuit"):
+            return PeepholeOptimizer(decompose_swaps=self.decompose_swaps).optimize(ir)
 
 
 def dict_topology_tolist(topology: dict[int, list[int]]) -> List[Tuple[int, int]]:
@@ -240,3 +518,9 @@ def dict_topology_tolist(topology: dict[int, list[int]]) -> List[Tuple[int, int]
         for neighbor in neighbors:
             edges.append((node, neighbor))
     return edges
+
+
+def _run_trial(args: Tuple["CircuitTranspiler", CircuitIR, int, int]) -> Tuple[CircuitIR, TrialResult]:
+    """Entry point of the worker processes of CircuitTranspiler.transpile."""
+    transpiler, circuit, trial, seed = args
+    return transpiler._transpile_trial(circuit, trial, seed)
@@ -0,0 +1,297 @@
+import hashlib
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Type
+
+import numpy as np
+from qibo import Circuit, gates, models
+
+NO_QUBIT = -1
+NO_ORIGIN = -1
+MAX_PARAMETERS = 3
+
+
+class GateSpec(NamedTuple):
+    """Entry of the gate registry.
+
+    Attributes:
+        opcode (int): integer identifier of the gate in the IR.
+        name (str): qibo name of the gate.
+        gate_class (Type[gates.Gate]): qibo class building the gate.
+        nqubits (int): number of qubits the gate acts on.
+        nparams (int): number of parameters of the gate.
+    """
+
+    opcode: int
+    name: str
+    gate_class: Type[gates.Gate]
+    nqubits: int
+    nparams: int
+
+
+class IRGate(NamedTuple):
+    """Light view of one row of the IR, with the same name and qubits attributes as a qibo gate."""
+
+    name: str
+    qubits: Tuple[int, ...]
+    parameters: Tuple[float, ...]
+
+
+_GATES = [
+    ("id", gates.I, 1, 0),
+    ("h", gates.H, 1, 0),
+    ("x", gates.X, 1, 0),
+    ("y", gates.Y, 1, 0),
+    ("z", gates.Z, 1, 0),
+    ("s", gates.S, 1, 0),
+    ("sdg", gates.SDG, 1, 0),
+    ("t", gates.T, 1, 0),
+    ("tdg", gates.TDG, 1, 0),
+    ("sx", gates.SX, 1, 0),
+    ("sxdg", gates.SXDG, 1, 0),
+    ("rx", gates.RX, 1, 1),
+    ("ry", gates.RY, 1, 1),
+    ("rz", gates.RZ, 1, 1),
+    ("u1", gates.U1, 1, 1),
+    ("u2", gates.U2, 1, 2),
+    ("u3", gates.U3, 1, 3),
+    ("measure", gates.M, 1, 0),
+    ("cx", gates.CNOT, 2, 0),
+    ("cy", gates.CY, 2, 0),
+    ("cz", gates.CZ, 2, 0),
+    ("swap", gates.SWAP, 2, 0),
+    ("iswap", gates.iSWAP, 2, 0),
+    ("fswap", gates.FSWAP, 2, 0),
+    ("csx", gates.CSX, 2, 0),
+    ("ecr", gates.ECR, 2, 0),
+    ("crx", gates.CRX, 2, 1),
+    ("cry", gates.CRY, 2, 1),
+    ("crz", gates.CRZ, 2, 1),
+    ("cu1", gates.CU1, 2, 1),
+    ("cu3", gates.CU3, 2, 3),
+    ("rxx", gates.RXX, 2, 1),
+    ("ryy", gates.RYY, 2, 1),
+    ("rzz", gates.RZZ, 2, 1),
+]
+
+GATE_REGISTRY: Dict[str, GateSpec] = {
+    name: GateSpec(opcode, name, gate_class, nqubits, nparams)
+    for opcode, (name, gate_class, nqubits, nparams) in enumerate(_GATES)
+}
+OPCODES: List[GateSpec] = list(GATE_REGISTRY.values())
+SWAP_OPCODE = GATE_REGISTRY["swap"].opcode
+CX_OPCODE = GATE_REGISTRY["cx"].opcode
+
+
+def gate_spec(name: str) -> GateSpec:
+    """Returns the registry entry of a gate.
+
+    Raises:
+        ValueError: If the gate name is not supported.
+    """
+    spec = GATE_REGISTRY.get(name)
+    if spec is None:
+        raise ValueError(f"Gate {name} not supported")
+    return spec
+
+
+def string_gate(name: str, qubits: tuple[int], parameters: Sequence[float] = ()) -> gates.Gate:
+    """Converts a tuple representation of a get as (name, qubits, parameters) into a Gate object.
+
+    Args:
+        name (str): The name of the gate, any name of GATE_REGISTRY (e.g. "cx", "x", "h", "rz", "u3", "swap").
+        qubits (tuple[int] | tuple[int, int]): The qubits the gate acts on.
+        parameters (Sequence[float], optional): The parameters of parametrised gates. Defaults to ().
+
+    Raises:
+        ValueError: If the gate name is not supported.
+
+    Returns:
+        gates.Gate: The qibo Gate object.
+    """
+    spec = gate_spec(name)
+    return spec.gate_class(*qubits[: spec.nqubits], *parameters[: spec.nparams])
+
+
+def gate_rows(circuit_gates: Iterable[gates.Gate]) -> Iterator[Tuple[GateSpec, Tuple[int, ...], Tuple[float, ...]]]:
+    """Lazily turns gates (qibo gates or IRGate) into (spec, qubits, parameters) rows, the unit of the IR. Measurements
+    on several qubits are split into one row per qubit.
+
+    Raises:
+        ValueError: If a gate is not in the registry or acts on more than two qubits.
+    """
+    for gate in circuit_gates:
+        spec = gate_spec(gate.name)
+        if spec.name == "measure":
+            for qubit in gate.qubits:
+                yield spec, (qubit,), ()
+            continue
+        if len(gate.qubits) != spec.nqubits:
+            raise ValueError(f"Gate {gate.name} acts on {len(gate.qubits)} qubits, expected {spec.nqubits}")
+        yield spec, tuple(gate.qubits), tuple(gate.parameters)
+
+
+class CircuitIR:
+    """Array-backed representation of a gate sequence used by the transpiler passes. Every gate is a row of the
+    opcode, qubit0, qubit1 and params columns, and qibo gates are only built when the IR is turned into a Circuit.
+
+    Attributes:
+        nqubits (int): number of qubits.
+        opcode (np.ndarray): opcode of each gate in GATE_REGISTRY.
+        qubit0 (np.ndarray): first qubit of each gate.
+        qubit1 (np.ndarray): second qubit of each gate, NO_QUBIT for single qubit gates.
+        params (np.ndarray): (num_gates, MAX_PARAMETERS) parameters, padded with zeros.
+        origin (np.ndarray): row of the input IR (the one built from the circuit being transpiled) each row comes
+            from, NO_ORIGIN for the gates inserted by the passes (e.g. SWAPs).
+    """
+
+    def __init__(
+        self,
+        nqubits: int,
+        opcode: np.ndarray,
+        qubit0: np.ndarray,
+        qubit1: np.ndarray,
+        params: Optional[np.ndarray] = None,
+        origin: Optional[np.ndarray] = None,
+    ):
+        self.nqubits = nqubits
+        self.opcode = np.asarray(opcode, dtype=np.int16)
+        self.qubit0 = np.asarray(qubit0, dtype=np.int32)
+        self.qubit1 = np.asarray(qubit1, dtype=np.int32)
+        num_gates = len(self.opcode)
+        if params is None:
+            params = np.zeros((num_gates, MAX_PARAMETERS))
+        self.params = np.asarray(params, dtype=float).reshape(num_gates, MAX_PARAMETERS)
+        self.origin = np.arange(num_gates, dtype=np.int32) if origin is None else np.asarray(origin, dtype=np.int32)
+
+    @classmethod
+    def from_circuit(cls, circuit: models.Circuit) -> "CircuitIR":
+        """Builds the IR of a qibo circuit. Measurements on several qubits are split into one row per qubit.
+
+        Raises:
+            ValueError: If a gate is not in the registry or acts on more than two qubits.
+        """
+        builder = IRBuilder(circuit.nqubits)
+        params = []
+        for spec, qubits, parameters in gate_rows(circuit.queue):
+            builder.append(spec.opcode, qubits[0], qubits[1] if spec.nqubits == 2 else NO_QUBIT, len(params))
+            params.append(parameters)
+
+        padded = np.zeros((len(params), MAX_PARAMETERS))
+        for row, values in enumerate(params):
+            padded[row, : len(values)] = values
+        return builder.build(padded_params=padded)
+
+    def __len__(self) -> int:
+        return len(self.opcode)
+
+    def is_two_qubit(self) -> np.ndarray:
+        return self.qubit1 != NO_QUBIT
+
+    def gate(self, index: int) -> IRGate:
+        spec = OPCODES[self.opcode[index]]
+        qubits = (int(self.qubit0[index]),) if spec.nqubits == 1 else (int(self.qubit0[index]), int(self.qubit1[index]))
+        return IRGate(spec.name, qubits, tuple(self.params[index, : spec.nparams].tolist()))
+
+    def __iter__(self) -> Iterator[IRGate]:
+        for index in range(len(self)):
+            yield self.gate(index)
+
+    def take(self, indices: Sequence[int]) -> "CircuitIR":
+        """Returns the IR with the given rows, e.g. the reversed circuit with indices [::-1]."""
+        indices = np.asarray(indices, dtype=np.int64)
+        return CircuitIR(
+            self.nqubits,
+            self.opcode[indices],
+            self.qubit0[indices],
+            self.qubit1[indices],
+            self.params[indices],
+            self.origin[indices],
+        )
+
+    def structure_hash(self) -> str:
+        """Hash of the gate sequence with the parameters ignored: circuits that only differ in their rotation angles
+        have the same structure hash, and the passes treat them in the same way."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(np.int64(self.nqubits).tobytes())
+        for column in (self.opcode, self.qubit0, self.qubit1):
+            digest.update(np.ascontiguousarray(column).tobytes())
+        return digest.hexdigest()
+
+    def bind_parameters(self, source: "CircuitIR") -> "CircuitIR":
+        """Returns a copy of this IR whose gates take their parameters from the gate of the source IR they come from.
+
+        Args:
+            source (CircuitIR): IR with the structure of the input IR this one was derived from, e.g. the same ansatz
+                with other angles.
+
+        Returns:
+            CircuitIR: the IR with the parameters of the source.
+        """
+        params = self.params.copy()
+        kept = self.origin != NO_ORIGIN
+        params[kept] = source.params[self.origin[kept]]
+        return CircuitIR(self.nqubits, self.opcode, self.qubit0, self.qubit1, params, self.origin)
+
+    def to_gates(self) -> List[gates.Gate]:
+        qubit0 = self.qubit0.tolist()
+        qubit1 = self.qubit1.tolist()
+        params = self.params.tolist()
+        circuit_gates = []
+        for index, opcode in enumerate(self.opcode.tolist()):
+            spec = OPCODES[opcode]
+            qubits = (qubit0[index], qubit1[index])[: spec.nqubits]
+            circuit_gates.append(spec.gate_class(*qubits, *params[index][: spec.nparams]))
+        return circuit_gates
+
+    def to_circuit(self, nqubits: Optional[int] = None) -> Circuit:
+        """Materialises the IR into a qibo Circuit, building every gate once."""
+        circuit = Circuit(self.nqubits if nqubits is None else nqubits)
+        circuit.add(self.to_gates())
+        return circuit
+
+
+class IRBuilder:
+    """Appends gates row by row into Python lists and turns them into a CircuitIR at the end. Rows refer to a gate of a
+    source IR through their origin, from which parameters are gathered when the IR is built.
+
+    Args:
+        nqubits (int): number of qubits of the IR being built.
+    """
+
+    def __init__(self, nqubits: int):
+        self.nqubits = nqubits
+        self.opcode: List[int] = []
+        self.qubit0: List[int] = []
+        self.qubit1: List[int] = []
+        self.origin: List[int] = []
+
+    def append(self, opcode: int, qubit0: int, qubit1: int = NO_QUBIT, origin: int = NO_ORIGIN) -> None:
+        self.opcode.append(opcode)
+        self.qubit0.append(qubit0)
+        self.qubit1.append(qubit1)
+        self.origin.append(origin)
+
+    def __len__(self) -> int:
+        return len(self.opcode)
+
+    def build(self, source: Optional[CircuitIR] = None, padded_params: Optional[np.ndarray] = None) -> CircuitIR:
+        """Builds the IR.
+
+        Args:
+            source (CircuitIR, optional): IR the origins refer to. Parameters are copied from it, and origins are
+                translated to the origins of the source, so they always point to the gates of the input circuit.
+            padded_params (np.ndarray, optional): parameters indexed by origin, used when there is no source IR.
+
+        Returns:
+            CircuitIR: the built IR.
+        """
+        origin = np.array(self.origin, dtype=np.int64)
+        inserted = origin == NO_ORIGIN
+        params = np.zeros((len(origin), MAX_PARAMETERS))
+
+        if source is not None:
+            params[~inserted] = source.params[origin[~inserted]]
+            origin = np.where(inserted, NO_ORIGIN, source.origin[np.maximum(origin, 0)] if len(source) else NO_ORIGIN)
+        elif padded_params is not None:
+            params[~inserted] = padded_params[origin[~inserted]]
+
+        return CircuitIR(self.nqubits, self.opcode, self.qubit0, self.qubit1, params, origin)
@@ -0,0 +1,176 @@
+"""Opt-in instrumentation of the transpiler passes.
+
+A Profiler collects the wall time and the allocations of every pass, and for every routing the SWAPs inserted on each
+timestep of the routed circuit and a histogram of the path lengths the router had to bridge. The transpiler only calls
+it when one is attached, so nothing is measured, and nothing is paid, otherwise:
+
+    with transpiler.profile() as profiler:
+        transpiler.transpile(circuit)
+    print(profiler.to_json())
+"""
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from CircuitDag import CircuitDag
+from GateIR import NO_QUBIT, SWAP_OPCODE
+from Routing import RoutingResult
+from Topology import Topology
+
+# Called with the kind of record, "pass" or "routing", and the record as a dict
+ProfileCallback = Callable[[str, dict], None]
+
+
+@dataclass
+class PassRecord:
+    """Measurements of a pass, summed over its calls.
+
+    Attributes:
+        name (str): name of the pass.
+        calls (int): number of calls.
+        time (float): wall time in seconds.
+        allocated_blocks (int): memory blocks allocated by the pass and still alive when it returned
+            (sys.getallocatedblocks).
+        peak_bytes (int): largest peak of traced memory of a call, only measured with trace_memory.
+    """
+
+    name: str
+    calls: int = 0
+    time: float = 0.0
+    allocated_blocks: int = 0
+    peak_bytes: int = 0
+
+
+@dataclass
+class RoutingRecord:
+    """Statistics of a routed circuit.
+
+    Attributes:
+        swaps (int): number of SWAP gates inserted.
+        depth (int): depth of the routed circuit.
+        swaps_per_timestep (List[int]): SWAPs on every ASAP timestep of the routed circuit.
+        path_lengths (Dict[int, int]): number of two qubit gates by the distance between their qubits before the SWAPs
+            inserted for them, 1 for the gates that needed none.
+    """
+
+    swaps: int
+    depth: int
+    swaps_per_timestep: List[int] = field(default_factory=list)
+    path_lengths: Dict[int, int] = field(default_factory=dict)
+
+
+class Profiler:
+    """Collects the records of the passes run while it is attached to a transpiler.
+
+    Args:
+        trace_memory (bool, optional): also measure the peak memory of every pass with tracemalloc, which slows the
+            passes down. Defaults to False.
+        callback (ProfileCallback, optional): called with every record as soon as it is taken. Defaults to None.
+    """
+
+    def __init__(self, trace_memory: bool = False, callback: Optional[ProfileCallback] = None):
+        self.trace_memory = trace_memory
+        self.callback = callback
+        self.passes: Dict[str, PassRecord] = {}
+        self.routings: List[RoutingRecord] = []
+
+    @contextmanager
+    def record(self, name: str) -> Iterator[None]:
+        """Measures the code run inside the context as a call of the pass."""
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            record = self.passes.setdefault(name, PassRecord(name))
+            record.calls += 1
+            record.time += elapsed
+            record.allocated_blocks += sys.getallocatedblocks() - blocks
+            if self.trace_memory:
+                record.peak_bytes = max(record.peak_bytes, tracemalloc.get_traced_memory()[1])
+            if started_tracing:
+                tracemalloc.stop()
+            if self.callback is not None:
+                self.callback("pass", {**asdict(record), "call_time": elapsed})
+
+    def record_routing(self, result: RoutingResult, topology: Topology) -> RoutingRecord:
+        """Adds the statistics of a routed circuit.
+
+        Args:
+            result (RoutingResult): output of the router.
+            topology (Topology): coupling map the circuit was routed on.
+
+        Returns:
+            RoutingRecord: the statistics.
+        """
+        ir = result.ir
+        layers = CircuitDag(ir).asap_layers()
+        is_swap = ir.opcode == SWAP_OPCODE
+        swaps_per_timestep = np.bincount(layers[is_swap], minlength=result.depth).tolist() if len(ir) else []
+
+        record = RoutingRecord(
+            swaps=result.swaps,
+            depth=result.depth,
+            swaps_per_timestep=swaps_per_timestep,
+            path_lengths=_path_lengths(ir.qubit0, ir.qubit1, is_swap, topology),
+        )
+        self.routings.append(record)
+        if self.callback is not None:
+            self.callback("routing", asdict(record))
+        return record
+
+    def path_length_histogram(self) -> Dict[int, int]:
+        """Path lengths of every recorded routing, summed."""
+        histogram: Dict[int, int] = {}
+        for routing in self.routings:
+            for length, count in routing.path_lengths.items():
+                histogram[length] = histogram.get(length, 0) + count
+        return dict(sorted(histogram.items()))
+
+    def to_dict(self) -> dict:
+        return {
+            "passes": {name: asdict(record) for name, record in self.passes.items()},
+            "routings": [asdict(routing) for routing in self.routings],
+            "path_lengths": self.path_length_histogram(),
+        }
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.to_dict(), indent=indent)
+
+
+def _path_lengths(qubit0: np.ndarray, qubit1: np.ndarray, is_swap: np.ndarray, topology: Topology) -> Dict[int, int]:
+    """Replays the SWAPs of a routed circuit. Every two qubit gate is measured with the positions its qubits had before
+    the run of SWAPs preceding it, so a gate that needed no SWAP has length 1."""
+    # Qubits are identified by their initial node: position[token] is its node, token[node] the qubit on the node
+    position = np.arange(topology.num_nodes)
+    token = np.arange(topology.num_nodes)
+    before_swaps = position.copy()
+    in_swaps = False
+    histogram: Dict[int, int] = {}
+    for node1, node2, swap in zip(qubit0.tolist(), qubit1.tolist(), is_swap.tolist()):
+        if node2 == NO_QUBIT:
+            continue
+        if swap:
+            if not in_swaps:
+                before_swaps = position.copy()
+                in_swaps = True
+            token1, token2 = token[node1], token[node2]
+            token[node1], token[node2] = token2, token1
+            position[token1], position[token2] = node2, node1
+            continue
+        in_swaps = False
+        length = int(topology.distance[before_swaps[token[node1]], before_swaps[token[node2]]])
+        histogram[length] = histogram.get(length, 0) + 1
+    return dict(sorted(histogram.items()))
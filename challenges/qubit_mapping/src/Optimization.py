@@ -0,0 +1,190 @@
+from typing import List, Optional, Tuple
+
+from GateIR import CX_OPCODE, GATE_REGISTRY, NO_ORIGIN, NO_QUBIT, SWAP_OPCODE, CircuitIR, IRBuilder
+
+
+def _opcodes(*names: str) -> set:
+    return {GATE_REGISTRY[name].opcode for name in names}
+
+
+# Gates that are their own inverse, and pairs of gates that are the inverse of each other
+SELF_INVERSE_GATES = _opcodes("h", "x", "y", "z", "cx", "cz", "swap")
+INVERSE_PAIRS = {
+    GATE_REGISTRY[name].opcode: GATE_REGISTRY[inverse].opcode
+    for name, inverse in [("s", "sdg"), ("sdg", "s"), ("t", "tdg"), ("tdg", "t")]
+}
+# Gates whose qubits can be exchanged without changing the gate
+SYMMETRIC_GATES = _opcodes("cz", "swap")
+
+# Local action of a gate on each of its qubits: "z" if it is diagonal on that qubit, "x" if it is a function of X.
+# Two gates commute when they act on every shared qubit with the same axis.
+Z_AXIS_GATES = _opcodes("z", "s", "sdg", "t", "tdg", "rz", "u1", "cz", "cu1", "rzz")
+X_AXIS_GATES = _opcodes("x", "rx", "sx", "sxdg", "rxx")
+
+# A gate of the pass: (opcode, qubits, origin)
+Gate = Tuple[int, Tuple[int, ...], int]
+
+DEFAULT_WINDOW = 16
+
+
+class PeepholeOptimizer:
+    """Linear time cancellation pass. For every qubit it keeps the stack of gates already emitted on it, so each new gate
+    is compared with the last gates on its qubits instead of with the whole circuit.
+
+    - Pairs of inverse gates (H-H, X-X, CNOT-CNOT, SWAP-SWAP, S-SDG, ...) are removed, also when they are separated by
+      gates that commute with them (e.g. CNOTs sharing the control or the target, Z rotations on a control). At most
+      `window` gates are looked at on each qubit.
+    - A SWAP next to a CNOT on the same pair of qubits is merged into two CNOTs.
+    - Optionally every SWAP is decomposed into three CNOTs, so that cancellations also happen across SWAPs.
+
+    Args:
+        decompose_swaps (bool, optional): replace SWAP(a, b) by CNOT(a, b) CNOT(b, a) CNOT(a, b). Defaults to False.
+        window (int, optional): maximum number of gates looked at on each qubit. Defaults to DEFAULT_WINDOW.
+    """
+
+    def __init__(self, decompose_swaps: bool = False, window: int = DEFAULT_WINDOW):
+        self.decompose_swaps = decompose_swaps
+        self.window = window
+
+    def optimize(self, ir: CircuitIR) -> CircuitIR:
+        """Runs the pass over the IR of a circuit.
+
+        Args:
+            ir (CircuitIR): gates in circuit order.
+
+        Returns:
+            CircuitIR: the remaining gates, in circuit order.
+        """
+        self._gates: List[Optional[Gate]] = []
+        self._stacks = {}
+
+        for index, (opcode, qubit0, qubit1) in enumerate(zip(ir.opcode.tolist(), ir.qubit0.tolist(), ir.qubit1.tolist())):
+            qubits = (qubit0,) if qubit1 == NO_QUBIT else (qubit0, qubit1)
+            if self.decompose_swaps and opcode == SWAP_OPCODE:
+                node1, node2 = self._swap_orientation(qubits)
+                for control, target in ((node1, node2), (node2, node1), (node1, node2)):
+                    self._insert((CX_OPCODE, (control, target), NO_ORIGIN))
+            else:
+                self._insert((opcode, qubits, index))
+
+        output = IRBuilder(ir.nqubits)
+        for gate in self._gates:
+            if gate is not None:
+                opcode, qubits, origin = gate
+                output.append(opcode, qubits[0], qubits[1] if len(qubits) == 2 else NO_QUBIT, origin)
+        return output.build(ir)
+
+    def _insert(self, gate: Gate) -> None:
+        opcode, qubits, _ = gate
+
+        partner = self._find_inverse(gate)
+        if partner is not None:
+            self._remove(partner)
+            return
+
+        if len(qubits) == 2 and not self.decompose_swaps:
+            last = self._last(qubits[0])
+            if last is not None and last == self._last(qubits[1]):
+                previous = self._gates[last]
+                if sorted(previous[1]) == sorted(qubits) and {previous[0], opcode} == {SWAP_OPCODE, CX_OPCODE}:
+                    self._remove(last)
+                    for merged in self._merge_swap_cnot(previous, gate):
+                        self._insert(merged)
+                    return
+
+        index = len(self._gates)
+        self._gates.append(gate)
+        for qubit in qubits:
+            self._stacks.setdefault(qubit, []).append(index)
+
+    def _swap_orientation(self, qubits: Tuple[int, int]) -> Tuple[int, int]:
+        """Orders the qubits of a SWAP to be decomposed so that its first CNOT cancels with a CNOT right before it."""
+        node1, node2 = qubits
+        last = self._last(node1)
+        if last is not None and last == self._last(node2) and self._gates[last][0] == CX_OPCODE:
+            return self._gates[last][1]
+        return node1, node2
+
+    def _last(self, qubit: int) -> Optional[int]:
+        """Index of the last gate still alive on the qubit, dropping removed gates from the top of its stack."""
+        stack = self._stacks.get(qubit)
+        while stack and self._gates[stack[-1]] is None:
+            stack.pop()
+        return stack[-1] if stack else None
+
+    def _remove(self, index: int) -> None:
+        self._gates[index] = None
+
+    def _find_inverse(self, gate: Gate) -> Optional[int]:
+        """Looks, on every qubit of the gate, for the last gate that does not commute with it. Returns its index if it
+        is the same gate on all the qubits and it is the inverse of the new gate."""
+        if gate[0] not in SELF_INVERSE_GATES and gate[0] not in INVERSE_PAIRS:
+            return None
+
+        candidate = None
+        for qubit in gate[1]:
+            found = None
+            stack = self._stacks.get(qubit, [])
+            self._last(qubit)
+            for position in range(len(stack) - 1, max(len(stack) - 1 - self.window, -1), -1):
+                previous = self._gates[stack[position]]
+                if previous is None:
+                    continue
+                if is_inverse(previous, gate):
+                    found = stack[position]
+                    break
+                if not commute(previous, gate):
+                    break
+            if found is None or (candidate is not None and found != candidate):
+                return None
+            candidate = found
+        return candidate
+
+    @staticmethod
+    def _merge_swap_cnot(first: Gate, second: Gate) -> List[Gate]:
+        """Two CNOTs equivalent to a SWAP and a CNOT acting on the same qubits.
+
+        CNOT(c, t) SWAP = CNOT(c, t) CNOT(c, t) CNOT(t, c) CNOT(c, t) = CNOT(t, c) CNOT(c, t), and
+        SWAP CNOT(c, t) = CNOT(c, t) CNOT(t, c) CNOT(c, t) CNOT(c, t) = CNOT(c, t) CNOT(t, c).
+        """
+        if first[0] == CX_OPCODE:
+            control, target = first[1]
+            return [(CX_OPCODE, (target, control), NO_ORIGIN), (CX_OPCODE, (control, target), NO_ORIGIN)]
+        control, target = second[1]
+        return [(CX_OPCODE, (control, target), NO_ORIGIN), (CX_OPCODE, (target, control), NO_ORIGIN)]
+
+
+def is_inverse(gate1: Gate, gate2: Gate) -> bool:
+    opcode1, qubits1 = gate1[0], gate1[1]
+    opcode2, qubits2 = gate2[0], gate2[1]
+    if opcode1 in SELF_INVERSE_GATES:
+        if opcode1 != opcode2:
+            return False
+    elif INVERSE_PAIRS.get(opcode1) != opcode2:
+        return False
+
+    if opcode1 in SYMMETRIC_GATES:
+        return sorted(qubits1) == sorted(qubits2)
+    return qubits1 == qubits2
+
+
+def gate_axis(gate: Gate, qubit: int) -> Optional[str]:
+    """Returns "z" if the gate is diagonal on the qubit, "x" if it acts on it as a function of X, and None otherwise."""
+    opcode = gate[0]
+    if opcode in Z_AXIS_GATES:
+        return "z"
+    if opcode in X_AXIS_GATES:
+        return "x"
+    if opcode == CX_OPCODE:
+        return "z" if qubit == gate[1][0] else "x"
+    return None
+
+
+def commute(gate1: Gate, gate2: Gate) -> bool:
+    """Sufficient condition for two gates to commute: on every shared qubit both are diagonal or both are functions
+    of X."""
+    for qubit in set(gate1[1]).intersection(gate2[1]):
+        axis = gate_axis(gate1, qubit)
+        if axis is None or axis != gate_axis(gate2, qubit):
+            return False
+    return True
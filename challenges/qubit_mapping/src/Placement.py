@@ -0,0 +1,164 @@
+"""Initial placement of the virtual qubits on the device from their weighted interaction graph.
+
+Every pair of virtual qubits gets a weight that counts their two qubit gates, the early gates counting more since the
+routing can adapt the mapping to the later ones. A placement is scored by the weighted distance between the nodes of
+the interacting pairs: the qubits are placed greedily, each one next to the qubits it interacts the most with, and the
+placement is then improved by swapping the nodes of two qubits, or moving a qubit to a free node, while that lowers the
+score.
+"""
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from qibo import gates
+
+from Topology import Topology
+
+# Weight of a gate on timestep t, relative to one on the first timestep: 1 / (1 + TIME_DECAY * t)
+TIME_DECAY = 1.0
+
+_TOLERANCE = 1e-9
+
+
+def interaction_matrix(
+    timesteps: Sequence[Sequence[gates.Gate]], nqubits: Optional[int] = None, decay: float = TIME_DECAY
+) -> np.ndarray:
+    """Symmetric matrix of the interaction weights between the virtual qubits: every two qubit gate on timestep t adds
+    1 / (1 + decay * t) to the entry of its pair.
+
+    Args:
+        timesteps (Sequence[Sequence[gates.Gate]]): gates of the circuit grouped by timestep.
+        nqubits (int, optional): number of virtual qubits. Defaults to the largest qubit acted upon + 1.
+        decay (float, optional): how fast the weight of the later timesteps decreases, 0 weights every gate the same.
+            Defaults to TIME_DECAY.
+
+    Returns:
+        np.ndarray: (nqubits, nqubits) interaction weights, with a zero diagonal.
+    """
+    first: List[int] = []
+    second: List[int] = []
+    steps: List[int] = []
+    largest = -1
+    for step, layer in enumerate(timesteps):
+        for gate in layer:
+            largest = max(largest, *gate.qubits)
+            if len(gate.qubits) == 2:
+                first.append(gate.qubits[0])
+                second.append(gate.qubits[1])
+                steps.append(step)
+
+    size = largest + 1 if nqubits is None else nqubits
+    weights = np.zeros((size, size))
+    if steps:
+        step_weights = 1 / (1 + decay * np.array(steps, dtype=float))
+        np.add.at(weights, (first, second), step_weights)
+        weights += weights.T
+    return weights
+
+
+def placement_cost(weights: np.ndarray, placement: Dict[int, int], topology: Topology) -> float:
+    """Weighted distance between the nodes of every interacting pair of qubits, each pair counted once."""
+    qubits = np.array(sorted(placement), dtype=np.int64)
+    nodes = np.array([placement[qubit] for qubit in qubits.tolist()], dtype=np.int64)
+    distance = topology.distance[np.ix_(nodes, nodes)]
+    return float((weights[np.ix_(qubits, qubits)] * distance).sum() / 2)
+
+
+def weighted_placement(weights: np.ndarray, topology: Topology, max_iterations: Optional[int] = None) -> Dict[int, int]:
+    """Places the virtual qubits with interactions on the device, minimising the weighted distance between the nodes
+    of the interacting pairs: greedy placement followed by local swap refinement. Qubits without two qubit gates are
+    left out, to be placed on the remaining nodes.
+
+    Args:
+        weights (np.ndarray): (nqubits, nqubits) symmetric interaction weights, as built by interaction_matrix.
+        topology (Topology): coupling map of the device.
+        max_iterations (int, optional): maximum number of refinement moves. Defaults to no limit, the refinement stops
+            at a local minimum.
+
+    Raises:
+        ValueError: If there are more virtual qubits than nodes on the device.
+
+    Returns:
+        Dict[int, int]: virtual qubit -> physical qubit.
+    """
+    active = np.flatnonzero(weights.any(axis=1))
+    if not len(active):
+        return {}
+    nodes = np.array(topology.nodes, dtype=np.int64)
+    if len(active) > len(nodes):
+        raise ValueError(f"{len(active)} interacting qubits do not fit on a device with {len(nodes)} nodes")
+
+    # Work on the interacting qubits and on the positions of the nodes in topology.nodes
+    local_weights = weights[np.ix_(active, active)].astype(float)
+    distance = topology.distance[np.ix_(nodes, nodes)].astype(float)
+    distance[distance < 0] = len(nodes)
+
+    positions = _greedy_positions(local_weights, distance)
+    positions = _refine_positions(local_weights, distance, positions, max_iterations)
+    return {int(qubit): int(nodes[position]) for qubit, position in zip(active, positions[: len(active)])}
+
+
+def _greedy_positions(weights: np.ndarray, distance: np.ndarray) -> np.ndarray:
+    """Places the most connected qubit on the most central node, then repeatedly the qubit with the highest weight
+    towards the placed ones on the free node closest to them, ties going to the most central node.
+
+    Returns:
+        np.ndarray: position of every qubit followed by the free positions, a permutation of the positions.
+    """
+    nqubits = len(weights)
+    centrality = distance.sum(axis=1)
+    strength = weights.sum(axis=1)
+
+    positions = np.full(nqubits, -1, dtype=np.int64)
+    free = np.ones(len(distance), dtype=bool)
+    # attraction[q]: weight between q and the placed qubits, costs[q, p]: weighted distance of q on p to them
+    attraction = np.zeros(nqubits)
+    costs = np.zeros((nqubits, len(distance)))
+    for _ in range(nqubits):
+        unplaced = np.flatnonzero(positions < 0)
+        candidates = unplaced[attraction[unplaced] >= attraction[unplaced].max() - _TOLERANCE]
+        qubit = int(candidates[np.argmax(strength[candidates])])
+
+        free_positions = np.flatnonzero(free)
+        order = np.lexsort((centrality[free_positions], costs[qubit, free_positions]))
+        position = int(free_positions[order[0]])
+
+        positions[qubit] = position
+        free[position] = False
+        attraction += weights[:, qubit]
+        costs += np.outer(weights[:, qubit], distance[position])
+
+    return np.concatenate([positions, np.flatnonzero(free)])
+
+
+def _refine_positions(
+    weights: np.ndarray, distance: np.ndarray, positions: np.ndarray, max_iterations: Optional[int]
+) -> np.ndarray:
+    """Applies the exchange of positions that lowers the cost the most until none does. The free positions are held by
+    qubits without weights, so an exchange with one of them moves a qubit to a free node.
+
+    With M[a, p] = sum_c W[a, c] D[p, pos(c)], exchanging a and b changes the cost by
+    M[a, pos(b)] - M[a, pos(a)] + M[b, pos(a)] - M[b, pos(b)] + 2 W[a, b] D[pos(a), pos(b)], and M only gets a rank
+    one update after every exchange.
+    """
+    size = len(positions)
+    padded = np.zeros((size, size))
+    padded[: len(weights), : len(weights)] = weights
+    positions = positions.copy()
+    pull = padded @ distance[positions]
+
+    iteration = 0
+    while max_iterations is None or iteration < max_iterations:
+        at_positions = pull[:, positions]
+        own = np.diagonal(at_positions)
+        change = at_positions - own[:, None]
+        change = change + change.T + 2 * padded * distance[np.ix_(positions, positions)]
+        first, second = np.unravel_index(np.argmin(change), change.shape)
+        if change[first, second] >= -_TOLERANCE:
+            break
+
+        old, new = positions[first], positions[second]
+        pull += np.outer(padded[:, first] - padded[:, second], distance[new] - distance[old])
+        positions[first], positions[second] = new, old
+        iteration += 1
+
+    return positions
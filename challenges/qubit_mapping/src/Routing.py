@@ -0,0 +1,626 @@
+import copy
+import random
+from dataclasses import dataclass, field
+from typing import Dict, Generator, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+from qibo import gates
+
+from CircuitDag import CircuitDag, NO_GATE
+from GateIR import CircuitIR, IRBuilder, NO_QUBIT, SWAP_OPCODE, gate_rows, string_gate
+from Topology import Topology
+
+DEFAULT_STREAM_WINDOW = 64
+
+# Routed gates of a stream, returning the final mapping when the input is exhausted
+GateStream = Generator[gates.Gate, None, Dict[int, int]]
+
+
+@dataclass
+class RoutingResult:
+    """Output of a routing engine.
+
+    Attributes:
+        ir (CircuitIR): the routed gates, acting on the physical qubits of the device.
+        final_mapping (Dict[int, int]): virtual qubit -> physical qubit after the last gate.
+        swaps (int): number of SWAP gates inserted.
+        depth (int): number of timesteps of the routed circuit, SWAPs included.
+    """
+
+    ir: CircuitIR
+    final_mapping: Dict[int, int]
+    swaps: int
+    depth: int = field(init=False)
+
+    def __post_init__(self):
+        self.depth = CircuitDag(self.ir).depth()
+
+
+class Router:
+    """Base class of the routing engines. A router takes the dependency DAG of a circuit and an initial mapping of
+    virtual to physical qubits, and inserts the SWAP gates needed for every two qubit gate to act on coupled qubits.
+    """
+
+    def route(self, dag: CircuitDag, initial_mapping: Dict[int, int], topology: Topology) -> RoutingResult:
+        raise NotImplementedError
+
+    def refine_mapping(self, dag: CircuitDag, initial_mapping: Dict[int, int], topology: Topology) -> Dict[int, int]:
+        """Hook to improve the initial mapping before routing. By default the mapping is kept as it is."""
+        return complete_mapping(initial_mapping, dag.nqubits, topology)
+
+    def seeded(self, seed: int) -> "Router":
+        """Returns a router whose random choices are driven by the seed. Deterministic routers return themselves."""
+        return self
+
+    def route_stream(
+        self,
+        circuit_gates: Iterable[gates.Gate],
+        initial_mapping: Dict[int, int],
+        topology: Topology,
+        window: int = DEFAULT_STREAM_WINDOW,
+    ) -> GateStream:
+        """Routes a stream of gates, reading the input lazily and yielding the routed gates as soon as they are decided.
+        Only the mapping and at most `window` pending gates are kept, so the memory does not grow with the length of
+        the stream. Virtual qubits missing from the initial mapping are placed on the free physical qubits, in
+        increasing order, when they first appear.
+
+        Args:
+            circuit_gates (Iterable[gates.Gate]): gates in circuit order, qibo gates or IRGate.
+            initial_mapping (Dict[int, int]): virtual qubit -> physical qubit.
+            topology (Topology): coupling map of the device.
+            window (int, optional): maximum number of input gates held at once. Defaults to DEFAULT_STREAM_WINDOW.
+
+        Returns:
+            GateStream: generator of the routed qibo gates, whose return value is the final mapping.
+        """
+        raise NotImplementedError
+
+
+class GreedyRouter(Router):
+    """Routes the gates one at a time: when a two qubit gate acts on uncoupled qubits, the first qubit is swapped along
+    a shortest path until it is next to the second one.
+    """
+
+    def route(self, dag: CircuitDag, initial_mapping: Dict[int, int], topology: Topology) -> RoutingResult:
+        mapping = complete_mapping(initial_mapping, dag.nqubits, topology)
+        # Inverse of the mapping, physical qubit -> virtual qubit, so that SWAPs update both in O(1)
+        layout = {node: qubit for qubit, node in mapping.items()}
+        edges = topology.edges
+        next_hop = topology.next_hop
+        opcode = dag.ir.opcode.tolist()
+        qubit0 = dag.qubit0.tolist()
+        qubit1 = dag.qubit1.tolist()
+        output = IRBuilder(topology.num_nodes)
+        swaps = 0
+
+        for index in dag.topological_order():
+
+            # If the gate is a single qubit gate, add it to the output circuit following the mapping
+            if qubit1[index] == NO_QUBIT:
+                output.append(opcode[index], mapping[qubit0[index]], NO_QUBIT, index)
+                continue
+
+            # If the qubits are connected, add the gate to the output circuit following the mapping
+            source, target = mapping[qubit0[index]], mapping[qubit1[index]]
+            if (source, target) not in edges:
+                # If the qubits are not connected, follow the shortest path between them and add SWAP gates
+                # up the second to last qubit in the path. At each swap, update the mapping.
+                next_node = int(next_hop[source, target])
+                while next_node != target:
+                    output.append(SWAP_OPCODE, source, next_node)
+                    swap_nodes(mapping, layout, source, next_node)
+                    swaps += 1
+                    source = next_node
+                    next_node = int(next_hop[source, target])
+
+            output.append(opcode[index], source, target, index)
+
+        return RoutingResult(output.build(dag.ir), mapping, swaps)
+
+    def route_stream(
+        self,
+        circuit_gates: Iterable[gates.Gate],
+        initial_mapping: Dict[int, int],
+        topology: Topology,
+        window: int = DEFAULT_STREAM_WINDOW,
+    ) -> GateStream:
+        """Same as route on a stream of gates. Gates are routed one at a time, so the window is not used."""
+        mapping = dict(initial_mapping)
+        layout = {node: qubit for qubit, node in mapping.items()}
+
+        for spec, qubits, parameters in gate_rows(circuit_gates):
+            _place_qubits(qubits, mapping, layout, topology)
+            if len(qubits) == 1:
+                yield string_gate(spec.name, (mapping[qubits[0]],), parameters)
+                continue
+
+            source, target = mapping[qubits[0]], mapping[qubits[1]]
+            if (source, target) not in topology.edges:
+                next_node = int(topology.next_hop[source, target])
+                while next_node != target:
+                    yield gates.SWAP(source, next_node)
+                    swap_nodes(mapping, layout, source, next_node)
+                    source = next_node
+                    next_node = int(topology.next_hop[source, target])
+
+            yield string_gate(spec.name, (source, target), parameters)
+
+        return mapping
+
+
+class SabreRouter(Router):
+    """Lookahead router based on SABRE (Li, Ding and Xie, "Tackling the Qubit Mapping Problem for NISQ-Era Quantum
+    Devices", 2019).
+
+    All the gates of the front layer that can be executed are executed first. When none is left, every SWAP on an edge
+    touching a front layer qubit is scored by the distance it leaves between the qubits of the front layer gates, plus
+    a weighted term for a window of upcoming two qubit gates. A decay factor penalises moving the same qubits over and
+    over, which spreads the SWAPs and keeps the depth low.
+
+    Args:
+        lookahead (int, optional): number of upcoming two qubit gates scored with the front layer. Defaults to 20.
+        lookahead_weight (float, optional): weight of the upcoming gates in the score. Defaults to 0.5.
+        decay_delta (float, optional): decay added to both qubits of a chosen SWAP. Defaults to 0.001.
+        decay_reset (int, optional): number of SWAPs after which the decay is reset. Defaults to 5.
+        passes (int, optional): forward-backward passes used by refine_mapping. Defaults to 1.
+        seed (int, optional): seed used to break ties between equally scored SWAPs. If None, the first candidate in
+            sorted order is taken. Defaults to None.
+        parallel_swaps (bool, optional): insert, with the best SWAP, the SWAPs on disjoint edges that also bring the
+            front layer closer, so that SWAP layers run in parallel and the depth drops, usually at the cost of more
+            SWAPs. Defaults to False.
+    """
+
+    def __init__(
+        self,
+        lookahead: int = 20,
+        lookahead_weight: float = 0.5,
+        decay_delta: float = 0.001,
+        decay_reset: int = 5,
+        passes: int = 1,
+        seed: Optional[int] = None,
+        parallel_swaps: bool = False,
+    ):
+        self.lookahead = lookahead
+        self.lookahead_weight = lookahead_weight
+        self.decay_delta = decay_delta
+        self.decay_reset = decay_reset
+        self.passes = passes
+        self.seed = seed
+        self.parallel_swaps = parallel_swaps
+
+    def seeded(self, seed: int) -> "SabreRouter":
+        router = copy.copy(self)
+        router.seed = seed
+        return router
+
+    def route(self, dag: CircuitDag, initial_mapping: Dict[int, int], topology: Topology) -> RoutingResult:
+        output = IRBuilder(topology.num_nodes)
+        mapping, swaps = self._run(dag, initial_mapping, topology, output)
+        return RoutingResult(output.build(dag.ir), mapping, swaps)
+
+    def refine_mapping(self, dag: CircuitDag, initial_mapping: Dict[int, int], topology: Topology) -> Dict[int, int]:
+        """Routes the circuit forwards and then backwards (the reversed gate sequence) starting from the final mapping
+        of the forward pass. The final mapping of the backward pass is a mapping that suits the beginning of the circuit.
+
+        Args:
+            dag (CircuitDag): dependency DAG of the circuit.
+            initial_mapping (Dict[int, int]): mapping to refine.
+            topology (Topology): coupling map of the device.
+
+        Returns:
+            Dict[int, int]: the refined initial mapping.
+        """
+        reversed_dag = dag.reversed()
+        mapping = complete_mapping(initial_mapping, dag.nqubits, topology)
+        for _ in range(self.passes):
+            mapping, _ = self._run(dag, mapping, topology, None)
+            mapping, _ = self._run(reversed_dag, mapping, topology, None)
+        return mapping
+
+    def route_stream(
+        self,
+        circuit_gates: Iterable[gates.Gate],
+        initial_mapping: Dict[int, int],
+        topology: Topology,
+        window: int = DEFAULT_STREAM_WINDOW,
+    ) -> GateStream:
+        """Same as route on a stream of gates. The DAG is replaced by a sliding window of the next `window` input gates:
+        the front layer is made of the pending gates that no earlier pending gate shares a qubit with, and the other
+        two qubit gates of the window are the lookahead. The mapping is not refined, as that needs the whole circuit.
+        """
+        rng = random.Random(self.seed) if self.seed is not None else None
+        mapping = dict(initial_mapping)
+        layout = {node: qubit for qubit, node in mapping.items()}
+        edges = topology.edges
+        distance = topology.distance
+        incident_edges = _incident_edges(topology)
+        decay = np.ones(topology.num_nodes)
+        max_stalled_swaps = 3 * max(int(distance.max()), 1) + 10
+
+        rows = gate_rows(circuit_gates)
+        pending: List[Tuple] = []
+        exhausted = False
+        swaps_since_reset = 0
+        stalled_swaps = 0
+
+        while True:
+            while not exhausted and len(pending) < max(window, 1):
+                row = next(rows, None)
+                if row is None:
+                    exhausted = True
+                    break
+                _place_qubits(row[1], mapping, layout, topology)
+                pending.append(row)
+            if not pending:
+                break
+
+            # Execute, in order, every pending gate that is not blocked by an earlier one and acts on coupled qubits
+            blocked = set()
+            front = []
+            lookahead = []
+            remaining = []
+            for row in pending:
+                spec, qubits, parameters = row
+                nodes = tuple(mapping[qubit] for qubit in qubits)
+                if blocked.isdisjoint(qubits):
+                    if len(nodes) == 1 or nodes in edges:
+                        yield string_gate(spec.name, nodes, parameters)
+                        continue
+                    front.append(nodes)
+                elif len(nodes) == 2 and len(lookahead) < self.lookahead:
+                    lookahead.append(nodes)
+                blocked.update(qubits)
+                remaining.append(row)
+
+            if len(remaining) < len(pending):
+                pending = remaining
+                decay[:] = 1
+                swaps_since_reset = 0
+                stalled_swaps = 0
+                continue
+
+            if stalled_swaps >= max_stalled_swaps:
+                source, target = front[0]
+                next_node = int(topology.next_hop[source, target])
+                while next_node != target:
+                    yield gates.SWAP(source, next_node)
+                    swap_nodes(mapping, layout, source, next_node)
+                    source = next_node
+                    next_node = int(topology.next_hop[source, target])
+                stalled_swaps = 0
+                continue
+
+            layer = self._swap_layer(
+                front,
+                np.array(lookahead, dtype=np.int32).reshape(-1, 2),
+                incident_edges,
+                distance,
+                decay,
+                rng,
+            )
+            for node1, node2 in layer:
+                yield gates.SWAP(node1, node2)
+                swap_nodes(mapping, layout, node1, node2)
+                decay[node1] += self.decay_delta
+                decay[node2] += self.decay_delta
+            stalled_swaps += len(layer)
+            swaps_since_reset += len(layer)
+            if swaps_since_reset >= self.decay_reset:
+                decay[:] = 1
+                swaps_since_reset = 0
+
+        return mapping
+
+    def _run(
+        self,
+        dag: CircuitDag,
+        initial_mapping: Dict[int, int],
+        topology: Topology,
+        output: Optional[IRBuilder],
+    ):
+        """Routes the DAG. Routed gates are appended to output, unless it is None (mapping refinement passes).
+
+        Returns:
+            Tuple[Dict[int, int], int]: the final mapping and the number of SWAPs inserted.
+        """
+        rng = random.Random(self.seed) if self.seed is not None else None
+        mapping = complete_mapping(initial_mapping, dag.nqubits, topology)
+        layout = {node: qubit for qubit, node in mapping.items()}
+        edges = topology.edges
+        distance = topology.distance
+        incident_edges = _incident_edges(topology)
+        opcode = dag.ir.opcode.tolist()
+        qubit0 = dag.qubit0.tolist()
+        qubit1 = dag.qubit1.tolist()
+        successors = dag.successors.tolist()
+        pending = (dag.predecessors != NO_GATE).sum(axis=1).tolist()
+        decay = np.ones(topology.num_nodes)
+        # Bound on the SWAPs without executing any gate, after which the first front gate is routed greedily
+        max_stalled_swaps = 3 * max(int(distance.max()), 1) + 10
+
+        front = [index for index in range(len(dag)) if pending[index] == 0]
+        swaps = 0
+        swaps_since_reset = 0
+        stalled_swaps = 0
+
+        while front:
+            # Execute every gate of the front layer that acts on coupled qubits, until none is left
+            executed = True
+            while executed:
+                executed = False
+                remaining = []
+                for index in front:
+                    if qubit1[index] == NO_QUBIT:
+                        if output is not None:
+                            output.append(opcode[index], mapping[qubit0[index]], NO_QUBIT, index)
+                    elif (mapping[qubit0[index]], mapping[qubit1[index]]) in edges:
+                        if output is not None:
+                            output.append(opcode[index], mapping[qubit0[index]], mapping[qubit1[index]], index)
+                    else:
+                        remaining.append(index)
+                        continue
+                    executed = True
+                    for successor in successors[index]:
+                        if successor != NO_GATE:
+                            pending[successor] -= 1
+                            if pending[successor] == 0:
+                                remaining.append(successor)
+                front = remaining
+                if executed:
+                    decay[:] = 1
+                    swaps_since_reset = 0
+                    stalled_swaps = 0
+
+            if not front:
+                break
+
+            if stalled_swaps >= max_stalled_swaps:
+                # Release valve: bring the qubits of the first front gate together along a shortest path
+                source, target = mapping[qubit0[front[0]]], mapping[qubit1[front[0]]]
+                next_node = int(topology.next_hop[source, target])
+                while next_node != target:
+                    self._apply_swap(source, next_node, mapping, layout, output)
+                    swaps += 1
+                    source = next_node
+                    next_node = int(topology.next_hop[source, target])
+                stalled_swaps = 0
+                continue
+
+            layer = self._swap_layer(
+                [(mapping[qubit0[index]], mapping[qubit1[index]]) for index in front],
+                self._lookahead_pairs(front, qubit0, qubit1, successors, mapping),
+                incident_edges,
+                distance,
+                decay,
+                rng,
+            )
+            for node1, node2 in layer:
+                self._apply_swap(node1, node2, mapping, layout, output)
+                decay[node1] += self.decay_delta
+                decay[node2] += self.decay_delta
+            swaps += len(layer)
+            stalled_swaps += len(layer)
+            swaps_since_reset += len(layer)
+            if swaps_since_reset >= self.decay_reset:
+                decay[:] = 1
+                swaps_since_reset = 0
+
+        return mapping, swaps
+
+    def _swap_layer(self, pairs, lookahead_pairs, incident_edges, distance, decay, rng) -> List[Tuple[int, int]]:
+        """Scores every SWAP on an edge touching a qubit of the front layer and returns the SWAPs to insert: the best
+        one and, with parallel_swaps, the next best SWAPs on disjoint edges, each one kept only if it brings the front
+        layer gates closer together. The SWAPs of a layer form a matching of the coupling graph, so they run in a single
+        timestep.
+
+        Args:
+            pairs (List[Tuple[int, int]]): physical qubits of the front layer gates.
+            lookahead_pairs (np.ndarray): (P, 2) physical qubits of the upcoming two qubit gates.
+            incident_edges (Dict[int, List[Tuple[int, int]]]): SWAPs touching each physical qubit.
+            distance (np.ndarray): distance matrix of the topology.
+            decay (np.ndarray): decay factor of each physical qubit.
+            rng (random.Random | None): generator breaking the ties, the first candidate is taken if None.
+
+        Returns:
+            List[Tuple[int, int]]: physical qubits of the SWAPs, on disjoint edges.
+        """
+        front_pairs = np.array(pairs, dtype=np.int32)
+
+        candidates = set()
+        for pair in pairs:
+            for node in pair:
+                candidates.update(incident_edges[node])
+        candidates = sorted(candidates)
+        candidate_array = np.array(candidates, dtype=np.int32)
+
+        front_distance = self._swapped_distance(front_pairs, candidate_array, distance)
+        scores = front_distance / len(front_pairs)
+        if len(lookahead_pairs):
+            scores += (
+                self.lookahead_weight
+                * self._swapped_distance(lookahead_pairs, candidate_array, distance)
+                / len(lookahead_pairs)
+            )
+        scores *= np.maximum(decay[candidate_array[:, 0]], decay[candidate_array[:, 1]])
+
+        best = np.flatnonzero(scores <= scores.min() + 1e-10)
+        choice = int(best[0] if rng is None else rng.choice(best.tolist()))
+        layer = [candidates[choice]]
+        if not self.parallel_swaps or len(pairs) < 2:
+            return layer
+
+        # A SWAP is only worth adding if, on its own, it scores better than inserting no SWAP
+        current = sum(distance[node1, node2] for node1, node2 in pairs) / len(pairs)
+        if len(lookahead_pairs):
+            current += (
+                self.lookahead_weight
+                * distance[lookahead_pairs[:, 0], lookahead_pairs[:, 1]].sum()
+                / len(lookahead_pairs)
+            )
+
+        # Positions of the front layer qubits once the SWAPs of the layer are applied
+        used = set(layer[0])
+        positions = {node: node for pair in pairs for node in pair}
+        self._move(positions, *layer[0])
+        total = front_distance[choice]
+        for index in np.argsort(scores, kind="stable").tolist():
+            node1, node2 = candidates[index]
+            if scores[index] >= current:
+                break
+            if node1 in used or node2 in used:
+                continue
+            moved = dict(positions)
+            self._move(moved, node1, node2)
+            moved_total = sum(distance[moved[node_a], moved[node_b]] for node_a, node_b in pairs)
+            if moved_total < total:
+                layer.append((node1, node2))
+                used.update((node1, node2))
+                positions = moved
+                total = moved_total
+        return layer
+
+    @staticmethod
+    def _move(positions: Dict[int, int], node1: int, node2: int) -> None:
+        """Updates the current node of the tracked qubits (keyed by their node before the layer) after a SWAP."""
+        for start, node in positions.items():
+            if node == node1:
+                positions[start] = node2
+            elif node == node2:
+                positions[start] = node1
+
+    def _lookahead_pairs(self, front, qubit0, qubit1, successors, mapping) -> np.ndarray:
+        """Physical qubits of the next `lookahead` two qubit gates after the front layer, in breadth first order."""
+        pairs = []
+        seen = set(front)
+        queue = list(front)
+        position = 0
+        while position < len(queue) and len(pairs) < self.lookahead:
+            for successor in successors[queue[position]]:
+                if successor == NO_GATE or successor in seen:
+                    continue
+                seen.add(successor)
+                queue.append(successor)
+                if qubit1[successor] != NO_QUBIT:
+                    pairs.append((mapping[qubit0[successor]], mapping[qubit1[successor]]))
+            position += 1
+        return np.array(pairs[: self.lookahead], dtype=np.int32).reshape(-1, 2)
+
+    @staticmethod
+    def _swapped_distance(pairs: np.ndarray, candidates: np.ndarray, distance: np.ndarray) -> np.ndarray:
+        """Total distance between the qubits of every pair after applying each candidate SWAP.
+
+        Args:
+            pairs (np.ndarray): (P, 2) physical qubits of the gates.
+            candidates (np.ndarray): (C, 2) physical qubits of the SWAPs.
+            distance (np.ndarray): distance matrix of the topology.
+
+        Returns:
+            np.ndarray: (C,) summed distances.
+        """
+        node1 = candidates[:, 0, None]
+        node2 = candidates[:, 1, None]
+        swapped = []
+        for column in (0, 1):
+            nodes = pairs[None, :, column]
+            swapped.append(np.where(nodes == node1, node2, np.where(nodes == node2, node1, nodes)))
+        return distance[swapped[0], swapped[1]].sum(axis=1).astype(float)
+
+    @staticmethod
+    def _apply_swap(node1, node2, mapping, layout, output) -> None:
+        swap_nodes(mapping, layout, node1, node2)
+        if output is not None:
+            output.append(SWAP_OPCODE, node1, node2)
+
+
+def _incident_edges(topology: Topology) -> Dict[int, List[Tuple[int, int]]]:
+    """Edges touching each node, as (smaller node, larger node), i.e. the SWAPs that move a qubit on that node."""
+    return {
+        node: [(min(node, neighbor), max(node, neighbor)) for neighbor in node_neighbors]
+        for node, node_neighbors in topology.neighbors.items()
+    }
+
+
+ROUTERS = {"greedy": GreedyRouter, "sabre": SabreRouter}
+
+
+def get_router(router: Union[str, Router]) -> Router:
+    """Returns a routing engine from its name ("greedy" or "sabre") or the router itself.
+
+    Raises:
+        ValueError: If the router name is not supported.
+    """
+    if isinstance(router, Router):
+        return router
+    if router not in ROUTERS:
+        raise ValueError(f"Router {router} not supported")
+    return ROUTERS[router]()
+
+
+def complete_mapping(mapping: Dict[int, int], nqubits: int, topology: Topology) -> Dict[int, int]:
+    """Returns a copy of the mapping where every virtual qubit of the circuit without a physical qubit assigned is
+    placed on the free physical qubits, in increasing order.
+
+    Args:
+        mapping (Dict[int, int]): virtual qubit -> physical qubit.
+        nqubits (int): number of virtual qubits of the circuit.
+        topology (Topology): coupling map of the device.
+
+    Raises:
+        ValueError: If the circuit has more qubits than the device.
+
+    Returns:
+        Dict[int, int]: the completed mapping.
+    """
+    mapping = dict(mapping)
+    missing = [qubit for qubit in range(nqubits) if qubit not in mapping]
+    if not missing:
+        return mapping
+
+    used = set(mapping.values())
+    free = [node for node in topology.nodes if node not in used]
+    if len(free) < len(missing):
+        raise ValueError(f"Circuit with {nqubits} qubits does not fit in a device with {len(topology.nodes)} qubits")
+    for qubit, node in zip(missing, free):
+        mapping[qubit] = node
+    return mapping
+
+
+def _place_qubits(
+    qubits: Tuple[int, ...],
+    mapping: Dict[int, int],
+    layout: Dict[int, int],
+    topology: Topology,
+) -> None:
+    """Places the virtual qubits of a streamed gate that are not mapped yet on the next free physical qubits.
+
+    Raises:
+        ValueError: If there is no free physical qubit left.
+    """
+    for qubit in qubits:
+        if qubit in mapping:
+            continue
+        node = next((node for node in topology.nodes if node not in layout), None)
+        if node is None:
+            raise ValueError(f"Circuit does not fit in a device with {len(topology.nodes)} qubits")
+        mapping[qubit] = node
+        layout[node] = qubit
+
+
+def swap_nodes(mapping: Dict[int, int], layout: Dict[int, int], node1: int, node2: int) -> None:
+    """Updates in place the mapping (virtual -> physical) and its inverse layout (physical -> virtual) after a SWAP
+    between two physical qubits. Physical qubits without a virtual qubit assigned are allowed.
+
+    Args:
+        mapping (Dict[int, int]): virtual qubit -> physical qubit.
+        layout (Dict[int, int]): physical qubit -> virtual qubit.
+        node1 (int): first physical qubit of the SWAP.
+        node2 (int): second physical qubit of the SWAP.
+    """
+    qubit1 = layout.pop(node1, None)
+    qubit2 = layout.pop(node2, None)
+    if qubit1 is not None:
+        mapping[qubit1] = node2
+        layout[node2] = qubit1
+    if qubit2 is not None:
+        mapping[qubit2] = node1
+        layout[node1] = qubit2
@@ -0,0 +1,346 @@
+"""Optimal SWAP networks of small devices.
+
+For a coupling map with a handful of nodes, every arrangement of the qubits on the device can be enumerated, and a
+breadth first search over the arrangements, with one SWAP per edge as moves, gives the minimal number of SWAPs that
+reaches each of them (the token swapping problem). The tables are built offline and stored on disk, keyed by a hash of
+the coupling map:
+
+    python SwapTables.py DIRECTORY    # builds the tables of the star, line, ring and grid devices up to MAX_TABLE_NODES
+"""
+import hashlib
+import itertools
+import os
+import sys
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from CircuitDag import CircuitDag, NO_GATE
+from GateIR import IRBuilder, NO_QUBIT, SWAP_OPCODE
+from Routing import Router, RoutingResult, complete_mapping, swap_nodes
+from Topology import Topology, get_topology, grid_architecture, line_architecture, ring_architecture, star_architecture
+
+# 8! = 40320 arrangements, built in about a second
+MAX_TABLE_NODES = 8
+# Directory of the tables used by the transpiler when no cache is given
+SWAP_TABLE_DIR = os.environ.get("SWAP_TABLE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "qubit_mapping", "swap_tables"))
+NO_SWAP = -1
+UNREACHED = np.iinfo(np.uint8).max
+
+
+def topology_hash(topology: Topology) -> str:
+    """Hash of the nodes and edges of a coupling map, the key of its table on disk."""
+    return hashlib.sha1(repr((topology.nodes, topology.key)).encode()).hexdigest()
+
+
+class SwapTable:
+    """Minimal SWAP sequences between all the arrangements of the qubits of a small device.
+
+    Positions are the indices of the nodes in topology.nodes, and an arrangement R moves the qubit on position R[p] to
+    position p. Arrangements are numbered in lexicographic order, the one of itertools.permutations.
+
+    Attributes:
+        topology (Topology): the coupling map.
+        edges (np.ndarray): (E, 2) positions of the qubits of every SWAP.
+        swaps (np.ndarray): minimal number of SWAPs of every arrangement, UNREACHED on disconnected devices.
+        last_swap (np.ndarray): edge of the last SWAP of a minimal sequence of every arrangement, NO_SWAP for the
+            identity.
+        arrangements (np.ndarray): (N!, N) every arrangement.
+        inverse (np.ndarray): (N!, N) where inverse[r, p] is the position the qubit on position p is moved to.
+    """
+
+    def __init__(self, topology: Topology, swaps: np.ndarray, last_swap: np.ndarray):
+        self.topology = topology
+        position = {node: index for index, node in enumerate(topology.nodes)}
+        self.edges = np.array([(position[node1], position[node2]) for node1, node2 in topology.key], dtype=np.int64)
+        self.edges = self.edges.reshape(-1, 2)
+        self.swaps = swaps
+        self.last_swap = last_swap
+        size = len(topology.nodes)
+        self.arrangements = np.array(list(itertools.permutations(range(size))), dtype=np.int8).reshape(-1, size)
+        self.inverse = np.argsort(self.arrangements, axis=1).astype(np.int8)
+
+    @classmethod
+    def build(cls, topology: Topology) -> "SwapTable":
+        """Breadth first search from the identity, applying every SWAP of the device to every arrangement reached.
+
+        Raises:
+            ValueError: If the device has more than MAX_TABLE_NODES nodes.
+        """
+        size = len(topology.nodes)
+        if size > MAX_TABLE_NODES:
+            raise ValueError(f"Swap tables are limited to {MAX_TABLE_NODES} nodes, got {size}")
+
+        table = cls(topology, np.zeros(0, dtype=np.uint8), np.zeros(0, dtype=np.int8))
+        index = {arrangement: rank for rank, arrangement in enumerate(map(tuple, table.arrangements.tolist()))}
+        swaps = np.full(len(index), UNREACHED, dtype=np.uint8)
+        last_swap = np.full(len(index), NO_SWAP, dtype=np.int8)
+        edges = table.edges.tolist()
+
+        identity = tuple(range(size))
+        swaps[index[identity]] = 0
+        queue = deque([identity])
+        while queue:
+            arrangement = queue.popleft()
+            count = swaps[index[arrangement]] + 1
+            for edge, (position1, position2) in enumerate(edges):
+                moved = list(arrangement)
+                moved[position1], moved[position2] = moved[position2], moved[position1]
+                rank = index[tuple(moved)]
+                if swaps[rank] == UNREACHED:
+                    swaps[rank] = count
+                    last_swap[rank] = edge
+                    queue.append(tuple(moved))
+
+        table.swaps = swaps
+        table.last_swap = last_swap
+        return table
+
+    def rank(self, arrangement: Sequence[int]) -> int:
+        """Lexicographic index of an arrangement."""
+        remaining = list(range(len(arrangement)))
+        rank = 0
+        for position, value in enumerate(arrangement):
+            smaller = remaining.index(value)
+            rank = rank * (len(arrangement) - position) + smaller
+            remaining.pop(smaller)
+        return rank
+
+    def swap_sequence(self, rank: int) -> List[Tuple[int, int]]:
+        """Minimal sequence of SWAPs, as pairs of positions, that applied in order performs the arrangement.
+
+        Raises:
+            ValueError: If the arrangement cannot be reached on the device.
+        """
+        if self.swaps[rank] == UNREACHED:
+            raise ValueError("Arrangement not reachable on a disconnected device")
+        sequence = []
+        arrangement = self.arrangements[rank].tolist()
+        while self.last_swap[rank] != NO_SWAP:
+            position1, position2 = self.edges[self.last_swap[rank]].tolist()
+            sequence.append((position1, position2))
+            arrangement[position1], arrangement[position2] = arrangement[position2], arrangement[position1]
+            rank = self.rank(arrangement)
+        return sequence[::-1]
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(path, edges=self.edges, swaps=self.swaps, last_swap=self.last_swap)
+
+    @classmethod
+    def load(cls, path: str, topology: Topology) -> "SwapTable":
+        """Loads a table saved by save.
+
+        Raises:
+            ValueError: If the table was built for another coupling map.
+        """
+        with np.load(path) as data:
+            table = cls(topology, data["swaps"], data["last_swap"])
+            if not np.array_equal(data["edges"], table.edges):
+                raise ValueError(f"Swap table {path} does not match the topology")
+        return table
+
+
+class SwapTableCache:
+    """On-disk cache of swap tables, one file per coupling map named after its hash. Tables are kept in memory once
+    loaded.
+
+    Args:
+        directory (str): directory of the table files.
+        build_missing (bool, optional): build and store the table of a small device missing from the directory,
+            otherwise only prebuilt tables are used. Defaults to True.
+        max_nodes (int, optional): largest device with a table. Defaults to MAX_TABLE_NODES.
+    """
+
+    def __init__(self, directory: str, build_missing: bool = True, max_nodes: int = MAX_TABLE_NODES):
+        self.directory = directory
+        self.build_missing = build_missing
+        self.max_nodes = min(max_nodes, MAX_TABLE_NODES)
+        self._tables: Dict[str, SwapTable] = {}
+
+    def path(self, topology: Topology) -> str:
+        return os.path.join(self.directory, f"{topology_hash(topology)}.npz")
+
+    def get(self, topology: Topology) -> Optional[SwapTable]:
+        """Returns the table of the coupling map, or None if the device is too large or the table is not available."""
+        if not 0 < len(topology.nodes) <= self.max_nodes:
+            return None
+        key = topology_hash(topology)
+        table = self._tables.get(key)
+        if table is not None:
+            return table
+
+        path = self.path(topology)
+        if os.path.exists(path):
+            table = SwapTable.load(path, topology)
+        elif self.build_missing:
+            table = SwapTable.build(topology)
+            os.makedirs(self.directory, exist_ok=True)
+            table.save(path)
+        else:
+            return None
+        self._tables[key] = table
+        return table
+
+    def __getstate__(self):
+        # Worker processes reload the tables from disk
+        state = self.__dict__.copy()
+        state["_tables"] = {}
+        return state
+
+
+class TableRouter(Router):
+    """Router of small devices built on a swap table. Whenever no gate of the front layer can be executed, every
+    arrangement of the device is scored by its minimal number of SWAPs per front layer gate it makes executable, with
+    ties broken by executing more gates and then by the distance left for the next two qubit gates. A minimal SWAP
+    sequence reaching the best arrangement is inserted.
+
+    Args:
+        table (SwapTable): swap table of the device the circuits are routed on.
+    """
+
+    def __init__(self, table: SwapTable):
+        self.table = table
+
+    def route(self, dag: CircuitDag, initial_mapping: Dict[int, int], topology: Topology) -> RoutingResult:
+        table = self.table
+        if topology.key != table.topology.key:
+            raise ValueError("The swap table was built for another topology")
+
+        nodes = topology.nodes
+        position = {node: index for index, node in enumerate(nodes)}
+        adjacent = np.zeros((len(nodes), len(nodes)), dtype=bool)
+        adjacent[table.edges[:, 0], table.edges[:, 1]] = True
+        adjacent[table.edges[:, 1], table.edges[:, 0]] = True
+        distance = topology.distance[np.ix_(nodes, nodes)]
+        reachable = table.swaps != UNREACHED
+
+        mapping = complete_mapping(initial_mapping, dag.nqubits, topology)
+        layout = {node: qubit for qubit, node in mapping.items()}
+        opcode = dag.ir.opcode.tolist()
+        qubit0 = dag.qubit0.tolist()
+        qubit1 = dag.qubit1.tolist()
+        successors = dag.successors.tolist()
+        pending = (dag.predecessors != NO_GATE).sum(axis=1).tolist()
+        output = IRBuilder(topology.num_nodes)
+        swaps = 0
+
+        front = [index for index in range(len(dag)) if pending[index] == 0]
+        while front:
+            executed = True
+            while executed:
+                executed = False
+                remaining = []
+                for index in front:
+                    if qubit1[index] == NO_QUBIT:
+                        output.append(opcode[index], mapping[qubit0[index]], NO_QUBIT, index)
+                    elif (mapping[qubit0[index]], mapping[qubit1[index]]) in topology.edges:
+                        output.append(opcode[index], mapping[qubit0[index]], mapping[qubit1[index]], index)
+                    else:
+                        remaining.append(index)
+                        continue
+                    executed = True
+                    for successor in successors[index]:
+                        if successor != NO_GATE:
+                            pending[successor] -= 1
+                            if pending[successor] == 0:
+                                remaining.append(successor)
+                front = remaining
+
+            if not front:
+                break
+
+            pairs = np.array([(position[mapping[qubit0[i]]], position[mapping[qubit1[i]]]) for i in front])
+            upcoming = [
+                successor
+                for index in front
+                for successor in successors[index]
+                if successor != NO_GATE and qubit1[successor] != NO_QUBIT
+            ]
+            next_pairs = np.array(
+                [(position[mapping[qubit0[i]]], position[mapping[qubit1[i]]]) for i in upcoming], dtype=np.int64
+            ).reshape(-1, 2)
+
+            # Positions of the qubits of the gates after every arrangement, and the front gates each one makes executable
+            moved = table.inverse
+            executable = adjacent[moved[:, pairs[:, 0]], moved[:, pairs[:, 1]]].sum(axis=1)
+            candidates = np.flatnonzero(reachable & (executable > 0))
+            if not len(candidates):
+                raise ValueError("The qubits of a gate are on disconnected parts of the device")
+            lookahead = distance[moved[candidates][:, next_pairs[:, 0]], moved[candidates][:, next_pairs[:, 1]]]
+            keys = (lookahead.sum(axis=1), -executable[candidates], table.swaps[candidates] / executable[candidates])
+            best = candidates[np.lexsort(keys)[0]]
+
+            for position1, position2 in table.swap_sequence(int(best)):
+                node1, node2 = nodes[position1], nodes[position2]
+                output.append(SWAP_OPCODE, node1, node2)
+                swap_nodes(mapping, layout, node1, node2)
+                swaps += 1
+
+        return RoutingResult(output.build(dag.ir), mapping, swaps)
+
+
+def table_initial_mapping(table: SwapTable, weights: np.ndarray) -> Dict[int, int]:
+    """Exact placement of the virtual qubits on a small device: every arrangement of the table is scored by the
+    weighted distance between the qubits of each interacting pair, and the best one is taken.
+
+    Args:
+        table (SwapTable): swap table of the device.
+        weights (np.ndarray): (nqubits, nqubits) interaction weight between every pair of virtual qubits.
+
+    Returns:
+        Dict[int, int]: virtual qubit -> physical qubit.
+    """
+    nodes = table.topology.nodes
+    nqubits = len(weights)
+    distance = table.topology.distance[np.ix_(nodes, nodes)].astype(float)
+    # Virtual qubit q is placed on position placements[:, q]
+    placements = table.arrangements[:, :nqubits].astype(np.int64)
+    symmetric = weights + weights.T
+    first, second = np.nonzero(np.triu(symmetric, 1))
+    costs = distance[placements[:, first], placements[:, second]] @ symmetric[first, second]
+    best = int(np.argmin(costs))
+    return {qubit: nodes[position] for qubit, position in enumerate(placements[best].tolist())}
+
+
+DEVICES = {
+    "star": star_architecture,
+    "line": line_architecture,
+    "ring": ring_architecture,
+}
+
+
+def build_swap_tables(directory: str, max_nodes: int = MAX_TABLE_NODES) -> List[str]:
+    """Builds the tables of the star, line, ring and grid devices with 2 to max_nodes nodes.
+
+    Returns:
+        List[str]: the paths of the tables.
+    """
+    cache = SwapTableCache(directory, build_missing=True, max_nodes=max_nodes)
+    architectures = [builder(size) for builder in DEVICES.values() for size in range(2, max_nodes + 1)]
+    architectures += [
+        grid_architecture(rows, columns)
+        for rows in range(2, max_nodes + 1)
+        for columns in range(rows, max_nodes + 1)
+        if rows * columns <= max_nodes
+    ]
+    paths = []
+    for architecture in architectures:
+        topology = get_topology(architecture)
+        cache.get(topology)
+        paths.append(cache.path(topology))
+    return sorted(set(paths))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print("Usage: python SwapTables.py DIRECTORY")
+        return 2
+    for path in build_swap_tables(argv[0]):
+        print(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
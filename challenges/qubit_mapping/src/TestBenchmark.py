@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+
+from Benchmark import (
+    ARCHITECTURES,
+    CIRCUITS,
+    BenchmarkCase,
+    compare,
+    default_cases,
+    load_baseline,
+    run_suite,
+    save_baseline,
+)
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_circuits_are_seeded(self):
+        for name, generator in CIRCUITS.items():
+            circuit = generator(6, 40, 1)
+            self.assertEqual(6, circuit.nqubits)
+            self.assertEqual(40, len(circuit.queue), name)
+            same = generator(6, 40, 1)
+            self.assertListEqual(
+                [(gate.name, gate.qubits, gate.parameters) for gate in circuit.queue],
+                [(gate.name, gate.qubits, gate.parameters) for gate in same.queue],
+            )
+
+    def test_architectures_fit_circuit(self):
+        for name, builder in ARCHITECTURES.items():
+            for nqubits in (5, 16, 30):
+                self.assertGreaterEqual(len(builder(nqubits)), nqubits, name)
+
+    def test_baseline_regressions(self):
+        cases = default_cases([(5, 30)])
+        self.assertEqual(len(CIRCUITS) * len(ARCHITECTURES), len(cases))
+
+        results = run_suite([BenchmarkCase("random", "line", 5, 30), BenchmarkCase("hea", "heavy_hex", 5, 30)])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "baseline.json")
+            save_baseline(results, path)
+            baseline = load_baseline(path)
+
+        self.assertListEqual([], compare(results, baseline, min_time_delta=float("inf")))
+
+        baseline["random/line/q5/g30/s0"]["swaps"] -= 1
+        for name in baseline["hea/heavy_hex/q5/g30/s0"]["times"]:
+            baseline["hea/heavy_hex/q5/g30/s0"]["times"][name] = 0.0
+        regressions = compare(results, baseline, min_time_delta=0.0)
+        self.assertIn(("random/line/q5/g30/s0", "swaps"), [(r.case, r.metric) for r in regressions])
+        self.assertIn(("hea/heavy_hex/q5/g30/s0", "time.routing"), [(r.case, r.metric) for r in regressions])
@@ -0,0 +1,71 @@
+import unittest
+
+from qibo import gates, models
+
+from CircuitDag import CircuitDag, CommutationDag, NO_GATE
+from GateIR import CircuitIR
+
+
+class TestCircuitDag(unittest.TestCase):
+    def build_circuit(self) -> models.Circuit:
+        circuit = models.Circuit(4)
+        circuit.add(gates.CNOT(0, 1))
+        circuit.add(gates.H(2))
+        circuit.add(gates.X(0))
+        circuit.add(gates.CNOT(1, 2))
+        circuit.add(gates.H(3))
+        circuit.add(gates.CNOT(2, 3))
+        return circuit
+
+    def test_dependencies(self):
+        dag = CircuitDag.from_circuit(self.build_circuit())
+
+        self.assertListEqual([NO_GATE, NO_GATE], dag.predecessors[0].tolist())
+        self.assertListEqual([0, 1], dag.predecessors[3].tolist())
+        self.assertListEqual([3, 4], dag.predecessors[5].tolist())
+        self.assertListEqual([2, 3], dag.successors[0].tolist())
+        self.assertListEqual([NO_GATE, NO_GATE], dag.successors[5].tolist())
+
+    def test_asap_and_alap_layers(self):
+        dag = CircuitDag.from_circuit(self.build_circuit())
+
+        self.assertListEqual([0, 0, 1, 1, 0, 2], dag.asap_layers().tolist())
+        self.assertListEqual([0, 0, 2, 1, 1, 2], dag.alap_layers().tolist())
+        self.assertEqual(3, dag.depth())
+
+    def test_layers(self):
+        dag = CircuitDag.from_circuit(self.build_circuit())
+
+        self.assertListEqual([[0, 1, 4], [2, 3], [5]], dag.layers())
+        self.assertListEqual([[0, 1], [3, 4], [2, 5]], dag.layers("alap"))
+        self.assertListEqual([0, 1, 4, 2, 3, 5], dag.topological_order())
+        with self.assertRaises(ValueError):
+            dag.layers("random")
+
+    def test_empty_circuit(self):
+        dag = CircuitDag.from_circuit(models.Circuit(2))
+
+        self.assertEqual(0, dag.depth())
+        self.assertListEqual([], dag.layers())
+
+    def test_commutation_dag(self):
+        circuit = models.Circuit(3)
+        circuit.add(gates.CNOT(0, 1))
+        circuit.add(gates.CNOT(0, 2))
+        circuit.add(gates.X(1))
+        circuit.add(gates.H(0))
+        circuit.add(gates.CNOT(2, 1))
+        dag = CommutationDag(CircuitIR.from_circuit(circuit))
+
+        # CNOTs sharing a control, and X on a target, commute: only H(0) and the control of CNOT(2, 1) wait
+        self.assertListEqual([0, 0, 0, 1, 1], dag.asap_layers().tolist())
+        self.assertListEqual([0, 1], dag.predecessors[3].tolist())
+        self.assertListEqual([1, NO_GATE], dag.predecessors[4].tolist())
+        self.assertListEqual([3, 4], dag.successors[1].tolist())
+        self.assertListEqual([NO_GATE, NO_GATE], dag.successors[2].tolist())
+        self.assertListEqual([[0, 1, 2], [3, 4]], dag.layers())
+        self.assertListEqual([[0, 1, 2], [3, 4]], dag.reversed().reversed().layers())
+
+        # Groups of one gate give back the plain dependencies
+        plain = CommutationDag(CircuitIR.from_circuit(circuit), max_group=1)
+        self.assertListEqual(CircuitDag.from_circuit(circuit).layers(), plain.layers())
@@ -1,6 +1,8 @@
 from qibo import gates, models
 import unittest
 from CircuitTranspiler import CircuitTranspiler, dict_topology_tolist, string_gate
+from CircuitDag import CircuitDag
+from Topology import get_topology, grid_architecture, line_architecture
 from typing import List, Dict
 import networkx as nx
 
@@ -31,12 +33,11 @@ class TestCircuitTranspiler(unittest.TestCase):
 
         expected_timesteps = [
             [gates.CNOT(2, 0), gates.CNOT(3, 1)],
-            [gates.X(0), gates.H(1)],
-            [gates.CNOT(1, 4), gates.CNOT(0, 2), gates.H(3)],
-            [gates.CNOT(4, 1), gates.X(2)],
-            [gates.CNOT(1, 3), gates.H(0)],
-            [gates.CNOT(0, 4), gates.CNOT(2, 3)],
-            [gates.X(4)],
+            [gates.X(0), gates.H(1), gates.H(3)],
+            [gates.CNOT(1, 4), gates.CNOT(0, 2)],
+            [gates.CNOT(4, 1), gates.X(2), gates.H(0)],
+            [gates.CNOT(1, 3), gates.CNOT(0, 4)],
+            [gates.CNOT(2, 3), gates.X(4)],
             [gates.CNOT(4, 0), gates.CNOT(1, 2)],
             [gates.H(2), gates.H(0), gates.CNOT(3, 4)],
             [gates.CNOT(3, 2)],
@@ -45,6 +46,7 @@ class TestCircuitTranspiler(unittest.TestCase):
         circuit_transpiler = CircuitTranspiler()
         generated_timesteps = circuit_transpiler.generate_timesteps(circuit)
 
+        self.assertEqual(len(expected_timesteps), len(generated_timesteps))
         for i, timestep in enumerate(expected_timesteps):
             for j, expected_gate in enumerate(timestep):
                 self.assertEqual(expected_gate.name, generated_timesteps[i][j].name)
@@ -64,10 +66,12 @@ class TestCircuitTranspiler(unittest.TestCase):
             [gates.CNOT(3, 2)],
         ]
 
-        circuit_transpiler = CircuitTranspiler()
+        # Without the exact placement of the swap table of the star
+        circuit_transpiler = CircuitTranspiler(swap_tables=False)
         mapping = circuit_transpiler.initial_mapping(timesteps)
 
-        expected_mapping = {2: 0, 0: 1, 4: 2, 1: 3, 3: 4}
+        # Qubit 1 has the highest interaction weight, so it takes the center of the star
+        expected_mapping = {0: 4, 1: 0, 2: 3, 3: 1, 4: 2}
 
         self.assertDictEqual(expected_mapping, mapping)
 
@@ -101,3 +105,88 @@ class TestCircuitTranspiler(unittest.TestCase):
 
         star_architecture: Dict[int, List[int]] = {0: [1, 2, 3, 4], 1: [0], 2: [0], 3: [0], 4: [0]}
         initial_mapping = {0: 0, 1: 1, 2: 2, 3: 3, 4: 4}
+
+    def test_transpile_configurable_topology(self):
+        circuit = models.Circuit(6)
+        for control, target in [(0, 5), (1, 4), (2, 3), (0, 3), (5, 1), (4, 2)]:
+            circuit.add(gates.H(control))
+            circuit.add(gates.CNOT(control, target))
+
+        for architecture in [line_architecture(6), grid_architecture(2, 3)]:
+            for router in ["greedy", "sabre"]:
+                transpiler = CircuitTranspiler(architecture, router=router)
+                transpiled = transpiler.transpile(circuit)
+                topology = get_topology(architecture)
+                two_qubit_gates = [gate for gate in transpiled.queue if len(gate.qubits) == 2]
+                # SWAPs next to a CNOT on the same qubits are merged into two CNOTs by the optimization
+                self.assertEqual(6, len([g for g in transpiled.queue if g.name == "h"]))
+                self.assertTrue(transpiler.verify(circuit, transpiled))
+                for gate in two_qubit_gates:
+                    self.assertTrue(topology.are_adjacent(*gate.qubits))
+
+    def test_routing_reports_depth(self):
+        circuit = models.Circuit(6)
+        for control, target in [(0, 5), (1, 4), (2, 3), (0, 3), (5, 1), (4, 2)]:
+            circuit.add(gates.CNOT(control, target))
+        transpiler = CircuitTranspiler(line_architecture(6))
+        routed, _, _ = transpiler.routing(circuit, {qubit: qubit for qubit in range(6)})
+        self.assertEqual(CircuitDag.from_circuit(routed).depth(), transpiler.last_routing.depth)
+        self.assertEqual(sum(gate.name == "swap" for gate in routed.queue), transpiler.last_routing.swaps)
+
+    def test_transpile_trials(self):
+        circuit = models.Circuit(6)
+        for control, target in [(0, 5), (1, 4), (2, 3), (0, 3), (5, 1), (4, 2), (3, 5), (0, 1)]:
+            circuit.add(gates.CNOT(control, target))
+
+        circuit_transpiler = CircuitTranspiler(grid_architecture(2, 3))
+        single = circuit_transpiler.transpile(circuit)
+        single_swaps = circuit_transpiler.trial_results[0].swaps
+
+        best = circuit_transpiler.transpile(circuit, trials=4, workers=1, seed=7)
+        results = circuit_transpiler.trial_results
+        self.assertListEqual([0, 1, 2, 3], [result.trial for result in results])
+        self.assertEqual(single_swaps, results[0].swaps)
+        self.assertLessEqual(sum(gate.name == "swap" for gate in best.queue), min(result.swaps for result in results))
+
+        parallel = circuit_transpiler.transpile(circuit, trials=4, workers=2, seed=7)
+        self.assertListEqual(
+            [(result.swaps, result.depth) for result in results],
+            [(result.swaps, result.depth) for result in circuit_transpiler.trial_results],
+        )
+        self.assertEqual(len(best.queue), len(parallel.queue))
+
+        with self.assertRaises(ValueError):
+            circuit_transpiler.transpile(circuit, criterion="width")
+
+    def test_routing_stream(self):
+        transpiler = CircuitTranspiler(line_architecture(4))
+        stream = transpiler.routing_stream((gates.CNOT(0, qubit) for qubit in range(1, 4)), {0: 0, 1: 1, 2: 2, 3: 3})
+        routed = [(gate.name, gate.qubits) for gate in stream]
+
+        self.assertEqual(3, sum(name == "cx" for name, _ in routed))
+        for _, qubits in routed:
+            if len(qubits) == 2:
+                self.assertTrue(transpiler.topology.are_adjacent(*qubits))
+
+    def test_transpile_many(self):
+        def ansatz(angles):
+            circuit = models.Circuit(4)
+            for qubit, angle in enumerate(angles):
+                circuit.add(gates.RY(qubit, angle))
+            for qubit in range(3):
+                circuit.add(gates.CNOT(qubit, (qubit + 2) % 4))
+            circuit.add(gates.RZ(3, angles[0]))
+            return circuit
+
+        transpiler = CircuitTranspiler()
+        circuits = [ansatz([0.1, 0.2, 0.3, 0.4]), ansatz([1.1, 1.2, 1.3, 1.4]), ansatz([0.1, 0.2, 0.3, 0.4])]
+        transpiled = transpiler.transpile_many(circuits)
+
+        self.assertEqual(1, len(transpiler.cache))
+        self.assertEqual(2, transpiler.cache.hits)
+        for circuit, result in zip(circuits, transpiled):
+            expected = transpiler.transpile(circuit)
+            self.assertListEqual(
+                [(gate.name, gate.qubits, gate.parameters) for gate in expected.queue],
+                [(gate.name, gate.qubits, gate.parameters) for gate in result.queue],
+            )
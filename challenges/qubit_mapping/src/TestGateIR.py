@@ -0,0 +1,81 @@
+import unittest
+
+import numpy as np
+from qibo import gates, models
+
+from GateIR import GATE_REGISTRY, NO_ORIGIN, NO_QUBIT, SWAP_OPCODE, CircuitIR, IRBuilder, string_gate
+
+
+class TestGateIR(unittest.TestCase):
+    def test_string_gate_registry(self):
+        for name, spec in GATE_REGISTRY.items():
+            gate = string_gate(name, (0, 1), (0.1, 0.2, 0.3))
+            self.assertEqual(name, gate.name)
+            self.assertEqual(spec.nparams, len(gate.parameters))
+        self.assertEqual((1, 2), string_gate("cx", (1, 2)).qubits)
+        with self.assertRaises(ValueError):
+            string_gate("toffoli", (0, 1, 2))
+
+    def test_round_trip(self):
+        circuit = models.Circuit(3)
+        circuit.add(gates.H(0))
+        circuit.add(gates.CNOT(0, 2))
+        circuit.add(gates.RY(1, 0.5))
+        circuit.add(gates.U3(2, 0.1, 0.2, 0.3))
+        circuit.add(gates.M(0, 1))
+
+        ir = CircuitIR.from_circuit(circuit)
+        self.assertEqual(6, len(ir))
+        self.assertListEqual([0, 0, 1, 2, 0, 1], ir.qubit0.tolist())
+        self.assertListEqual([NO_QUBIT, 2, NO_QUBIT, NO_QUBIT, NO_QUBIT, NO_QUBIT], [int(q) for q in ir.qubit1])
+        self.assertListEqual([False, True, False, False, False, False], ir.is_two_qubit().tolist())
+
+        rebuilt = ir.to_circuit()
+        self.assertListEqual(
+            [("h", (0,)), ("cx", (0, 2)), ("ry", (1,)), ("u3", (2,)), ("measure", (0,)), ("measure", (1,))],
+            [(gate.name, gate.qubits) for gate in rebuilt.queue],
+        )
+        self.assertEqual((0.1, 0.2, 0.3), rebuilt.queue[3].parameters)
+        self.assertEqual(("ry", (1,), (0.5,)), ir.gate(2))
+
+    def test_builder_keeps_origin_and_parameters(self):
+        circuit = models.Circuit(2)
+        circuit.add(gates.RX(0, 0.7))
+        circuit.add(gates.CNOT(0, 1))
+        ir = CircuitIR.from_circuit(circuit)
+
+        routed = IRBuilder(2)
+        routed.append(SWAP_OPCODE, 0, 1)
+        routed.append(int(ir.opcode[0]), 1, NO_QUBIT, 0)
+        routed = routed.build(ir)
+
+        reversed_ir = routed.take([1, 0])
+        builder = IRBuilder(2)
+        builder.append(int(reversed_ir.opcode[0]), 0, NO_QUBIT, 0)
+        final = builder.build(reversed_ir)
+
+        np.testing.assert_allclose([0.0, 0.7], routed.params[:, 0])
+        self.assertListEqual([NO_ORIGIN, 0], routed.origin.tolist())
+        self.assertListEqual([0], final.origin.tolist())
+        self.assertAlmostEqual(0.7, final.params[0, 0])
+
+    def test_unsupported_gates(self):
+        circuit = models.Circuit(3)
+        circuit.add(gates.TOFFOLI(0, 1, 2))
+        with self.assertRaises(ValueError):
+            CircuitIR.from_circuit(circuit)
+
+    def test_structure_hash_ignores_parameters(self):
+        circuit1 = models.Circuit(2)
+        circuit1.add([gates.RX(0, 0.1), gates.CNOT(0, 1)])
+        circuit2 = models.Circuit(2)
+        circuit2.add([gates.RX(0, 0.7), gates.CNOT(0, 1)])
+        circuit3 = models.Circuit(2)
+        circuit3.add([gates.RX(1, 0.1), gates.CNOT(0, 1)])
+
+        ir1, ir2, ir3 = (CircuitIR.from_circuit(circuit) for circuit in (circuit1, circuit2, circuit3))
+        self.assertEqual(ir1.structure_hash(), ir2.structure_hash())
+        self.assertNotEqual(ir1.structure_hash(), ir3.structure_hash())
+
+        rebound = ir1.take([1, 0]).bind_parameters(ir2)
+        self.assertAlmostEqual(0.7, rebound.params[1, 0])
@@ -0,0 +1,59 @@
+import json
+import unittest
+
+from qibo import gates, models
+
+from CircuitDag import CircuitDag
+from CircuitTranspiler import CircuitTranspiler
+from Instrumentation import Profiler
+from Routing import GreedyRouter
+from Topology import Topology, grid_architecture, line_architecture
+
+
+class TestInstrumentation(unittest.TestCase):
+    def test_profile_records_passes(self):
+        circuit = models.Circuit(6)
+        for control, target in [(0, 5), (1, 4), (2, 3), (0, 3), (5, 1), (4, 2)]:
+            circuit.add(gates.H(control))
+            circuit.add(gates.CNOT(control, target))
+        transpiler = CircuitTranspiler(grid_architecture(2, 3))
+        events = []
+        with transpiler.profile(trace_memory=True, callback=lambda kind, record: events.append(kind)) as profiler:
+            transpiler.transpile(circuit, trials=2, workers=1)
+        self.assertIsNone(transpiler.profiler)
+
+        passes = profiler.to_dict()["passes"]
+        for name in ["dag", "initial_mapping", "refine_mapping", "routing", "optimize_circuit"]:
+            self.assertGreater(passes[name]["time"], 0)
+            self.assertGreater(passes[name]["peak_bytes"], 0)
+        self.assertEqual(2, passes["routing"]["calls"])
+        self.assertEqual(1, passes["initial_mapping"]["calls"])
+        self.assertEqual(2, len(profiler.routings))
+        self.assertEqual(events.count("routing"), 2)
+        self.assertEqual(events.count("pass"), sum(record.calls for record in profiler.passes.values()))
+
+        exported = json.loads(profiler.to_json())
+        self.assertEqual(exported["passes"]["routing"]["calls"], 2)
+
+    def test_routing_statistics(self):
+        topology = Topology(line_architecture(5))
+        circuit = models.Circuit(5)
+        circuit.add(gates.CNOT(0, 1))
+        circuit.add(gates.CNOT(0, 4))
+        circuit.add(gates.CNOT(2, 3))
+        result = GreedyRouter().route(CircuitDag.from_circuit(circuit), {qubit: qubit for qubit in range(5)}, topology)
+
+        record = Profiler().record_routing(result, topology)
+        self.assertEqual(3, result.swaps)
+        self.assertEqual(result.swaps, sum(record.swaps_per_timestep))
+        self.assertEqual(result.depth, len(record.swaps_per_timestep))
+        # CNOT(0, 4) bridged 4 hops, and CNOT(2, 3) is measured before the SWAPs that moved its qubits
+        self.assertDictEqual({1: 2, 4: 1}, record.path_lengths)
+
+    def test_disabled_by_default(self):
+        transpiler = CircuitTranspiler(line_architecture(3))
+        circuit = models.Circuit(3)
+        circuit.add(gates.CNOT(0, 2))
+        transpiler.transpile(circuit)
+        self.assertIsNone(transpiler.profiler)
+        self.assertIsNone(transpiler.last_routing)
@@ -0,0 +1,105 @@
+import unittest
+
+import numpy as np
+from qibo import gates, models
+
+from GateIR import CircuitIR, GATE_REGISTRY
+from Optimization import PeepholeOptimizer, commute
+
+
+def describe(circuit_gates):
+    return [(gate.name, gate.qubits) for gate in circuit_gates]
+
+
+def optimize(circuit_gates, nqubits=4, decompose_swaps=False):
+    circuit = models.Circuit(nqubits)
+    circuit.add(circuit_gates)
+    return PeepholeOptimizer(decompose_swaps=decompose_swaps).optimize(CircuitIR.from_circuit(circuit)).to_gates()
+
+
+def gate(name, *qubits):
+    return GATE_REGISTRY[name].opcode, qubits, -1
+
+
+class TestOptimization(unittest.TestCase):
+    def assert_equivalent(self, circuit_gates, optimized_gates, nqubits):
+        original = models.Circuit(nqubits)
+        original.add(circuit_gates)
+        optimized = models.Circuit(nqubits)
+        optimized.add(optimized_gates)
+        np.testing.assert_allclose(original.unitary(), optimized.unitary(), atol=1e-10)
+
+    def test_parameters_are_kept(self):
+        circuit_gates = [gates.RZ(0, 0.25), gates.H(1), gates.H(1), gates.U3(1, 0.1, 0.2, 0.3)]
+        optimized = optimize(circuit_gates)
+
+        self.assertListEqual([("rz", (0,)), ("u3", (1,))], describe(optimized))
+        self.assertAlmostEqual(0.25, optimized[0].parameters[0])
+        self.assertEqual((0.1, 0.2, 0.3), optimized[1].parameters)
+
+    def test_cancel_adjacent_pairs(self):
+        circuit_gates = [gates.H(0), gates.X(0), gates.X(0), gates.H(0), gates.CNOT(0, 1), gates.CNOT(0, 1), gates.S(1)]
+        optimized = optimize(circuit_gates)
+
+        self.assertListEqual([("s", (1,))], describe(optimized))
+
+    def test_cancel_across_commuting_gates(self):
+        circuit_gates = [
+            gates.CNOT(0, 1),
+            gates.CNOT(0, 2),
+            gates.Z(0),
+            gates.CNOT(3, 1),
+            gates.CNOT(0, 1),
+            gates.SWAP(2, 3),
+            gates.SWAP(3, 2),
+        ]
+        optimized = optimize(circuit_gates)
+
+        self.assertListEqual([("cx", (0, 2)), ("z", (0,)), ("cx", (3, 1))], describe(optimized))
+        self.assert_equivalent(circuit_gates, optimized, 4)
+
+    def test_keep_non_commuting_gates(self):
+        circuit_gates = [gates.CNOT(0, 1), gates.H(1), gates.CNOT(0, 1), gates.CNOT(1, 0), gates.CNOT(0, 1)]
+        optimized = optimize(circuit_gates)
+
+        self.assertListEqual(describe(circuit_gates), describe(optimized))
+
+    def test_merge_swap_and_cnot(self):
+        circuit_gates = [gates.H(0), gates.CNOT(0, 1), gates.SWAP(0, 1), gates.SWAP(1, 2), gates.CNOT(2, 1)]
+        optimized = optimize(circuit_gates)
+
+        self.assertListEqual(
+            [("h", (0,)), ("cx", (1, 0)), ("cx", (0, 1)), ("cx", (2, 1)), ("cx", (1, 2))], describe(optimized)
+        )
+        self.assert_equivalent(circuit_gates, optimized, 3)
+
+    def test_decompose_swaps(self):
+        circuit_gates = [gates.CNOT(1, 0), gates.SWAP(0, 1), gates.H(1), gates.SWAP(1, 2)]
+        optimized = optimize(circuit_gates, decompose_swaps=True)
+
+        self.assertListEqual(
+            [("cx", (0, 1)), ("cx", (1, 0)), ("h", (1,)), ("cx", (1, 2)), ("cx", (2, 1)), ("cx", (1, 2))],
+            describe(optimized),
+        )
+        self.assert_equivalent(circuit_gates, optimized, 3)
+
+    def test_commute(self):
+        self.assertTrue(commute(gate("cx", 0, 1), gate("cx", 0, 2)))
+        self.assertTrue(commute(gate("cx", 0, 1), gate("cx", 2, 1)))
+        self.assertTrue(commute(gate("cx", 0, 1), gate("rz", 0)))
+        self.assertFalse(commute(gate("cx", 0, 1), gate("cx", 1, 0)))
+        self.assertFalse(commute(gate("cx", 0, 1), gate("h", 1)))
+
+    def test_random_circuits_are_preserved(self):
+        rng = np.random.default_rng(11)
+        choices = [gates.H, gates.X, gates.Z, gates.S, gates.SDG, gates.CNOT, gates.SWAP, gates.CZ]
+        for decompose_swaps in (False, True):
+            circuit_gates = []
+            for _ in range(80):
+                gate = choices[rng.integers(len(choices))]
+                if gate in (gates.CNOT, gates.SWAP, gates.CZ):
+                    circuit_gates.append(gate(*rng.choice(4, size=2, replace=False).tolist()))
+                else:
+                    circuit_gates.append(gate(int(rng.integers(4))))
+            optimized = optimize(circuit_gates, decompose_swaps=decompose_swaps)
+            self.assert_equivalent(circuit_gates, optimized, 4)
@@ -0,0 +1,51 @@
+import itertools
+import unittest
+
+import numpy as np
+from qibo import gates
+
+from Placement import interaction_matrix, placement_cost, weighted_placement
+from Topology import Topology, grid_architecture, line_architecture
+
+
+class TestPlacement(unittest.TestCase):
+    def test_interaction_matrix(self):
+        timesteps = [[gates.CNOT(0, 1), gates.H(2)], [gates.CNOT(1, 0)], [gates.CZ(2, 1), gates.X(3)]]
+        weights = interaction_matrix(timesteps)
+        self.assertEqual((4, 4), weights.shape)
+        np.testing.assert_allclose(weights, weights.T)
+        self.assertAlmostEqual(1 + 1 / 2, weights[0, 1])
+        self.assertAlmostEqual(1 / 3, weights[1, 2])
+        self.assertFalse(weights[3].any())
+        np.testing.assert_allclose([[0, 2], [2, 0]], interaction_matrix([[gates.CNOT(0, 1)], [gates.CNOT(0, 1)]], decay=0))
+
+    def test_chain_on_line(self):
+        # A chain of interactions is laid out along the line, at the minimal cost of one hop per pair
+        topology = Topology(line_architecture(9))
+        timesteps = [[gates.CNOT(qubit, qubit + 1)] for qubit in [3, 0, 4, 2, 1]]
+        weights = interaction_matrix(timesteps, decay=0)
+        mapping = weighted_placement(weights, topology)
+        self.assertEqual(5, placement_cost(weights, mapping, topology))
+        for qubit in range(5):
+            self.assertTrue(topology.are_adjacent(mapping[qubit], mapping[qubit + 1]))
+
+    def test_placement_is_optimal_on_small_device(self):
+        topology = Topology(grid_architecture(2, 3))
+        rng = np.random.default_rng(1)
+        for _ in range(5):
+            weights = np.triu(rng.random((5, 5)) * (rng.random((5, 5)) < 0.6), 1)
+            weights += weights.T
+            mapping = weighted_placement(weights, topology)
+            self.assertEqual(len(mapping), len(set(mapping.values())))
+            best = min(
+                placement_cost(weights, dict(enumerate(nodes)), topology)
+                for nodes in itertools.permutations(topology.nodes, 5)
+            )
+            self.assertLessEqual(placement_cost(weights, mapping, topology), best * 1.25 + 1e-9)
+
+    def test_unplaced_qubits(self):
+        topology = Topology(line_architecture(3))
+        self.assertDictEqual({}, weighted_placement(interaction_matrix([[gates.H(0)]]), topology))
+        with self.assertRaises(ValueError):
+            weighted_placement(interaction_matrix([[gates.CNOT(0, 1), gates.CNOT(2, 3)]]), topology)
+
@@ -0,0 +1,182 @@
+import random
+import unittest
+from typing import Dict, List
+
+from qibo import gates, models
+
+from CircuitDag import CircuitDag, CommutationDag
+from GateIR import CircuitIR
+from Routing import GreedyRouter, SabreRouter, complete_mapping, get_router
+from Topology import Topology, grid_architecture, heavy_hex_architecture, line_architecture, ring_architecture
+from Verification import verify
+
+
+def random_circuit(nqubits: int, ngates: int, seed: int) -> models.Circuit:
+    rng = random.Random(seed)
+    circuit = models.Circuit(nqubits)
+    for _ in range(ngates):
+        if rng.random() < 0.3:
+            circuit.add(rng.choice([gates.H, gates.X])(rng.randrange(nqubits)))
+        else:
+            control, target = rng.sample(range(nqubits), 2)
+            circuit.add(gates.CNOT(control, target))
+    return circuit
+
+
+def unroute(routed: models.Circuit, initial_mapping: Dict[int, int]) -> Dict[int, List[tuple]]:
+    """Replays the routed circuit tracking the SWAPs and returns, for every virtual qubit, the sequence of gates acting
+    on it, expressed on virtual qubits."""
+    layout = {node: qubit for qubit, node in initial_mapping.items()}
+    per_qubit: Dict[int, List[tuple]] = {}
+    for gate in routed.queue:
+        if gate.name == "swap":
+            node1, node2 = gate.qubits
+            layout[node1], layout[node2] = layout.get(node2), layout.get(node1)
+            continue
+        qubits = tuple(layout[node] for node in gate.qubits)
+        for qubit in qubits:
+            per_qubit.setdefault(qubit, []).append((gate.name, qubits))
+    return per_qubit
+
+
+def per_qubit_gates(circuit: models.Circuit) -> Dict[int, List[tuple]]:
+    per_qubit: Dict[int, List[tuple]] = {}
+    for gate in circuit.queue:
+        for qubit in gate.qubits:
+            per_qubit.setdefault(qubit, []).append((gate.name, gate.qubits))
+    return per_qubit
+
+
+class TestRouting(unittest.TestCase):
+    def assert_routed(self, circuit, result, initial_mapping, topology):
+        routed = result.ir.to_circuit()
+        for gate in routed.queue:
+            if len(gate.qubits) == 2:
+                self.assertTrue(topology.are_adjacent(*gate.qubits))
+        self.assertDictEqual(per_qubit_gates(circuit), unroute(routed, initial_mapping))
+        self.assertEqual(result.swaps, sum(gate.name == "swap" for gate in routed.queue))
+
+    def test_routers_preserve_circuit(self):
+        for architecture in [line_architecture(6), ring_architecture(7), grid_architecture(2, 4), heavy_hex_architecture(1, 1)]:
+            topology = Topology(architecture)
+            for router in [GreedyRouter(), SabreRouter(), SabreRouter(seed=3), SabreRouter(parallel_swaps=True)]:
+                circuit = random_circuit(6, 60, seed=len(architecture))
+                dag = CircuitDag.from_circuit(circuit)
+                mapping = router.refine_mapping(dag, {}, topology)
+                result = router.route(dag, mapping, topology)
+                self.assert_routed(circuit, result, mapping, topology)
+
+    def test_sabre_inserts_fewer_swaps(self):
+        topology = Topology(grid_architecture(4, 4))
+        greedy_swaps = 0
+        sabre_swaps = 0
+        for seed in range(3):
+            circuit = random_circuit(16, 200, seed)
+            dag = CircuitDag.from_circuit(circuit)
+            mapping = complete_mapping({}, circuit.nqubits, topology)
+            greedy_swaps += GreedyRouter().route(dag, mapping, topology).swaps
+            sabre_swaps += SabreRouter().route(dag, mapping, topology).swaps
+        self.assertLess(sabre_swaps, greedy_swaps)
+
+    def test_sabre_swap_layers(self):
+        topology = Topology(line_architecture(8))
+        circuit = models.Circuit(8)
+        circuit.add(gates.CNOT(0, 3))
+        circuit.add(gates.CNOT(4, 7))
+        mapping = {qubit: qubit for qubit in range(8)}
+        result = SabreRouter(parallel_swaps=True).route(CircuitDag.from_circuit(circuit), mapping, topology)
+        routed = [(gate.name, gate.qubits) for gate in result.ir.to_circuit().queue]
+        # Both gates are brought together by one layer of SWAPs on disjoint edges
+        self.assertListEqual([("swap", (0, 1)), ("swap", (2, 3)), ("swap", (4, 5)), ("swap", (6, 7))], routed[:4])
+        self.assertEqual(2, result.depth)
+
+    def test_parallel_swaps_reduce_depth(self):
+        topology = Topology(grid_architecture(4, 4))
+        parallel_depth, parallel_swaps = 0, 0
+        serial_depth, serial_swaps = 0, 0
+        for seed in range(3):
+            circuit = random_circuit(16, 200, seed)
+            dag = CircuitDag.from_circuit(circuit)
+            mapping = complete_mapping({}, circuit.nqubits, topology)
+            parallel = SabreRouter(parallel_swaps=True).route(dag, mapping, topology)
+            self.assert_routed(circuit, parallel, mapping, topology)
+            self.assertEqual(CircuitDag(parallel.ir).depth(), parallel.depth)
+            parallel_depth += parallel.depth
+            parallel_swaps += parallel.swaps
+            serial = SabreRouter().route(dag, mapping, topology)
+            serial_depth += serial.depth
+            serial_swaps += serial.swaps
+        # The SWAP layers trade extra SWAPs for depth, so they are opt-in
+        self.assertLess(parallel_depth, serial_depth)
+        self.assertGreater(parallel_swaps, serial_swaps)
+
+    def test_commutation_dag_saves_swaps(self):
+        topology = Topology(grid_architecture(3, 3))
+        plain_swaps = 0
+        commutation_swaps = 0
+        for seed in range(3):
+            circuit = random_circuit(9, 150, seed)
+            mapping = complete_mapping({}, circuit.nqubits, topology)
+            plain_swaps += SabreRouter().route(CircuitDag.from_circuit(circuit), mapping, topology).swaps
+            dag = CommutationDag(CircuitIR.from_circuit(circuit))
+            result = SabreRouter().route(dag, mapping, topology)
+            commutation_swaps += result.swaps
+            self.assertTrue(verify(circuit, result.ir.to_circuit(), result.final_mapping, mapping))
+        self.assertLess(commutation_swaps, plain_swaps)
+
+    def test_route_stream_preserves_circuit(self):
+        topology = Topology(grid_architecture(2, 4))
+        circuit = random_circuit(8, 200, seed=5)
+        for router in [GreedyRouter(), SabreRouter(), SabreRouter(seed=3), SabreRouter(parallel_swaps=True)]:
+            mapping = complete_mapping({0: 3}, circuit.nqubits, topology)
+            stream = router.route_stream(iter(circuit.queue), mapping, topology, window=8)
+            routed = models.Circuit(topology.num_nodes)
+            while True:
+                try:
+                    routed.add(next(stream))
+                except StopIteration as stop:
+                    final_mapping = stop.value
+                    break
+
+            for gate in routed.queue:
+                if len(gate.qubits) == 2:
+                    self.assertTrue(topology.are_adjacent(*gate.qubits))
+            self.assertDictEqual(per_qubit_gates(circuit), unroute(routed, mapping))
+            self.assertEqual(set(range(8)), set(final_mapping))
+
+    def test_route_stream_places_new_qubits(self):
+        topology = Topology(line_architecture(4))
+        stream = GreedyRouter().route_stream([gates.H(2), gates.CNOT(2, 0)], {0: 3}, topology)
+        routed = [(gate.name, gate.qubits) for gate in stream]
+        self.assertListEqual([("h", (0,)), ("swap", (0, 1)), ("swap", (1, 2)), ("cx", (2, 3))], routed)
+        with self.assertRaises(ValueError):
+            list(GreedyRouter().route_stream([gates.H(qubit) for qubit in range(5)], {}, topology))
+
+    def test_route_stream_reads_input_lazily(self):
+        topology = Topology(line_architecture(5))
+        consumed = []
+
+        def gate_source():
+            rng = random.Random(0)
+            for index in range(100000):
+                consumed.append(index)
+                control, target = rng.sample(range(5), 2)
+                yield gates.CNOT(control, target)
+
+        stream = SabreRouter().route_stream(gate_source(), {}, topology, window=10)
+        for _ in range(50):
+            next(stream)
+        self.assertLessEqual(len(consumed), 50 + 10)
+
+    def test_complete_mapping(self):
+        topology = Topology(line_architecture(4))
+        self.assertDictEqual({0: 2, 1: 0, 2: 1}, complete_mapping({0: 2}, 3, topology))
+        with self.assertRaises(ValueError):
+            complete_mapping({}, 5, topology)
+
+    def test_get_router(self):
+        self.assertIsInstance(get_router("greedy"), GreedyRouter)
+        router = SabreRouter(lookahead=5)
+        self.assertIs(router, get_router(router))
+        with self.assertRaises(ValueError):
+            get_router("astar")
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from CircuitDag import CircuitDag
+from CircuitTranspiler import STAR_ARCHITECTURE, CircuitTranspiler
+from Routing import GreedyRouter, SabreRouter, complete_mapping
+from SwapTables import SWAP_TABLE_DIR, SwapTable, SwapTableCache, TableRouter, build_swap_tables, table_initial_mapping
+from TestRouting import random_circuit
+from Topology import Topology, get_topology, grid_architecture, line_architecture
+from Verification import verify
+
+
+class TestSwapTables(unittest.TestCase):
+    def test_build(self):
+        table = SwapTable.build(Topology(STAR_ARCHITECTURE))
+        self.assertEqual(120, len(table.swaps))
+        self.assertEqual(0, table.swaps[0])
+
+        for rank in range(len(table.swaps)):
+            sequence = table.swap_sequence(rank)
+            self.assertEqual(table.swaps[rank], len(sequence))
+            arrangement = list(range(5))
+            for position1, position2 in sequence:
+                arrangement[position1], arrangement[position2] = arrangement[position2], arrangement[position1]
+            self.assertListEqual(table.arrangements[rank].tolist(), arrangement)
+            self.assertEqual(rank, table.rank(arrangement))
+
+    def test_line_reversal_is_optimal(self):
+        # Reversing a line of n qubits needs n (n - 1) / 2 SWAPs
+        table = SwapTable.build(Topology(line_architecture(5)))
+        self.assertEqual(10, table.swaps[table.rank([4, 3, 2, 1, 0])])
+        self.assertEqual(10, table.swaps.max())
+
+    def test_cache(self):
+        topology = get_topology(STAR_ARCHITECTURE)
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertIsNone(SwapTableCache(directory, build_missing=False).get(topology))
+            built = SwapTableCache(directory).get(topology)
+            self.assertTrue(os.path.exists(SwapTableCache(directory).path(topology)))
+
+            loaded = SwapTableCache(directory, build_missing=False).get(topology)
+            np.testing.assert_array_equal(built.swaps, loaded.swaps)
+            np.testing.assert_array_equal(built.last_swap, loaded.last_swap)
+
+            self.assertIsNone(SwapTableCache(directory).get(Topology(grid_architecture(3, 3))))
+            self.assertIn(SwapTableCache(directory).path(Topology(line_architecture(3))), build_swap_tables(directory, 4))
+
+    def test_table_router(self):
+        topology = Topology(STAR_ARCHITECTURE)
+        router = TableRouter(SwapTable.build(topology))
+        table_swaps = 0
+        greedy_swaps = 0
+        for seed in range(5):
+            circuit = random_circuit(5, 40, seed)
+            dag = CircuitDag.from_circuit(circuit)
+            mapping = complete_mapping({}, 5, topology)
+            result = router.route(dag, mapping, topology)
+            self.assertTrue(verify(circuit, result.ir.to_circuit(), result.final_mapping, mapping))
+            table_swaps += result.swaps
+            greedy_swaps += GreedyRouter().route(dag, mapping, topology).swaps
+        self.assertLessEqual(table_swaps, greedy_swaps)
+
+        with self.assertRaises(ValueError):
+            router.route(CircuitDag.from_circuit(random_circuit(3, 5, 0)), {}, Topology(line_architecture(5)))
+
+    def test_table_initial_mapping(self):
+        table = SwapTable.build(Topology(line_architecture(4)))
+        weights = np.zeros((3, 3))
+        weights[0, 2] = 3
+        weights[1, 2] = 1
+        mapping = table_initial_mapping(table, weights)
+        self.assertEqual(1, abs(mapping[0] - mapping[2]))
+        self.assertEqual(1, abs(mapping[1] - mapping[2]))
+
+    def test_transpiler_with_swap_tables(self):
+        circuit = random_circuit(5, 60, seed=7)
+        with tempfile.TemporaryDirectory() as directory:
+            transpiler = CircuitTranspiler(swap_tables=SwapTableCache(directory), router=SabreRouter())
+            transpiled = transpiler.transpile(circuit)
+            self.assertTrue(transpiler.verify(circuit, transpiled))
+
+            routed, final_mapping, _ = transpiler.routing(circuit, {0: 0, 1: 1, 2: 2, 3: 3, 4: 4})
+            self.assertTrue(verify(circuit, routed, final_mapping))
+
+    def test_default_swap_tables(self):
+        self.assertEqual(SWAP_TABLE_DIR, CircuitTranspiler().swap_tables.directory)
+        self.assertIsNone(CircuitTranspiler(grid_architecture(3, 3)).swap_tables)
+        self.assertIsNone(CircuitTranspiler(swap_tables=False).swap_tables)
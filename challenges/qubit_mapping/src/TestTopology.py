@@ -0,0 +1,38 @@
+import unittest
+from typing import List, Dict
+
+from Topology import Topology, get_topology, UNREACHABLE
+
+
+class TestTopology(unittest.TestCase):
+    def test_distance_and_next_hop(self):
+        star_architecture: Dict[int, List[int]] = {0: [1, 2, 3, 4], 1: [0], 2: [0], 3: [0], 4: [0]}
+        topology = Topology(star_architecture)
+
+        self.assertEqual(0, topology.distance[3, 3])
+        self.assertEqual(1, topology.distance[0, 4])
+        self.assertEqual(2, topology.distance[1, 4])
+        self.assertEqual(0, topology.next_hop[1, 4])
+        self.assertListEqual([1, 0, 4], topology.shortest_path(1, 4))
+
+    def test_are_adjacent(self):
+        line_architecture: Dict[int, List[int]] = {0: [1], 1: [0, 2], 2: [1]}
+        topology = Topology(line_architecture)
+
+        self.assertTrue(topology.are_adjacent(0, 1))
+        self.assertTrue(topology.are_adjacent(1, 0))
+        self.assertFalse(topology.are_adjacent(0, 2))
+
+    def test_disconnected_nodes(self):
+        topology = Topology({0: [1], 1: [0], 2: [3], 3: [2]})
+
+        self.assertEqual(UNREACHABLE, topology.distance[0, 3])
+        with self.assertRaises(ValueError):
+            topology.shortest_path(0, 3)
+
+    def test_get_topology_is_cached(self):
+        star_architecture: Dict[int, List[int]] = {0: [1, 2, 3, 4], 1: [0], 2: [0], 3: [0], 4: [0]}
+        same_star: Dict[int, List[int]] = {0: [4, 3, 2, 1], 1: [0], 2: [0], 3: [0], 4: [0]}
+
+        self.assertIs(get_topology(star_architecture), get_topology(same_star))
+        self.assertIs(get_topology(star_architecture), get_topology(get_topology(star_architecture)))
@@ -0,0 +1,70 @@
+import json
+import os
+import tempfile
+import unittest
+
+from qibo import gates, models
+
+from Topology import get_topology, line_architecture
+from TranspileQasm import load_coupling_map, main, transpile_directory
+
+
+class TestTranspileQasm(unittest.TestCase):
+    def test_load_coupling_map(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "device.json")
+            for data in [{"0": [1], "1": [0, 2], "2": [1]}, [[0, 1], [1, 2]]]:
+                with open(path, "w") as file:
+                    json.dump(data, file)
+                self.assertEqual(get_topology(line_architecture(3)).key, get_topology(load_coupling_map(path)).key)
+
+            with open(path, "w") as file:
+                json.dump([1, 2, 3], file)
+            with self.assertRaises(ValueError):
+                load_coupling_map(path)
+
+    def test_transpile_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for index in range(3):
+                circuit = models.Circuit(4)
+                circuit.add(gates.H(0))
+                circuit.add(gates.CNOT(0, 3 - index))
+                circuit.add(gates.CNOT(1, 3))
+                with open(os.path.join(directory, f"circuit{index}.qasm"), "w") as file:
+                    file.write(circuit.to_qasm())
+            with open(os.path.join(directory, "broken.qasm"), "w") as file:
+                file.write("not qasm")
+
+            output = os.path.join(directory, "out")
+            reports = list(transpile_directory(directory, line_architecture(4), output, workers=2))
+            self.assertEqual(4, len(reports))
+
+            topology = get_topology(line_architecture(4))
+            for report in reports:
+                if report["file"] == "broken.qasm":
+                    self.assertEqual("error", report["status"])
+                    continue
+                self.assertEqual("ok", report["status"])
+                self.assertIn("routing", report["times"])
+                with open(report["output"]) as file:
+                    routed = models.Circuit.from_qasm(file.read())
+                self.assertEqual(report["swaps"], sum(gate.name == "swap" for gate in routed.queue))
+                for gate in routed.queue:
+                    if len(gate.qubits) == 2:
+                        self.assertTrue(topology.are_adjacent(*gate.qubits))
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            circuit = models.Circuit(3)
+            circuit.add(gates.CNOT(0, 2))
+            with open(os.path.join(directory, "circuit.qasm"), "w") as file:
+                file.write(circuit.to_qasm())
+            device = os.path.join(directory, "device.json")
+            with open(device, "w") as file:
+                json.dump([[0, 1], [1, 2]], file)
+
+            self.assertEqual(0, main([directory, device, "--workers", "1"]))
+            with open(os.path.join(directory, "routed", "report.jsonl")) as file:
+                lines = [json.loads(line) for line in file]
+            self.assertEqual(1, len(lines))
+            self.assertEqual("circuit.qasm", lines[0]["file"])
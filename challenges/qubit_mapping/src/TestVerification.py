@@ -0,0 +1,94 @@
+import random
+import time
+import unittest
+
+from qibo import gates, models
+
+from CircuitTranspiler import CircuitTranspiler
+from GateIR import string_gate
+from Topology import grid_architecture
+from Verification import CliffordTableau, verify
+
+SINGLE_QUBIT_CLIFFORDS = ["h", "x", "y", "z", "s", "sdg", "sx", "sxdg"]
+TWO_QUBIT_CLIFFORDS = ["cx", "cz", "cy", "swap"]
+
+
+def random_clifford_circuit(nqubits: int, ngates: int, seed: int) -> models.Circuit:
+    rng = random.Random(seed)
+    circuit = models.Circuit(nqubits)
+    for _ in range(ngates):
+        if rng.random() < 0.5:
+            circuit.add(string_gate(rng.choice(SINGLE_QUBIT_CLIFFORDS), (rng.randrange(nqubits),)))
+        else:
+            circuit.add(string_gate(rng.choice(TWO_QUBIT_CLIFFORDS), tuple(rng.sample(range(nqubits), 2))))
+    return circuit
+
+
+class TestVerification(unittest.TestCase):
+    def test_tableau_matches_dense(self):
+        mapping = {0: 0, 1: 1, 2: 2}
+        for seed in range(30):
+            circuit1 = random_clifford_circuit(3, 10, seed)
+            circuit2 = random_clifford_circuit(3, 10, seed + 1000) if seed % 2 else circuit1
+            self.assertEqual(
+                verify(circuit1, circuit2, mapping, method="dense"),
+                verify(circuit1, circuit2, mapping, method="tableau"),
+            )
+
+    def test_decompositions(self):
+        circuit = models.Circuit(2)
+        circuit.add([gates.CZ(0, 1), gates.SDG(1)])
+        decomposed = models.Circuit(2)
+        decomposed.add([gates.H(1), gates.CNOT(0, 1), gates.H(1), gates.S(1), gates.Z(1)])
+        self.assertTrue(verify(circuit, decomposed, {0: 0, 1: 1}, method="tableau"))
+
+        tableau = CliffordTableau.from_circuit(decomposed)
+        with self.assertRaises(ValueError):
+            tableau.apply("t", (0,))
+
+    def test_verify_permutation_and_ancillas(self):
+        circuit = models.Circuit(2)
+        circuit.add([gates.H(0), gates.CNOT(0, 1)])
+        routed = models.Circuit(4)
+        routed.add([gates.H(0), gates.SWAP(0, 1), gates.SWAP(2, 3), gates.CNOT(1, 3)])
+
+        self.assertTrue(verify(circuit, routed, {0: 1, 1: 3}, {0: 0, 1: 2}))
+        self.assertFalse(verify(circuit, routed, {0: 0, 1: 3}, {0: 0, 1: 2}))
+        self.assertTrue(verify(circuit, routed, {0: 1, 1: 3}, {0: 0, 1: 2}, method="dense"))
+
+    def test_transpiled_circuits(self):
+        circuit = random_clifford_circuit(8, 80, seed=3)
+        transpiler = CircuitTranspiler(grid_architecture(3, 3))
+        with self.assertRaisesRegex(ValueError, "call transpile first"):
+            transpiler.verify(circuit, circuit)
+        identity = {qubit: qubit for qubit in range(8)}
+        self.assertTrue(transpiler.verify(circuit, circuit, identity, identity))
+
+        transpiled = transpiler.transpile(circuit)
+        self.assertTrue(transpiler.verify(circuit, transpiled))
+
+        tampered = models.Circuit(transpiled.nqubits)
+        tampered.add([gate for gate in transpiled.queue if gate.name != "swap"][:-1])
+        tampered.add([gate for gate in transpiled.queue if gate.name == "swap"])
+        self.assertFalse(transpiler.verify(circuit, tampered))
+
+    def test_non_clifford_fallback(self):
+        circuit = models.Circuit(4)
+        circuit.add([gates.T(0), gates.CNOT(0, 3), gates.RZ(3, 0.3), gates.CNOT(1, 2), gates.CU1(2, 0, 0.7)])
+        transpiler = CircuitTranspiler()
+        transpiled = transpiler.transpile(circuit)
+        self.assertTrue(transpiler.verify(circuit, transpiled))
+
+        tampered = models.Circuit(transpiled.nqubits)
+        tampered.add(transpiled.queue)
+        tampered.add(gates.RZ(0, 0.1))
+        self.assertFalse(transpiler.verify(circuit, tampered))
+
+    def test_large_clifford_circuit(self):
+        circuit = random_clifford_circuit(100, 1000, seed=1)
+        transpiler = CircuitTranspiler(grid_architecture(10, 10))
+        transpiled = transpiler.transpile(circuit)
+
+        start = time.perf_counter()
+        self.assertTrue(transpiler.verify(circuit, transpiled))
+        self.assertLess(time.perf_counter() - start, 30)
@@ -0,0 +1,206 @@
+from collections import deque
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+
+UNREACHABLE = -1
+
+
+class Topology:
+    """Precomputed lookup tables for a coupling map given as {node: [neighbors]}.
+
+    Physical qubits are used directly as row/column indices, so every lookup in the routing hot loop is a single
+    array access or set membership test.
+
+    Attributes:
+        nodes (List[int]): sorted list of the physical qubits of the device.
+        num_nodes (int): size of the lookup tables (largest physical qubit + 1).
+        neighbors (Dict[int, List[int]]): sorted, undirected neighbor lists.
+        edges (Set[Tuple[int, int]]): every coupling, stored in both orientations.
+        distance (np.ndarray): (num_nodes, num_nodes) matrix with the number of hops between two nodes.
+        next_hop (np.ndarray): (num_nodes, num_nodes) matrix where next_hop[a, b] is the node following a on a
+            shortest path from a to b.
+    """
+
+    def __init__(self, architecture: Dict[int, List[int]]):
+        neighbors: Dict[int, Set[int]] = {}
+        for node, node_neighbors in architecture.items():
+            neighbors.setdefault(node, set())
+            for neighbor in node_neighbors:
+                if neighbor == node:
+                    continue
+                neighbors[node].add(neighbor)
+                neighbors.setdefault(neighbor, set()).add(node)
+
+        self.nodes: List[int] = sorted(neighbors)
+        self.num_nodes: int = self.nodes[-1] + 1 if self.nodes else 0
+        self.neighbors: Dict[int, List[int]] = {node: sorted(neighbors[node]) for node in self.nodes}
+        self.edges: Set[Tuple[int, int]] = {
+            (node, neighbor) for node, node_neighbors in self.neighbors.items() for neighbor in node_neighbors
+        }
+        self.key: Tuple[Tuple[int, int], ...] = tuple(sorted(edge for edge in self.edges if edge[0] < edge[1]))
+
+        self.distance, self.next_hop = self._all_pairs_shortest_paths()
+
+    def _all_pairs_shortest_paths(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Runs a breadth first search from every node. The BFS tree rooted at `target` gives, for every other node,
+        the neighbor that is one hop closer to `target`, which is exactly next_hop[node, target].
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: the distance and next hop matrices.
+        """
+        distance = np.full((self.num_nodes, self.num_nodes), UNREACHABLE, dtype=np.int32)
+        next_hop = np.full((self.num_nodes, self.num_nodes), UNREACHABLE, dtype=np.int32)
+
+        for target in self.nodes:
+            distance[target, target] = 0
+            next_hop[target, target] = target
+            queue = deque([target])
+            while queue:
+                node = queue.popleft()
+                for neighbor in self.neighbors[node]:
+                    if distance[neighbor, target] == UNREACHABLE:
+                        distance[neighbor, target] = distance[node, target] + 1
+                        next_hop[neighbor, target] = node
+                        queue.append(neighbor)
+
+        return distance, next_hop
+
+    def are_adjacent(self, node1: int, node2: int) -> bool:
+        return (node1, node2) in self.edges
+
+    def shortest_path(self, source: int, target: int) -> List[int]:
+        """Rebuilds a shortest path by following the next hop table.
+
+        Args:
+            source (int): starting physical qubit.
+            target (int): destination physical qubit.
+
+        Raises:
+            ValueError: If the nodes are not connected in the topology.
+
+        Returns:
+            List[int]: the physical qubits visited, including both ends.
+        """
+        if self.distance[source, target] == UNREACHABLE:
+            raise ValueError(f"Nodes {source} and {target} are not connected")
+
+        path = [source]
+        while source != target:
+            source = int(self.next_hop[source, target])
+            path.append(source)
+        return path
+
+    def to_networkx(self):
+        """Builds a networkx graph of the topology, e.g. for plotting."""
+        import networkx as nx
+
+        graph = nx.Graph()
+        graph.add_nodes_from(self.nodes)
+        graph.add_edges_from(self.key)
+        return graph
+
+
+_TOPOLOGY_CACHE: Dict[Tuple[Tuple[int, ...], Tuple[Tuple[int, int], ...]], Topology] = {}
+
+
+def get_topology(architecture: Dict[int, List[int]]) -> Topology:
+    """Returns the Topology of an architecture, building the lookup tables only the first time a coupling map is seen.
+
+    Args:
+        architecture (Dict[int, List[int]]): The topology of the quantum device represented as {node: [neighbors]}.
+
+    Returns:
+        Topology: the shared, precomputed topology.
+    """
+    if isinstance(architecture, Topology):
+        return architecture
+
+    edges = {(min(node, neighbor), max(node, neighbor)) for node, ns in architecture.items() for neighbor in ns}
+    key = (tuple(sorted(architecture)), tuple(sorted(edges)))
+    topology = _TOPOLOGY_CACHE.get(key)
+    if topology is None:
+        topology = Topology(architecture)
+        _TOPOLOGY_CACHE[key] = topology
+    return topology
+
+
+def star_architecture(num_nodes: int) -> Dict[int, List[int]]:
+    """Coupling map of a star whose center is node 0, like STAR_ARCHITECTURE for 5 nodes."""
+    architecture = {0: list(range(1, num_nodes))}
+    architecture.update({node: [0] for node in range(1, num_nodes)})
+    return architecture
+
+
+def line_architecture(num_nodes: int) -> Dict[int, List[int]]:
+    """Coupling map of a chain 0 - 1 - ... - (num_nodes - 1)."""
+    return {node: [n for n in (node - 1, node + 1) if 0 <= n < num_nodes] for node in range(num_nodes)}
+
+
+def ring_architecture(num_nodes: int) -> Dict[int, List[int]]:
+    """Coupling map of a closed chain, where the last node is also connected to the first one."""
+    if num_nodes < 3:
+        return line_architecture(num_nodes)
+    return {node: [(node - 1) % num_nodes, (node + 1) % num_nodes] for node in range(num_nodes)}
+
+
+def grid_architecture(rows: int, columns: int) -> Dict[int, List[int]]:
+    """Coupling map of a rows x columns square lattice, with nodes numbered row by row."""
+    architecture: Dict[int, List[int]] = {}
+    for row in range(rows):
+        for column in range(columns):
+            neighbors = []
+            if row > 0:
+                neighbors.append((row - 1) * columns + column)
+            if column > 0:
+                neighbors.append(row * columns + column - 1)
+            if column < columns - 1:
+                neighbors.append(row * columns + column + 1)
+            if row < rows - 1:
+                neighbors.append((row + 1) * columns + column)
+            architecture[row * columns + column] = neighbors
+    return architecture
+
+
+def heavy_hex_architecture(rows: int, columns: int) -> Dict[int, List[int]]:
+    """Coupling map of a heavy-hex lattice: a hexagonal lattice of rows x columns cells with an extra qubit placed on
+    every edge, so that nodes have degree 2 or 3.
+
+    The hexagonal lattice is built as a brick wall of (rows + 1) horizontal chains of 2 * columns + 2 nodes, where
+    every other node is linked to the node right below it. Dangling corner nodes are dropped.
+
+    Args:
+        rows (int): number of rows of hexagonal cells.
+        columns (int): number of hexagonal cells per row.
+
+    Returns:
+        Dict[int, List[int]]: the coupling map, with nodes numbered from 0.
+    """
+    width = 2 * columns + 2
+    edges = []
+    for row in range(rows + 1):
+        for column in range(width - 1):
+            edges.append(((row, column), (row, column + 1)))
+        if row < rows:
+            for column in range(width):
+                if (row + column) % 2 == 0:
+                    edges.append(((row, column), (row + 1, column)))
+
+    # Drop degree one corners left by the brick wall construction
+    degree: Dict[Tuple[int, int], int] = {}
+    for edge in edges:
+        for node in edge:
+            degree[node] = degree.get(node, 0) + 1
+    edges = [edge for edge in edges if degree[edge[0]] > 1 and degree[edge[1]] > 1]
+
+    labels: Dict[Tuple[int, int], int] = {}
+    for node in sorted({node for edge in edges for node in edge}):
+        labels[node] = len(labels)
+
+    architecture: Dict[int, List[int]] = {label: [] for label in labels.values()}
+    for node1, node2 in edges:
+        bridge = len(architecture)
+        architecture[bridge] = [labels[node1], labels[node2]]
+        architecture[labels[node1]].append(bridge)
+        architecture[labels[node2]].append(bridge)
+    return architecture
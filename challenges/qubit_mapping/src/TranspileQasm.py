@@ -0,0 +1,173 @@
+"""Command line transpiler for directories of OpenQASM files.
+
+Every file of the input directory is transpiled for the device of the coupling map file, in parallel across a process
+pool, and written to the output directory with the same name. A JSON-lines report gets one line per file as soon as it
+is done, so a long batch can be followed, and is not held up, by its slowest files:
+
+    python TranspileQasm.py circuits/ device.json --output routed/ --workers 8
+
+The coupling map file is JSON, either {node: [neighbors]} or a list of [node, node] edges.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from qibo import models
+
+from CircuitTranspiler import CircuitTranspiler
+
+REPORT_NAME = "report.jsonl"
+
+# Transpiler of a worker process, built once by _init_worker so that the topology tables are shared by its files
+_transpiler: Optional[CircuitTranspiler] = None
+
+
+def load_coupling_map(path: str) -> Dict[int, List[int]]:
+    """Reads a coupling map from a JSON file holding {node: [neighbors]} or a list of [node, node] edges.
+
+    Raises:
+        ValueError: If the file holds neither.
+    """
+    with open(path) as file:
+        data = json.load(file)
+
+    architecture: Dict[int, List[int]] = {}
+    if isinstance(data, dict):
+        for node, neighbors in data.items():
+            architecture.setdefault(int(node), []).extend(int(neighbor) for neighbor in neighbors)
+    elif isinstance(data, list) and all(isinstance(edge, list) and len(edge) == 2 for edge in data):
+        for node1, node2 in data:
+            architecture.setdefault(int(node1), []).append(int(node2))
+            architecture.setdefault(int(node2), []).append(int(node1))
+    else:
+        raise ValueError(f"{path} is not a coupling map: expected {{node: [neighbors]}} or a list of edges")
+    return architecture
+
+
+def qasm_files(directory: str, extension: str = ".qasm") -> List[str]:
+    """Files of the directory with the extension, sorted by name."""
+    return sorted(
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.endswith(extension) and os.path.isfile(os.path.join(directory, name))
+    )
+
+
+def transpile_file(path: str, output_directory: str, trials: int = 1, seed: Optional[int] = None) -> dict:
+    """Transpiles a QASM file with the transpiler of the process and writes the result to the output directory.
+
+    Returns:
+        dict: the report line of the file, with "status" "ok" or "error".
+    """
+    start = time.perf_counter()
+    report: dict = {"file": os.path.basename(path)}
+    try:
+        with open(path) as file:
+            circuit = models.Circuit.from_qasm(file.read())
+        with _transpiler.profile() as profiler:
+            transpiled = _transpiler.transpile(circuit, trials=trials, workers=1, seed=seed)
+
+        output = os.path.join(output_directory, os.path.basename(path))
+        with open(output, "w") as file:
+            file.write(transpiled.to_qasm())
+
+        best = _transpiler.best_trial
+        report.update(
+            status="ok",
+            output=output,
+            qubits=circuit.nqubits,
+            gates=len(circuit.queue),
+            swaps=best.swaps,
+            depth=best.depth,
+            times={name: record.time for name, record in profiler.passes.items()},
+            initial_mapping=best.initial_mapping,
+            final_mapping=best.final_mapping,
+        )
+    except Exception as error:  # the batch goes on, the failure is reported on the line of the file
+        report.update(status="error", error=f"{type(error).__name__}: {error}")
+    report["time"] = time.perf_counter() - start
+    return report
+
+
+def transpile_directory(
+    input_directory: str,
+    architecture: Dict[int, List[int]],
+    output_directory: str,
+    workers: Optional[int] = None,
+    router: str = "sabre",
+    trials: int = 1,
+    seed: Optional[int] = None,
+) -> Iterator[dict]:
+    """Transpiles every QASM file of the directory in a process pool and yields the report of each file in completion
+    order, as soon as it is done.
+
+    Args:
+        input_directory (str): directory of the QASM files.
+        architecture (Dict[int, List[int]]): coupling map of the device.
+        output_directory (str): directory of the transpiled files, created if needed.
+        workers (int, optional): number of processes. Defaults to the number of CPUs.
+        router (str, optional): routing engine. Defaults to "sabre".
+        trials (int, optional): transpile trials of every file, run in its worker. Defaults to 1.
+        seed (int, optional): seed of the trials. Defaults to None.
+
+    Returns:
+        Iterator[dict]: report of every file.
+    """
+    os.makedirs(output_directory, exist_ok=True)
+    paths = qasm_files(input_directory)
+    if not paths:
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(architecture, router)) as executor:
+        futures = [executor.submit(transpile_file, path, output_directory, trials, seed) for path in paths]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def _init_worker(architecture: Dict[int, List[int]], router: str) -> None:
+    global _transpiler
+    _transpiler = CircuitTranspiler(architecture, router=router)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Transpiles a directory of OpenQASM files for a coupling map")
+    parser.add_argument("input", help="directory of the .qasm files")
+    parser.add_argument("coupling_map", help="JSON file with {node: [neighbors]} or a list of [node, node] edges")
+    parser.add_argument("--output", help="directory of the transpiled files, INPUT/routed by default")
+    parser.add_argument("--report", help=f"JSON-lines report, OUTPUT/{REPORT_NAME} by default")
+    parser.add_argument("--workers", type=int, help="number of processes, the number of CPUs by default")
+    parser.add_argument("--router", default="sabre", help="routing engine, sabre or greedy")
+    parser.add_argument("--trials", type=int, default=1, help="transpile trials of every file")
+    parser.add_argument("--seed", type=int, help="seed of the trials")
+    args = parser.parse_args(argv)
+
+    output = args.output or os.path.join(args.input, "routed")
+    report_path = args.report or os.path.join(output, REPORT_NAME)
+    architecture = load_coupling_map(args.coupling_map)
+
+    failures = 0
+    total = 0
+    os.makedirs(output, exist_ok=True)
+    with open(report_path, "w") as report:
+        for line in transpile_directory(
+            args.input, architecture, output, args.workers, args.router, args.trials, args.seed
+        ):
+            report.write(json.dumps(line) + "\n")
+            report.flush()
+            total += 1
+            if line["status"] == "ok":
+                print(f"{line['file']:<40} swaps={line['swaps']:<6} depth={line['depth']:<6} {line['time']:8.3f}s")
+            else:
+                failures += 1
+                print(f"{line['file']:<40} {line['error']}")
+
+    print(f"{total - failures}/{total} files transpiled, report written to {report_path}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
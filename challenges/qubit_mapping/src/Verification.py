@@ -0,0 +1,193 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from qibo import Circuit, gates, models
+
+from GateIR import string_gate
+
+# Decomposition of the Clifford gates into the H, S, X, Z and CNOT updates of the tableau. "sdg" is S^3 up to a phase.
+_DECOMPOSITIONS: Dict[str, List[Tuple[str, Tuple[int, ...]]]] = {
+    "sdg": [("s", (0,)), ("z", (0,))],
+    "sx": [("h", (0,)), ("s", (0,)), ("h", (0,))],
+    "sxdg": [("h", (0,)), ("s", (0,)), ("z", (0,)), ("h", (0,))],
+    "cz": [("h", (1,)), ("cx", (0, 1)), ("h", (1,))],
+    "cy": [("s", (1,)), ("z", (1,)), ("cx", (0, 1)), ("s", (1,))],
+}
+CLIFFORD_GATES = {"id", "h", "x", "y", "z", "s", "cx", "swap"} | set(_DECOMPOSITIONS)
+# Gates left out of the comparison
+IGNORED_GATES = {"measure"}
+
+# Largest number of qubits of the dense check, reference qubits included
+MAX_DENSE_QUBITS = 26
+
+
+class CliffordTableau:
+    """Stabilizer tableau (Aaronson and Gottesman, "Improved Simulation of Stabilizer Circuits", 2004) of a Clifford
+    unitary U on n qubits. Row j is U X_j U^dagger and row n + j is U Z_j U^dagger, each stored as the X bits, the Z bits
+    and the sign of a Pauli string. Every gate is an O(n) update of the columns it acts on, and two circuits implement
+    the same unitary, up to a global phase, when their tableaux are equal.
+
+    Args:
+        nqubits (int): number of qubits.
+    """
+
+    def __init__(self, nqubits: int):
+        self.nqubits = nqubits
+        self.x = np.zeros((2 * nqubits, nqubits), dtype=bool)
+        self.z = np.zeros((2 * nqubits, nqubits), dtype=bool)
+        self.sign = np.zeros(2 * nqubits, dtype=bool)
+        self.x[np.arange(nqubits), np.arange(nqubits)] = True
+        self.z[np.arange(nqubits, 2 * nqubits), np.arange(nqubits)] = True
+
+    @classmethod
+    def from_circuit(cls, circuit: models.Circuit) -> "CliffordTableau":
+        """Tableau of a circuit of Clifford gates, measurements are ignored.
+
+        Raises:
+            ValueError: If the circuit has a gate that is not in CLIFFORD_GATES.
+        """
+        tableau = cls(circuit.nqubits)
+        for gate in circuit.queue:
+            if gate.name not in IGNORED_GATES:
+                tableau.apply(gate.name, gate.qubits)
+        return tableau
+
+    def apply(self, name: str, qubits: Sequence[int]) -> None:
+        x, z = self.x, self.z
+        if name in _DECOMPOSITIONS:
+            for step, positions in _DECOMPOSITIONS[name]:
+                self.apply(step, [qubits[position] for position in positions])
+        elif name == "h":
+            (a,) = qubits
+            self.sign ^= x[:, a] & z[:, a]
+            x[:, a], z[:, a] = z[:, a].copy(), x[:, a].copy()
+        elif name == "s":
+            (a,) = qubits
+            self.sign ^= x[:, a] & z[:, a]
+            z[:, a] ^= x[:, a]
+        elif name == "x":
+            self.sign ^= z[:, qubits[0]]
+        elif name == "z":
+            self.sign ^= x[:, qubits[0]]
+        elif name == "y":
+            self.sign ^= x[:, qubits[0]] ^ z[:, qubits[0]]
+        elif name == "cx":
+            a, b = qubits
+            self.sign ^= x[:, a] & z[:, b] & ~(x[:, b] ^ z[:, a])
+            x[:, b] ^= x[:, a]
+            z[:, a] ^= z[:, b]
+        elif name == "swap":
+            a, b = qubits
+            x[:, [a, b]] = x[:, [b, a]]
+            z[:, [a, b]] = z[:, [b, a]]
+        elif name != "id":
+            raise ValueError(f"Gate {name} is not a supported Clifford gate")
+
+
+def is_clifford(circuit: models.Circuit) -> bool:
+    return all(gate.name in CLIFFORD_GATES or gate.name in IGNORED_GATES for gate in circuit.queue)
+
+
+def verify(
+    original: models.Circuit,
+    routed: models.Circuit,
+    final_mapping: Dict[int, int],
+    initial_mapping: Optional[Dict[int, int]] = None,
+    method: str = "auto",
+) -> bool:
+    """Checks that a routed circuit implements the original one, up to a global phase, once its input is placed with
+    the initial mapping and its output is read with the final mapping. Measurements are ignored.
+
+    The Clifford check compares stabilizer tableaux in O(gates * qubits + qubits^2), so it validates the routing of
+    circuits with hundreds of qubits. Physical qubits without a virtual qubit (ancillas) must only be permuted among
+    themselves. Circuits with non-Clifford gates fall back to a dense statevector check of the Choi state, where the
+    ancillas start and end in |0>, which is limited to about MAX_DENSE_QUBITS / 2 physical qubits.
+
+    Args:
+        original (models.Circuit): the circuit on virtual qubits.
+        routed (models.Circuit): the routed circuit on physical qubits.
+        final_mapping (Dict[int, int]): virtual qubit -> physical qubit at the end of the routed circuit.
+        initial_mapping (Dict[int, int], optional): virtual qubit -> physical qubit at the beginning of the routed
+            circuit. Defaults to the identity.
+        method (str, optional): "tableau", "dense" or "auto", which takes the tableau when both circuits are Clifford.
+            Defaults to "auto".
+
+    Raises:
+        ValueError: If the method is not supported, or the tableau method is asked for a non-Clifford circuit.
+
+    Returns:
+        bool: whether the circuits are equivalent.
+    """
+    if initial_mapping is None:
+        initial_mapping = {qubit: qubit for qubit in range(original.nqubits)}
+    if method == "auto":
+        method = "tableau" if is_clifford(original) and is_clifford(routed) else "dense"
+
+    if method == "tableau":
+        return _verify_tableau(original, routed, final_mapping, initial_mapping)
+    if method == "dense":
+        return _verify_dense(original, routed, final_mapping, initial_mapping)
+    raise ValueError(f"Method {method} not supported")
+
+
+def _verify_tableau(
+    original: models.Circuit, routed: models.Circuit, final_mapping: Dict[int, int], initial_mapping: Dict[int, int]
+) -> bool:
+    virtual = CliffordTableau.from_circuit(original)
+    physical = CliffordTableau.from_circuit(routed)
+    nqubits = original.nqubits
+
+    # U X_q U^dagger of the routed circuit, on the initial node of q, must be the one of the original circuit with
+    # every virtual qubit moved to its final node, and the same for Z_q
+    initial = np.array([initial_mapping[qubit] for qubit in range(nqubits)], dtype=np.int64)
+    final = np.array([final_mapping[qubit] for qubit in range(nqubits)], dtype=np.int64)
+    rows = np.concatenate([initial, initial + routed.nqubits])
+    for expected, actual in ((virtual.x, physical.x[rows]), (virtual.z, physical.z[rows])):
+        if actual[:, np.setdiff1d(np.arange(routed.nqubits), final)].any():
+            return False
+        if not np.array_equal(expected, actual[:, final]):
+            return False
+    if not np.array_equal(virtual.sign, physical.sign[rows]):
+        return False
+
+    # Ancillas may only be moved to the nodes left free by the final mapping: X_a -> X_b and Z_a -> Z_b
+    nnodes = routed.nqubits
+    ancillas = np.setdiff1d(np.arange(nnodes), initial)
+    targets = set()
+    for ancilla in ancillas.tolist():
+        nodes = np.flatnonzero(physical.x[ancilla])
+        if len(nodes) != 1 or physical.z[ancilla].any() or physical.x[nnodes + ancilla].any():
+            return False
+        if not np.array_equal(np.flatnonzero(physical.z[nnodes + ancilla]), nodes):
+            return False
+        if physical.sign[ancilla] or physical.sign[nnodes + ancilla]:
+            return False
+        targets.add(int(nodes[0]))
+    return len(targets) == len(ancillas) and targets.isdisjoint(final.tolist())
+
+
+def _verify_dense(
+    original: models.Circuit, routed: models.Circuit, final_mapping: Dict[int, int], initial_mapping: Dict[int, int]
+) -> bool:
+    # Choi states: every virtual qubit is entangled with a reference qubit placed after the physical qubits
+    nqubits = original.nqubits
+    total = routed.nqubits + nqubits
+    if total > MAX_DENSE_QUBITS:
+        raise ValueError(f"Dense verification of {total} qubits is not supported")
+
+    states = []
+    for circuit, mapping, rename in ((routed, initial_mapping, False), (original, final_mapping, True)):
+        choi = Circuit(total)
+        for qubit in range(nqubits):
+            choi.add(gates.H(routed.nqubits + qubit))
+            choi.add(gates.CNOT(routed.nqubits + qubit, mapping[qubit]))
+        for gate in circuit.queue:
+            if gate.name in IGNORED_GATES:
+                continue
+            qubits = tuple(final_mapping[qubit] for qubit in gate.qubits) if rename else gate.qubits
+            choi.add(string_gate(gate.name, qubits, gate.parameters))
+        # The original circuit is applied after the Bell pairs are built on the final nodes, which is the same as
+        # applying it on the initial nodes and moving the qubits with the SWAPs of the routing
+        states.append(np.asarray(choi().state()))
+
+    return bool(np.isclose(abs(np.vdot(states[0], states[1])), 1.0, atol=1e-8))